@@ -0,0 +1,76 @@
+"""
+Registre financier d'une classe.
+
+Les totaux payés / dus et les mois couverts de tous les étudiants d'une classe
+sont calculés en une seule requête groupée (agrégation conditionnelle sur les
+frais de scolarité), au lieu de plusieurs agrégats par étudiant.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from parametre.models import Etudiant
+from .models import FraisScolarite
+
+
+MOIS = [mois for mois, _ in FraisScolarite.MOIS_CHOICES]
+
+
+def _somme(filtre):
+    return Coalesce(
+        Sum('frais_scolarite__montant', filter=filtre),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def registre_classe(classe, mois=None):
+    """
+    Retourne, pour chaque étudiant actif de la classe (par ordre alphabétique),
+    un dictionnaire : etudiant, total_paye, total_du, solde, mois_couverts
+    (mois entièrement payés, dans l'ordre de l'année scolaire).
+    Avec `mois`, seuls les frais de ce mois sont pris en compte.
+    """
+    frais = Q(frais_scolarite__mois=mois) if mois else Q()
+    payes = frais & Q(frais_scolarite__is_complet=True)
+
+    etudiants = (
+        Etudiant.objects
+        .filter(classe=classe, actif=True)
+        .order_by('nom_prenom', 'id')
+        .annotate(
+            total_du=_somme(frais),
+            total_paye=_somme(payes),
+            # Un indicateur par mois, toujours dans la même requête
+            **{
+                f"mois_{index}": Count('frais_scolarite', filter=payes & Q(frais_scolarite__mois=nom))
+                for index, nom in enumerate(MOIS)
+            },
+        )
+    )
+
+    return [
+        {
+            "etudiant": etudiant,
+            "total_paye": etudiant.total_paye,
+            "total_du": etudiant.total_du,
+            "solde": etudiant.total_paye - etudiant.total_du,
+            "mois_couverts": [nom for index, nom in enumerate(MOIS) if getattr(etudiant, f"mois_{index}")],
+        }
+        for etudiant in etudiants
+    ]
+
+
+def totaux_registre(lignes):
+    """Totaux d'une classe à partir des lignes de `registre_classe`."""
+    total_attendu = sum((ligne["total_du"] for ligne in lignes), Decimal('0'))
+    total_percu = sum((ligne["total_paye"] for ligne in lignes), Decimal('0'))
+    etudiants_a_jour = sum(1 for ligne in lignes if ligne["total_paye"] >= ligne["total_du"])
+
+    return {
+        "total_attendu": total_attendu,
+        "total_percu": total_percu,
+        "etudiants_a_jour": etudiants_a_jour,
+        "etudiants_en_retard": len(lignes) - etudiants_a_jour,
+    }
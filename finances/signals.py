@@ -0,0 +1,23 @@
+# signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from parametre.models import Classe, Etudiant
+from .models import FraisScolarite
+from parametre.versions import toucher_etudiants
+from .tableau_de_bord import invalider_tableau_de_bord
+
+
+@receiver(post_save, sender=FraisScolarite)
+@receiver(post_delete, sender=FraisScolarite)
+@receiver(post_save, sender=Etudiant)
+@receiver(post_delete, sender=Etudiant)
+@receiver(post_save, sender=Classe)
+@receiver(post_delete, sender=Classe)
+def invalider_indicateurs(sender, **kwargs):
+    invalider_tableau_de_bord()
+
+
+@receiver(post_save, sender=FraisScolarite)
+@receiver(post_delete, sender=FraisScolarite)
+def version_etudiant_frais(sender, instance, **kwargs):
+    toucher_etudiants(pk=instance.etudiant_id)
@@ -0,0 +1,70 @@
+"""
+Reste à payer des frais de scolarité.
+
+FraisScolarite.reste_a_payer vaut Etudiant.montant - FraisScolarite.montant.
+Quand le montant d'un ou de plusieurs étudiants change, tous leurs frais sont
+recalculés par un seul UPDATE (le montant de l'étudiant est lu par une
+sous-requête), au lieu d'un save() par frais.
+
+Ces UPDATE ne déclenchent pas les signaux : les fonctions qui modifient
+Etudiant.montant en masse invalident elles-mêmes le tableau de bord, les
+versions des étudiants (GET conditionnels) et le cache de l'API.
+"""
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Subquery, Value, When
+
+from parametre import cache_api
+from parametre.models import Etudiant
+from parametre.versions import toucher_etudiants
+from .models import FraisScolarite
+from .tableau_de_bord import invalider_tableau_de_bord
+
+
+def recalculer_reste_a_payer(**filtre):
+    """
+    Recalcule le reste à payer des frais des étudiants correspondant au
+    filtre (ex. pk__in=[...], classe_id=3) ; une requête. Retourne le
+    nombre de frais mis à jour.
+    """
+    montant_etudiant = Subquery(Etudiant.objects.filter(pk=OuterRef('etudiant_id')).values('montant')[:1])
+    return FraisScolarite.objects.filter(
+        etudiant__in=Etudiant.objects.filter(**filtre).values('pk'),
+    ).update(reste_a_payer=montant_etudiant - F('montant'))
+
+
+def _apres_modification(**filtre):
+    toucher_etudiants(**filtre)
+    invalider_tableau_de_bord()
+    cache_api.invalider(Etudiant)
+
+
+def modifier_montants(montants):
+    """
+    Enregistre les montants {etudiant_id: montant} (liste modifiable de
+    l'administration) : un UPDATE des étudiants, un UPDATE de leurs frais.
+    """
+    if not montants:
+        return 0
+    with transaction.atomic():
+        Etudiant.objects.filter(pk__in=montants).update(montant=Case(
+            *[When(pk=pk, then=Value(montant)) for pk, montant in montants.items()],
+            output_field=Etudiant._meta.get_field('montant'),
+        ))
+        frais = recalculer_reste_a_payer(pk__in=montants)
+        _apres_modification(pk__in=montants)
+    return frais
+
+
+def modifier_montant_classe(classe_id, montant, actifs_seulement=False):
+    """
+    Applique `montant` à tous les étudiants de la classe (actifs seulement
+    si demandé). Retourne (nombre d'étudiants, nombre de frais) mis à jour.
+    """
+    filtre = {'classe_id': classe_id}
+    if actifs_seulement:
+        filtre['actif'] = True
+    with transaction.atomic():
+        etudiants = Etudiant.objects.filter(**filtre).update(montant=montant)
+        frais = recalculer_reste_a_payer(**filtre)
+        _apres_modification(**filtre)
+    return etudiants, frais
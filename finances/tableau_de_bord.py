@@ -0,0 +1,109 @@
+"""
+Indicateurs du tableau de bord (/api/statistiques/...).
+
+Tous les indicateurs par classe et globaux sont calculés en deux requêtes
+groupées, quel que soit le nombre de classes :
+- les classes avec leurs effectifs actifs / inactifs ;
+- les frais de scolarité agrégés par classe.
+
+Le résultat est mis en cache quelques instants (TABLEAU_DE_BORD_TTL, en
+secondes) et invalidé à chaque écriture sur Etudiant, Classe ou
+FraisScolarite (voir signals.py). Comme pour le cache de l'API, cela suppose
+un cache partagé entre les processus : avec le LocMemCache par défaut,
+l'invalidation ne toucherait que le worker qui a fait l'écriture, les
+indicateurs sont donc recalculés à chaque appel (voir
+parametre.cache_api.cache_partage).
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from parametre.cache_api import cache_partage
+from parametre.models import Classe
+from .models import FraisScolarite
+
+
+CLE_CACHE = "finances:tableau_de_bord"
+TTL_DEFAUT = 60
+
+# Mois en français (selon MOIS_CHOICES ; août et septembre n'y figurent pas)
+MOIS_FRANCAIS = {
+    1: 'Janvier', 2: 'Février', 3: 'Mars', 4: 'Avril', 5: 'Mai', 6: 'Juin',
+    7: 'Juillet', 8: 'Août', 9: 'Septembre', 10: 'Octobre', 11: 'Novembre', 12: 'Décembre',
+}
+
+
+def mois_courant():
+    return MOIS_FRANCAIS[datetime.now().month]
+
+
+def _calculer(mois):
+    classes = list(
+        Classe.objects
+        .select_related('filiere')
+        .annotate(
+            etudiants_actifs=Count('etudiants', filter=Q(etudiants__actif=True)),
+            etudiants_inactifs=Count('etudiants', filter=Q(etudiants__actif=False)),
+        )
+    )
+
+    frais = {
+        ligne['etudiant__classe_id']: ligne
+        for ligne in (
+            FraisScolarite.objects
+            .values('etudiant__classe_id')
+            .annotate(
+                total_paye_mois=Sum('montant', filter=Q(mois=mois, is_complet=True)),
+                total_paye=Sum('montant', filter=Q(is_complet=True)),
+                total_en_attente=Sum('montant', filter=Q(is_complet=False)),
+                paiements_en_attente=Count('id', filter=Q(is_complet=False)),
+            )
+            .order_by()
+        )
+    }
+    vide = {'total_paye_mois': None, 'total_paye': None, 'total_en_attente': None, 'paiements_en_attente': 0}
+
+    par_classe = []
+    for classe in classes:
+        ligne = frais.get(classe.pk, vide)
+        par_classe.append({
+            "classe_id": classe.pk,
+            "classe_nom": classe.nom,
+            "filiere_nom": classe.filiere.nom,
+            "niveau": classe.niveau,
+            "etudiants_actifs": classe.etudiants_actifs,
+            "etudiants_inactifs": classe.etudiants_inactifs,
+            "total_paye_mois": ligne['total_paye_mois'] or Decimal('0'),
+            "total_paye": ligne['total_paye'] or Decimal('0'),
+            "total_en_attente": ligne['total_en_attente'] or Decimal('0'),
+            "paiements_en_attente": ligne['paiements_en_attente'],
+        })
+
+    return {
+        "mois": mois,
+        "classes": par_classe,
+        "etudiants_actifs": sum(ligne["etudiants_actifs"] for ligne in par_classe),
+        "etudiants_inactifs": sum(ligne["etudiants_inactifs"] for ligne in par_classe),
+        "total_paye_mois": sum((ligne['total_paye_mois'] or 0 for ligne in frais.values()), Decimal('0')),
+        "total_paye": sum((ligne['total_paye'] or 0 for ligne in frais.values()), Decimal('0')),
+        "total_en_attente": sum((ligne['total_en_attente'] or 0 for ligne in frais.values()), Decimal('0')),
+    }
+
+
+def tableau_de_bord():
+    """Indicateurs du mois courant, depuis le cache si possible."""
+    mois = mois_courant()
+    if not cache_partage():
+        return _calculer(mois)
+    donnees = cache.get(CLE_CACHE)
+    if donnees is None or donnees["mois"] != mois:
+        donnees = _calculer(mois)
+        cache.set(CLE_CACHE, donnees, getattr(settings, 'TABLEAU_DE_BORD_TTL', TTL_DEFAUT))
+    return donnees
+
+
+def invalider_tableau_de_bord():
+    cache.delete(CLE_CACHE)
@@ -1,120 +1,61 @@
 from django.contrib import admin
-from .models import ResultatEtudiant, ParametreResultat, MatiereRattrapage, ResultatAdmissionClasseSession
+from .models import ResultatEtudiant, ParametreResultat, MatiereRattrapage, ResultatAdmissionClasseSession, LotBulletins, CandidatRattrapage
 from django.shortcuts import redirect
 from unfold.admin import ModelAdmin
 from .views import generate_pdf_resultat_etudiant, attestation_inscription
+from .bulletins import lancer_lot, marquer_abandonnes
+from .cache_pdf import pdf_en_cache, reponse_pdf, PORTEE_LISTES
+from .resultats import resultats_classes, session_courante
 from django.utils import timezone
-from django.urls import path
+from django.templatetags.static import static
+from django.urls import path, reverse
+from django.utils.html import format_html
 from django.template.response import TemplateResponse
-from parametre.models import Etudiant
 from django.conf import settings
 
 # Création de PDF
 
-import io
-from django.template.loader import render_to_string
 from django.http import HttpResponse
-from xhtml2pdf import pisa
 
 
 def export_attestation_inscription_pdf(modeladmin, request, queryset):
-    resultats = []
-
-    for resultat in queryset:
-        classe = resultat.classe
-        session = resultat.session
-
-        etudiants_admis = []
-
-        # On sélectionne uniquement les étudiants actifs de la classe
-        etudiants = Etudiant.objects.filter(classe=classe, actif=True)
-        for etu in etudiants:
-            moyenne = etu.moyenne_generale(session)
-            if moyenne is not None and moyenne >= 10:
-                etudiants_admis.append({
-                    'nom': etu.nom_prenom,
-                    'matricule': etu.matricule,
-                    'classe': etu.classe,
-                })
-
-
-                # N'ajouter que si au moins un étudiant a des matières non validées
-        if etudiants_admis:
-            resultats.append({
-                'classe': classe,
-                'session': session,
-                'etudiants': etudiants_admis
-            })
-
-    # Rendu HTML avec template
-    html = render_to_string("admin/etudiants_admis_pdf.html", {
-        'resultats': resultats,
-        'date_du_jour': timezone.now(),
-        'logo_path': 'http://127.0.0.1:8080/static/logo_estim.jpg',
-
-    })
-
-    # Génération PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="etudiants_admis.pdf"'
-
-    pisa_status = pisa.CreatePDF(io.StringIO(html), dest=response)
-
-    if pisa_status.err:
-        return HttpResponse("Erreur lors de la génération du PDF", status=500)
-
-    return response
+    # Même liste que export_etudiants_admis_pdf
+    return export_etudiants_admis_pdf(modeladmin, request, queryset)
 
 
 
 def export_etudiants_admis_pdf(modeladmin, request, queryset):
-    resultats = []
-
-    for resultat in queryset:
-        classe = resultat.classe
-        session = resultat.session
-
-        etudiants_admis = []
-
-        # On sélectionne uniquement les étudiants actifs de la classe
-        etudiants = Etudiant.objects.filter(classe=classe, actif=True)
-
-        for etu in etudiants:
-            moyenne = etu.moyenne_generale(session)
-            if moyenne is not None and moyenne >= 10:
-                etudiants_admis.append({
+    # Résultats de toutes les (classe, session) sélectionnées en quelques requêtes
+    resultats = [
+        {
+            'classe': bloc['classe'],
+            'session': bloc['session'],
+            'etudiants': [
+                {
                     'nom': etu.nom_prenom,
                     'matricule': etu.matricule,
                     'classe': etu.classe,
-                })
-
-
-                # N'ajouter que si au moins un étudiant a des matières non validées
-        if etudiants_admis:
-            resultats.append({
-                'classe': classe,
-                'session': session,
-                'etudiants': etudiants_admis
-            })
-
-    # Rendu HTML avec template
-    html = render_to_string("admin/etudiants_admis_pdf.html", {
+                }
+                for etu in bloc['admis']
+            ],
+        }
+        for bloc in resultats_classes((resultat.classe, resultat.session) for resultat in queryset.select_related('classe', 'session'))
+        # N'ajouter que si au moins un étudiant est admis
+        if bloc['admis']
+    ]
+
+    # Rendu HTML avec template, PDF resservi depuis le cache si rien n'a changé
+    contenu = pdf_en_cache("admin/etudiants_admis_pdf.html", {
         'resultats': resultats,
         'date_du_jour': timezone.now(),
-        'logo_path': 'http://127.0.0.1:8080/static/logo_estim.jpg',
-
-    })
+        'logo_path': static('logo_estim.jpg'),
 
-    # Génération PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="etudiants_admis.pdf"'
+    }, PORTEE_LISTES)
 
-    pisa_status = pisa.CreatePDF(io.StringIO(html), dest=response)
-
-    if pisa_status.err:
+    if contenu is None:
         return HttpResponse("Erreur lors de la génération du PDF", status=500)
 
-    return response
+    return reponse_pdf(contenu, "etudiants_admis.pdf")
 
 
 
@@ -123,46 +64,38 @@ export_etudiants_admis_pdf.short_description = "Imprimer la liste des étudiants
 
 
 def export_matieres_non_valides_pdf(modeladmin, request, queryset):
-    donnees = []
-
-    for rattrapage in queryset:
-        classe = rattrapage.classe
-        session = rattrapage.session
-        etudiants_data = []
-
-        etudiants = Etudiant.objects.filter(classe=classe, actif=True)
-        for etudiant in etudiants:
-            matieres = etudiant.matieres_non_valides(session)
-            if matieres:  # équivaut à "is not None and len(matieres) > 0"
-                etudiants_data.append({
+    donnees = [
+        {
+            'classe': bloc['classe'],
+            'session': bloc['session'],
+            'etudiants': [
+                {
                     'nom': etudiant.nom_prenom,
                     'matieres': matieres
-                })
-
+                }
+                for etudiant, matieres in bloc['non_valides']
+            ],
+        }
+        for bloc in resultats_classes((rattrapage.classe, rattrapage.session) for rattrapage in queryset.select_related('classe', 'session'))
         # N'ajouter que si au moins un étudiant a des matières non validées
-        if etudiants_data:
-            donnees.append({
-                'classe': classe,
-                'session': session,
-                'etudiants': etudiants_data
-            })
+        if bloc['non_valides']
+    ]
 
     # Ne pas générer de PDF vide
     if not donnees:
         return HttpResponse("Aucune donnée à exporter.", content_type="text/plain")
     
 
-    html = render_to_string('admin/matieres_non_valides_simple.html', {
+    contenu = pdf_en_cache('admin/matieres_non_valides_simple.html', {
         'donnees': donnees,
         'date_du_jour': timezone.now(),
-        'logo_path': 'http://127.0.0.1:8080/static/logo_estim.jpg',
-    })
+        'logo_path': static('logo_estim.jpg'),
+    }, PORTEE_LISTES)
 
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="matieres_non_valides.pdf"'
+    if contenu is None:
+        return HttpResponse("Erreur lors de la génération du PDF", status=500)
 
-    pisa.CreatePDF(io.BytesIO(html.encode("utf-8")), dest=response)
-    return response
+    return reponse_pdf(contenu, "matieres_non_valides.pdf")
 
 export_matieres_non_valides_pdf.short_description = "Imprimer la liste des matières non validées (PDF)"
 
@@ -181,6 +114,18 @@ class MatiereRattrapageAdmin(ModelAdmin):
     #     qs = super().get_queryset(request)
     #     return qs.select_related('session', 'classe')
 
+@admin.register(CandidatRattrapage)
+class CandidatRattrapageAdmin(ModelAdmin):
+    list_display = ['etudiant', 'matiere', 'session', 'moyenne_brute', 'note_devoir', 'note_examen']
+    list_filter = ['session', 'matiere__classe', 'matiere']
+    search_fields = ['etudiant__nom_prenom', 'etudiant__matricule', 'matiere__nom']
+    list_select_related = ['etudiant__classe', 'matiere', 'session']
+    list_per_page = 50
+    readonly_fields = ['etudiant', 'matiere', 'session', 'note_devoir', 'note_examen', 'moyenne_brute', 'coefficient', 'moyenne_ponderee', 'date_maj']
+
+    def has_add_permission(self, request):
+        return False
+
 @admin.register(ResultatAdmissionClasseSession)
 class ResultatAdmissionClasseSessionAdmin(ModelAdmin):
     list_display = ['classe', 'session',]
@@ -199,6 +144,51 @@ class ParametreResultatAdmin(ModelAdmin):
 
 
 
+@admin.register(LotBulletins)
+class LotBulletinsAdmin(ModelAdmin):
+    list_display = ['__str__', 'format', 'statut', 'avancement', 'telecharger', 'date_creation']
+    list_filter = ['statut', 'session']
+    list_per_page = 20
+    autocomplete_fields = ['classe',]
+    readonly_fields = ['statut', 'avancement', 'telecharger', 'erreur', 'date_creation', 'date_fin']
+    actions = ['relancer']
+
+    def changelist_view(self, request, extra_context=None):
+        # Lots interrompus (processus recyclé en cours de génération) : passés en erreur
+        marquer_abandonnes()
+        return super().changelist_view(request, extra_context)
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj:
+            return ['classe', 'session', 'format'] + self.readonly_fields
+        return []
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            lancer_lot(obj)
+
+    @admin.action(description="🔁 Relancer les lots en erreur")
+    def relancer(self, request, queryset):
+        lots = list(queryset.filter(statut='erreur'))
+        for lot in lots:
+            LotBulletins.objects.filter(pk=lot.pk).update(
+                statut='en_attente', traites=0, erreur="", date_fin=None, date_maj=timezone.now(),
+            )
+            lancer_lot(lot)
+        self.message_user(request, f"{len(lots)} lot(s) relancé(s).")
+
+    @admin.display(description="Avancement")
+    def avancement(self, obj):
+        return f"{obj.traites}/{obj.total} ({obj.progression} %)"
+
+    @admin.display(description="Fichier")
+    def telecharger(self, obj):
+        if obj.statut != 'termine' or not obj.fichier:
+            return "-"
+        return format_html('<a href="{}">Télécharger</a>', obj.fichier.url)
+
+
 @admin.register(ResultatEtudiant)
 class ResultatEtudiantAdmin(ModelAdmin):
     list_display = ['etudiant', 'moyenne_generale']
@@ -211,9 +201,19 @@ class ResultatEtudiantAdmin(ModelAdmin):
         if queryset.count() == 1:
             resultat = queryset.first()
             return generate_pdf_resultat_etudiant(request, resultat)
-        else:
-            self.message_user(request, "Veuillez sélectionner un seul étudiant à la fois.", level="warning")
+
+        # Plusieurs étudiants : génération en arrière-plan, pour la session courante
+        session = session_courante()
+        if session is None:
+            self.message_user(request, "Aucune session de résultats configurée : choisissez-en une dans les paramètres de résultats.", level="error")
             return redirect(request.get_full_path())
+        lot = LotBulletins.objects.create(
+            session=session,
+            etudiants=sorted(set(queryset.values_list('etudiant_id', flat=True))),
+        )
+        lancer_lot(lot)
+        self.message_user(request, f"Génération de {len(lot.etudiants)} bulletins lancée en arrière-plan.")
+        return redirect(reverse('admin:gestion_des_resultats_lotbulletins_change', args=[lot.pk]))
 
 
 
@@ -6,6 +6,5 @@ class AppConfig(AppConfig):
     name = 'gestion_des_resultats'
     verbose_name = "GESTION DES RESULTATS"
 
-
-def ready(self):
-    import gestion_des_resultats.signals
+    def ready(self):
+        import gestion_des_resultats.signals
@@ -0,0 +1,140 @@
+"""
+Génération des bulletins par lot (voir LotBulletins).
+
+Le contenu de chaque bulletin est préparé dans un thread d'arrière-plan à
+partir des résultats pré-calculés (deux requêtes pour tout le lot), puis rendu
+en PDF par un pool de processus avec le moteur configuré (voir rendu.py).
+L'avancement est enregistré sur le lot au fil des rendus ; le fichier final
+(ZIP ou PDF fusionné) est attaché au lot.
+
+Le pool tourne dans le processus web : sa taille est fixe et réglable.
+
+    BULLETINS_WORKERS = 2           # processus de rendu par lot (2 par défaut)
+    BULLETINS_DELAI_ABANDON = 1800  # secondes sans avancement avant abandon
+
+Si le processus web est recyclé pendant une génération, le lot ne progresse
+plus : `marquer_abandonnes` le passe en erreur (à l'affichage des lots dans
+l'administration), d'où il peut être relancé.
+"""
+import io
+import multiprocessing
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connection, transaction
+from django.template.loader import get_template
+from django.utils import timezone
+from pypdf import PdfWriter
+
+from .models import LotBulletins
+from .resultats import resultats_session, lignes_bulletins
+from . import rendu
+from .utils import initialiser_worker
+from .views import contexte_bulletin
+
+
+WORKERS_DEFAUT = 2
+DELAI_ABANDON_DEFAUT = 1800
+
+
+def nombre_workers():
+    return getattr(settings, 'BULLETINS_WORKERS', None) or WORKERS_DEFAUT
+
+
+def marquer_abandonnes():
+    """Passe en erreur les lots en attente / en cours sans avancement depuis BULLETINS_DELAI_ABANDON."""
+    limite = timezone.now() - timedelta(seconds=getattr(settings, 'BULLETINS_DELAI_ABANDON', DELAI_ABANDON_DEFAUT))
+    return LotBulletins.objects.filter(statut__in=['en_attente', 'en_cours'], date_maj__lt=limite).update(
+        statut='erreur', erreur="Génération interrompue (aucun avancement), relancez le lot.", date_fin=timezone.now(),
+    )
+
+
+def lancer_lot(lot):
+    """Démarre la génération du lot une fois la transaction courante validée."""
+    thread = threading.Thread(target=generer_lot, args=(lot.pk,), daemon=True)
+    transaction.on_commit(thread.start)
+
+
+def _documents(lot, moteur):
+    """
+    Retourne [(etudiant, html, contexte)] pour tous les étudiants du lot :
+    seul ce dont le moteur a besoin est transmis au pool (le HTML pour
+    xhtml2pdf, le contexte pour ReportLab).
+    """
+    template = get_template('admin/bulletin.html')
+    etudiants = list(lot.etudiants_concernes())
+    ids = [etudiant.pk for etudiant in etudiants]
+
+    moyennes = resultats_session(ids, lot.session_id)
+    lignes = lignes_bulletins(ids, lot.session_id)
+
+    documents = []
+    for etudiant in etudiants:
+        contexte = contexte_bulletin(etudiant, moyennes[etudiant.pk].moyenne_generale, lignes[etudiant.pk])
+        if moteur == 'xhtml2pdf':
+            documents.append((etudiant, template.render(contexte), None))
+        else:
+            documents.append((etudiant, None, contexte))
+    return documents
+
+
+def _assembler(lot, etudiants, pdfs, destination):
+    """Écrit le ZIP ou le PDF fusionné (dans l'ordre des étudiants)."""
+    if lot.format == 'pdf':
+        fusion = PdfWriter()
+        for index in sorted(pdfs):
+            fusion.append(pdfs[index])
+        fusion.write(destination)
+        return
+
+    with zipfile.ZipFile(destination, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for index in sorted(pdfs):
+            archive.writestr(f"bulletin_{etudiants[index].matricule}.pdf", pdfs[index].getvalue())
+
+
+def generer_lot(lot_id):
+    lot = LotBulletins.objects.select_related('session').get(pk=lot_id)
+    try:
+        moteur = rendu.moteur('bulletin')
+        documents = _documents(lot, moteur)
+        LotBulletins.objects.filter(pk=lot_id).update(statut='en_cours', total=len(documents), traites=0, date_maj=timezone.now())
+
+        etudiants = [etudiant for etudiant, _, _ in documents]
+        pdfs, echecs = {}, []
+        mp_contexte = multiprocessing.get_context('spawn')
+        workers = max(1, min(nombre_workers(), len(documents)))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_contexte, initializer=initialiser_worker) as pool:
+            futures = {
+                pool.submit(rendu.rendre, 'bulletin', html, contexte, None, moteur): index
+                for index, (_, html, contexte) in enumerate(documents)
+            }
+            for traites, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                contenu, erreur = future.result()
+                if erreur:
+                    echecs.append(etudiants[index].matricule)
+                else:
+                    pdfs[index] = io.BytesIO(contenu)
+                LotBulletins.objects.filter(pk=lot_id).update(traites=traites, date_maj=timezone.now())
+
+        with tempfile.TemporaryFile() as destination:
+            _assembler(lot, etudiants, pdfs, destination)
+            destination.seek(0)
+            lot.fichier.save(f"bulletins_{lot_id}.{lot.format}", File(destination), save=False)
+
+        LotBulletins.objects.filter(pk=lot_id).update(
+            statut='termine',
+            fichier=lot.fichier.name,
+            date_maj=timezone.now(),
+            erreur=f"Échec du rendu pour : {', '.join(echecs)}" if echecs else "",
+            date_fin=timezone.now(),
+        )
+    except Exception as exc:
+        LotBulletins.objects.filter(pk=lot_id).update(statut='erreur', erreur=str(exc), date_fin=timezone.now())
+    finally:
+        connection.close()
@@ -0,0 +1,120 @@
+"""
+Cache disque des PDF générés (bulletins, attestations, listes d'admis).
+
+La clé est l'empreinte SHA-256 du nom du template, du moteur de rendu (voir
+rendu.py) et du HTML rendu, c'est-à-dire du template appliqué aux données
+exactes du document : tant que rien ne change, le même PDF est resservi sans
+repasser par le moteur.
+
+Les fichiers sont rangés par portée sous MEDIA_ROOT/cache_pdf/ :
+- `etudiant_<id>/` pour les documents d'un étudiant ;
+- `listes/` pour les documents portant sur plusieurs étudiants.
+Une portée est vidée quand les notes ou la fiche de l'étudiant changent
+(voir signals.py). La taille totale est bornée (PDF_CACHE_TAILLE_MAX, en
+octets) : les fichiers les moins récemment servis sont supprimés en premier.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+from . import rendu
+
+
+TAILLE_MAX_DEFAUT = 200 * 1024 * 1024
+PORTEE_LISTES = 'listes'
+
+
+def racine():
+    return os.path.join(settings.MEDIA_ROOT, getattr(settings, 'PDF_CACHE_DIR', 'cache_pdf'))
+
+
+def portee_etudiant(etudiant):
+    return f"etudiant_{getattr(etudiant, 'pk', etudiant)}"
+
+
+def cle(template_name, html, moteur=rendu.MOTEUR_DEFAUT):
+    return hashlib.sha256(f"{template_name}\0{moteur}\0{html}".encode("utf-8")).hexdigest()
+
+
+def pdf_en_cache(template_name, context, portee, callback=None):
+    """
+    Retourne le PDF (bytes) du template rendu avec `context`, depuis le cache
+    si la clé est connue. Retourne None si le rendu échoue (rien n'est mis
+    en cache dans ce cas).
+    """
+    type_document = rendu.type_document(template_name)
+    moteur = rendu.moteur(type_document)
+    html = render_to_string(template_name, context)
+    dossier = os.path.join(racine(), portee)
+    chemin = os.path.join(dossier, f"{cle(template_name, html, moteur)}.pdf")
+
+    try:
+        with open(chemin, 'rb') as fichier:
+            contenu = fichier.read()
+        os.utime(chemin)  # Date de dernier accès pour l'éviction LRU
+        return contenu
+    except FileNotFoundError:
+        pass
+
+    contenu, erreur = rendu.rendre(type_document, html, context, callback, moteur)
+    if erreur:
+        return None
+
+    # Écriture atomique : un lecteur concurrent ne voit jamais de fichier partiel
+    os.makedirs(dossier, exist_ok=True)
+    descripteur, temporaire = tempfile.mkstemp(dir=dossier, suffix='.tmp')
+    with os.fdopen(descripteur, 'wb') as fichier:
+        fichier.write(contenu)
+    os.replace(temporaire, chemin)
+
+    evincer()
+    return contenu
+
+
+def reponse_pdf(contenu, nom_fichier):
+    response = HttpResponse(contenu, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{nom_fichier}"'
+    return response
+
+
+def evincer(taille_max=None):
+    """Supprime les PDF les moins récemment utilisés au-delà de la taille maximale."""
+    if taille_max is None:
+        taille_max = getattr(settings, 'PDF_CACHE_TAILLE_MAX', TAILLE_MAX_DEFAUT)
+
+    fichiers = []
+    for dossier, _, noms in os.walk(racine()):
+        for nom in noms:
+            if not nom.endswith('.pdf'):
+                continue
+            chemin = os.path.join(dossier, nom)
+            try:
+                stat = os.stat(chemin)
+            except FileNotFoundError:
+                continue
+            fichiers.append((stat.st_mtime, stat.st_size, chemin))
+
+    total = sum(taille for _, taille, _ in fichiers)
+    for _, taille, chemin in sorted(fichiers):
+        if total <= taille_max:
+            break
+        try:
+            os.remove(chemin)
+        except FileNotFoundError:
+            pass
+        total -= taille
+
+
+def invalider(*portees):
+    for portee in portees:
+        shutil.rmtree(os.path.join(racine(), portee), ignore_errors=True)
+
+
+def invalider_etudiants(etudiant_ids):
+    """Vide le cache des étudiants donnés et celui des listes."""
+    invalider(PORTEE_LISTES, *(portee_etudiant(etudiant_id) for etudiant_id in etudiant_ids))
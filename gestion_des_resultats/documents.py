@@ -0,0 +1,57 @@
+"""
+Textes fixes des documents PDF (bulletin, attestations) : école, ville,
+signataires et formules des attestations.
+
+Source unique pour les deux moteurs de rendu : contexte_bulletin et
+contexte_attestation (views.py) les placent dans le contexte, lu par les
+templates admin/*.html comme par rendu_reportlab.py.
+"""
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+ECOLE = "Ecole Supérieure de Technologie, d’Ingénierie et de Management (ESTIM)"
+VILLE = "Brazzaville"
+
+SIGNATAIRE_BULLETIN = {
+    'fonction': "Le Chef de Service de la Scolarité et des Examens",
+    'nom': "Allégra Merveille Bénaïah KODIA MISSENGUI",
+}
+SIGNATAIRE_ATTESTATION = {
+    'fonction': "Le Directeur Général",
+    'nom': "Wilfrid NGOYI NZAMBA",
+}
+
+# Corps des attestations : balises communes à xhtml2pdf et aux Paragraph
+# ReportLab (<strong>, <br/>), valeurs insérées échappées par corps_attestation
+ATTESTATIONS = {
+    'inscription': {
+        'titre': "ATTESTATION D’INSCRIPTION",
+        'corps': (
+            "Nous soussigné, <strong>{ecole}</strong>, attestons par la présente que M/Mme "
+            "<strong>{nom_complet}</strong>, né(e) le <strong>{date_naissance}</strong> à "
+            "<strong>{lieu_naissance}</strong>, est régulièrement inscrit(e) au sein de notre "
+            "établissement au titre de l’année académique <strong>{annee_academique}</strong>."
+        ),
+        'conclusion': "En foi de quoi cette attestation d'inscription lui est établie pour servir et valoir ce que de droit.",
+    },
+    'frequentation': {
+        'titre': "ATTESTATION DE FRÉQUENTATION",
+        'corps': (
+            "Nous soussigné, <strong>{ecole}</strong>, attestons par la présente que M/Mme "
+            "<strong>{nom_complet}</strong><br/>Né(e) le <strong>{date_naissance}</strong> à "
+            "<strong>{lieu_naissance}</strong>, fréquente régulièrement notre établissement au titre "
+            "de l’année académique <strong>{annee_academique}</strong>."
+        ),
+        'conclusion': "En foi de quoi cette attestation de fréquentation lui est établie pour servir et valoir ce que de droit.",
+    },
+}
+
+
+def textes_attestation(type_attestation, valeurs):
+    """
+    Titre, corps (HTML sûr) et conclusion de l'attestation `type_attestation`
+    ('inscription' ou 'frequentation'), le corps complété par `valeurs`.
+    """
+    textes = ATTESTATIONS[type_attestation]
+    corps = textes['corps'].format(ecole=escape(ECOLE), **{cle: escape(valeur) for cle, valeur in valeurs.items()})
+    return {'titre': textes['titre'], 'corps': mark_safe(corps), 'conclusion': textes['conclusion']}
@@ -2,4 +2,4 @@
 from django import forms
 
 class ImportExcelForm(forms.Form):
-    excel_file = forms.FileField()
+    excel_file = forms.FileField(label="Fichier Excel (.xlsx)")
@@ -0,0 +1,102 @@
+import gc
+import io
+import random
+import time
+import tracemalloc
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from pypdf import PdfReader
+
+from parametre.models import Classe, Etudiant, Filiere
+from gestion_des_resultats import rendu, rendu_reportlab
+from gestion_des_resultats.views import contexte_attestation, contexte_bulletin
+
+
+def classe_fictive(effectif, nombre_matieres, graine=0):
+    """Étudiants (non enregistrés) d'une classe fictive et leurs lignes de bulletin."""
+    aleatoire = random.Random(graine)
+    classe = Classe(nom="BENCH-1", niveau="Licence 1", filiere=Filiere(nom="Benchmark"))
+    documents = []
+    for numero in range(1, effectif + 1):
+        etudiant = Etudiant(
+            nom_prenom=f"ÉTUDIANT FICTIF {numero:03d}",
+            classe=classe,
+            matricule=f"B{numero:05d}",
+            date_naissance=date(2000, 1, 1 + numero % 28),
+            lieu_naissance="Brazzaville",
+        )
+        lignes = []
+        for index in range(1, nombre_matieres + 1):
+            devoir, examen = round(aleatoire.uniform(4, 18), 2), round(aleatoire.uniform(4, 18), 2)
+            moyenne = round((devoir + examen) / 2, 2)
+            coefficient = aleatoire.randint(1, 4)
+            lignes.append({
+                "matiere": f"Matière {index:02d}",
+                "note_devoir": devoir,
+                "note_examen": examen,
+                "moyenne_brute": moyenne,
+                "coefficient": coefficient,
+                "moyenne_ponderee": round(moyenne * coefficient, 2),
+            })
+        total = sum(ligne["coefficient"] for ligne in lignes)
+        moyenne_generale = round(sum(ligne["moyenne_ponderee"] for ligne in lignes) / total, 2)
+        documents.append((etudiant, moyenne_generale, lignes))
+    return documents
+
+
+class Command(BaseCommand):
+    help = "Compare les moteurs de rendu PDF (pages/seconde, pic mémoire) sur une classe fictive"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--etudiants', type=int, default=30, help="Effectif de la classe fictive (30 par défaut)")
+        parser.add_argument('--matieres', type=int, default=12, help="Nombre de matières par bulletin (12 par défaut)")
+        parser.add_argument('--documents', nargs='+', default=['bulletin', 'attestation_inscription'],
+                            choices=sorted(set(rendu.DOCUMENTS.values()) & set(rendu_reportlab.DOCUMENTS)),
+                            help="Types de documents comparés")
+        parser.add_argument('--moteurs', nargs='+', default=sorted(rendu.MOTEURS), choices=sorted(rendu.MOTEURS))
+
+    def handle(self, *args, **options):
+        if options['etudiants'] < 1 or options['matieres'] < 1:
+            raise CommandError("--etudiants et --matieres doivent être positifs")
+        classe = classe_fictive(options['etudiants'], options['matieres'])
+        templates = {type_document: template for template, type_document in rendu.DOCUMENTS.items()}
+
+        self.stdout.write(
+            f"Classe fictive : {options['etudiants']} étudiant(s), {options['matieres']} matière(s)\n"
+            f"{'Document':<28}{'Moteur':<12}{'Pages':>7}{'Durée (s)':>11}{'Pages/s':>10}{'Pic/doc (Mo)':>14}"
+        )
+        for type_document in options['documents']:
+            if type_document == 'bulletin':
+                contextes = [contexte_bulletin(etudiant, moyenne, lignes) for etudiant, moyenne, lignes in classe]
+            else:
+                contextes = [contexte_attestation(etudiant, type_document.removeprefix('attestation_')) for etudiant, _, _ in classe]
+            htmls = [render_to_string(templates[type_document], contexte) for contexte in contextes]
+
+            for moteur in options['moteurs']:
+                # Un document hors mesure : polices, images statiques, imports
+                rendu.rendre(type_document, htmls[0], contextes[0], nom_moteur=moteur)
+
+                debut = time.perf_counter()
+                pdfs = [rendu.rendre(type_document, html, contexte, nom_moteur=moteur)
+                        for html, contexte in zip(htmls, contextes)]
+                duree = time.perf_counter() - debut
+                if any(erreur for _, erreur in pdfs):
+                    raise CommandError(f"Échec du rendu {type_document} avec {moteur}")
+                pages = sum(len(PdfReader(io.BytesIO(contenu)).pages) for contenu, _ in pdfs)
+
+                # Pic mémoire par document, mesuré dans une seconde passe (tracemalloc
+                # fausserait la durée) ; les cycles du document précédent sont collectés
+                pic = 0
+                tracemalloc.start()
+                for html, contexte in zip(htmls, contextes):
+                    gc.collect()
+                    tracemalloc.reset_peak()
+                    rendu.rendre(type_document, html, contexte, nom_moteur=moteur)
+                    pic = max(pic, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+                self.stdout.write(
+                    f"{type_document:<28}{moteur:<12}{pages:>7}{duree:>11.2f}{pages / duree:>10.1f}{pic / 1024 / 1024:>14.1f}"
+                )
@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 16:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_des_resultats', '0001_initial'),
+        ('parametre', '0006_etudiant_montant'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultatMatiere',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('note_devoir', models.FloatField(blank=True, null=True)),
+                ('note_examen', models.FloatField(blank=True, null=True)),
+                ('moyenne_brute', models.FloatField(blank=True, null=True)),
+                ('coefficient', models.IntegerField(default=1)),
+                ('moyenne_ponderee', models.FloatField(blank=True, null=True)),
+                ('date_maj', models.DateTimeField(auto_now=True)),
+                ('etudiant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resultats_matieres', to='parametre.etudiant')),
+                ('matiere', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='parametre.matiere')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='parametre.semestreexamen')),
+            ],
+            options={
+                'verbose_name': 'RÉSULTAT PAR MATIÈRE (CALCULÉ)',
+                'verbose_name_plural': 'RÉSULTATS PAR MATIÈRE (CALCULÉS)',
+                'unique_together': {('etudiant', 'session', 'matiere')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ResultatSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('moyenne_generale', models.FloatField(blank=True, null=True)),
+                ('total_coefficients', models.IntegerField(default=0)),
+                ('nombre_matieres', models.IntegerField(default=0)),
+                ('mention', models.CharField(blank=True, default='', max_length=20)),
+                ('date_maj', models.DateTimeField(auto_now=True)),
+                ('etudiant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resultats_sessions', to='parametre.etudiant')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='parametre.semestreexamen')),
+            ],
+            options={
+                'verbose_name': 'RÉSULTAT PAR SESSION (CALCULÉ)',
+                'verbose_name_plural': 'RÉSULTATS PAR SESSION (CALCULÉS)',
+                'unique_together': {('etudiant', 'session')},
+            },
+        ),
+    ]
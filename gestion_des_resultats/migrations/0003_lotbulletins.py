@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 16:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_des_resultats', '0002_resultatmatiere_resultatsession'),
+        ('parametre', '0006_etudiant_montant'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LotBulletins',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('etudiants', models.JSONField(blank=True, default=list, editable=False)),
+                ('format', models.CharField(choices=[('zip', 'Archive ZIP (un PDF par étudiant)'), ('pdf', 'PDF unique')], default='zip', max_length=3)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('erreur', 'Erreur')], default='en_attente', editable=False, max_length=10)),
+                ('total', models.IntegerField(default=0, editable=False)),
+                ('traites', models.IntegerField(default=0, editable=False)),
+                ('fichier', models.FileField(blank=True, editable=False, null=True, upload_to='bulletins/')),
+                ('erreur', models.TextField(blank=True, default='', editable=False)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_fin', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('classe', models.ForeignKey(blank=True, help_text="Laisser vide pour une sélection d'étudiants", null=True, on_delete=django.db.models.deletion.CASCADE, to='parametre.classe')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='parametre.semestreexamen')),
+            ],
+            options={
+                'verbose_name': 'LOT DE BULLETINS | GÉNÉRATION PAR CLASSE',
+                'verbose_name_plural': 'LOTS DE BULLETINS | GÉNÉRATION PAR CLASSE',
+                'ordering': ['-date_creation'],
+            },
+        ),
+    ]
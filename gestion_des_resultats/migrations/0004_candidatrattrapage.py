@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 16:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_des_resultats', '0003_lotbulletins'),
+        ('parametre', '0009_etudiant_version_date_maj'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidatRattrapage',
+            fields=[
+            ],
+            options={
+                'verbose_name': 'RATTRAPAGE | CANDIDAT (CALCULÉ)',
+                'verbose_name_plural': 'RATTRAPAGE | CANDIDATS (CALCULÉS)',
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('gestion_des_resultats.resultatmatiere',),
+        ),
+        migrations.AddIndex(
+            model_name='resultatmatiere',
+            index=models.Index(condition=models.Q(('moyenne_brute__lt', 10)), fields=['session', 'matiere', 'etudiant'], name='resultat_rattrapage_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 17:31
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_des_resultats', '0004_candidatrattrapage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lotbulletins',
+            name='date_maj',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
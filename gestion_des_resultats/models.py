@@ -1,7 +1,8 @@
 from django.db import models
-from parametre.models import Etudiant, Classe, SemestreExamen
+from parametre.models import Etudiant, Classe, SemestreExamen, Matiere
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 
 class ResultatAdmissionClasseSession(models.Model):
@@ -44,12 +45,158 @@ class ResultatEtudiant(models.Model):
         return f"{self.etudiant.nom_prenom} : {self.moyenne_generale}"
     
     def save(self, *args, **kwargs):
-        etudiant = self.etudiant
-        self.moyenne_generale = etudiant.moyenne_generale(code_session=ParametreResultat.objects.all().first().session) or None
+        from .resultats import resultat_session
+        resultat = resultat_session(self.etudiant, ParametreResultat.objects.all().first().session)
+        self.moyenne_generale = resultat.moyenne_generale or None
+        self.mention = resultat.mention
         super().save(*args, **kwargs)
 
 
 
+class ResultatMatiere(models.Model):
+    """
+    Résultat pré-calculé d'un étudiant dans une matière pour une session.
+    Tenu à jour par les signaux de saisie des notes (voir resultats.py).
+    """
+    etudiant = models.ForeignKey(Etudiant, on_delete=models.CASCADE, related_name='resultats_matieres')
+    session = models.ForeignKey(SemestreExamen, on_delete=models.CASCADE)
+    matiere = models.ForeignKey(Matiere, on_delete=models.CASCADE)
+    note_devoir = models.FloatField(null=True, blank=True)
+    note_examen = models.FloatField(null=True, blank=True)
+    moyenne_brute = models.FloatField(null=True, blank=True)
+    coefficient = models.IntegerField(default=1)
+    moyenne_ponderee = models.FloatField(null=True, blank=True)
+    date_maj = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('etudiant', 'session', 'matiere')
+        verbose_name = "RÉSULTAT PAR MATIÈRE (CALCULÉ)"
+        verbose_name_plural = "RÉSULTATS PAR MATIÈRE (CALCULÉS)"
+        indexes = [
+            # Index des rattrapages : seules les matières sous la moyenne
+            models.Index(
+                fields=['session', 'matiere', 'etudiant'],
+                condition=models.Q(moyenne_brute__lt=10),
+                name='resultat_rattrapage_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.etudiant_id} - {self.matiere_id} : {self.moyenne_brute}"
+
+    def est_complet(self):
+        return self.moyenne_brute is not None
+
+    def ligne(self):
+        """Ligne de bulletin, identique à Etudiant.moyenne_par_matiere."""
+        return {
+            "matiere": self.matiere.nom,
+            "note_devoir": self.note_devoir,
+            "note_examen": self.note_examen,
+            "moyenne_brute": self.moyenne_brute,
+            "coefficient": self.coefficient,
+            "moyenne_ponderee": self.moyenne_ponderee,
+        }
+
+
+class RattrapageManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(moyenne_brute__lt=10)
+
+
+class CandidatRattrapage(ResultatMatiere):
+    """
+    Index des rattrapages : les ResultatMatiere dont la moyenne brute est
+    inférieure à 10, tenus à jour avec les résultats pré-calculés.
+    """
+    objects = RattrapageManager()
+
+    class Meta:
+        proxy = True
+        verbose_name = "RATTRAPAGE | CANDIDAT (CALCULÉ)"
+        verbose_name_plural = "RATTRAPAGE | CANDIDATS (CALCULÉS)"
+
+
+class ResultatSession(models.Model):
+    """
+    Moyenne générale pré-calculée d'un étudiant pour une session.
+    """
+    etudiant = models.ForeignKey(Etudiant, on_delete=models.CASCADE, related_name='resultats_sessions')
+    session = models.ForeignKey(SemestreExamen, on_delete=models.CASCADE)
+    moyenne_generale = models.FloatField(null=True, blank=True)
+    total_coefficients = models.IntegerField(default=0)
+    nombre_matieres = models.IntegerField(default=0)
+    mention = models.CharField(max_length=20, blank=True, default="")
+    date_maj = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('etudiant', 'session')
+        verbose_name = "RÉSULTAT PAR SESSION (CALCULÉ)"
+        verbose_name_plural = "RÉSULTATS PAR SESSION (CALCULÉS)"
+
+    def __str__(self):
+        return f"{self.etudiant_id} - {self.session_id} : {self.moyenne_generale}"
+
+
+
+class LotBulletins(models.Model):
+    """
+    Génération en arrière-plan des bulletins d'une classe (ou d'une
+    sélection d'étudiants), assemblés en ZIP ou en un seul PDF.
+    """
+    FORMAT_CHOICES = [
+        ('zip', 'Archive ZIP (un PDF par étudiant)'),
+        ('pdf', 'PDF unique'),
+    ]
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('erreur', 'Erreur'),
+    ]
+
+    classe = models.ForeignKey(Classe, on_delete=models.CASCADE, null=True, blank=True,
+                               help_text="Laisser vide pour une sélection d'étudiants")
+    session = models.ForeignKey(SemestreExamen, on_delete=models.CASCADE)
+    etudiants = models.JSONField(default=list, blank=True, editable=False)
+    format = models.CharField(max_length=3, choices=FORMAT_CHOICES, default='zip')
+    statut = models.CharField(max_length=10, choices=STATUT_CHOICES, default='en_attente', editable=False)
+    total = models.IntegerField(default=0, editable=False)
+    traites = models.IntegerField(default=0, editable=False)
+    fichier = models.FileField(upload_to='bulletins/', null=True, blank=True, editable=False)
+    erreur = models.TextField(blank=True, default="", editable=False)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_fin = models.DateTimeField(null=True, blank=True, editable=False)
+    # Dernier signe de vie de la génération (voir bulletins.marquer_abandonnes)
+    date_maj = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        ordering = ['-date_creation']
+        verbose_name = "LOT DE BULLETINS | GÉNÉRATION PAR CLASSE"
+        verbose_name_plural = "LOTS DE BULLETINS | GÉNÉRATION PAR CLASSE"
+
+    def __str__(self):
+        cible = self.classe.nom if self.classe else f"{len(self.etudiants)} étudiant(s)"
+        return f"Bulletins {cible} | {self.session.titre}"
+
+    def clean(self):
+        if not self.classe_id and not self.etudiants:
+            raise ValidationError("Sélectionnez une classe.")
+
+    def etudiants_concernes(self):
+        if self.etudiants:
+            queryset = Etudiant.objects.filter(pk__in=self.etudiants)
+        else:
+            queryset = Etudiant.objects.filter(classe_id=self.classe_id, actif=True)
+        return queryset.select_related('classe').order_by('nom_prenom')
+
+    @property
+    def progression(self):
+        if not self.total:
+            return 0
+        return round(self.traites / self.total * 100)
+
+
 class ParametreResultat(models.Model):
     session = models.OneToOneField(SemestreExamen, on_delete=models.CASCADE)
 
@@ -0,0 +1,41 @@
+"""
+QR codes des attestations, générés en mémoire.
+
+L'image est passée à xhtml2pdf sous forme de data URI : rien n'est écrit sur
+disque (plus de media/qr_codes/ partagé entre deux impressions simultanées).
+Les images sont mémorisées par contenu, un même QR code n'est encodé qu'une fois.
+"""
+import base64
+import io
+from functools import lru_cache
+
+import qrcode
+from django.utils import timezone
+from qrcode.constants import ERROR_CORRECT_H
+
+
+def donnees_attestation(etudiant):
+    """Contenu du QR code d'une attestation."""
+    return f"""
+        N° : {etudiant.matricule}/ESTIM/DG/{etudiant.annee_scolaire}
+        Nom et Prénoms : {etudiant.nom_prenom}
+        Fait le  : {timezone.now().strftime("%d/%m/%Y")}
+    """
+
+
+@lru_cache(maxsize=1024)
+def qr_code_data_uri(donnees):
+    """Retourne le QR code PNG de `donnees` sous forme de data URI."""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=ERROR_CORRECT_H,
+        box_size=4,
+        border=2,
+    )
+    qr.add_data(donnees)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    tampon = io.BytesIO()
+    img.save(tampon, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(tampon.getvalue()).decode("ascii")
@@ -0,0 +1,77 @@
+"""
+Moteurs de rendu PDF, choisis par type de document.
+
+- `xhtml2pdf` : rend le HTML du template (tous les documents) ;
+- `reportlab` : dessine directement le document sur un canvas ReportLab,
+  sans analyse HTML/CSS (bulletin et attestations, voir rendu_reportlab.py).
+
+Le moteur se règle par type de document dans PDF_MOTEURS, par exemple :
+
+    PDF_MOTEURS = {'bulletin': 'reportlab', 'attestation_inscription': 'reportlab'}
+
+Les documents absents de PDF_MOTEURS passent par xhtml2pdf. La commande
+`manage.py benchmark_pdf` compare les deux moteurs sur une classe fictive.
+"""
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from . import rendu_reportlab
+from .utils import rendre_pdf
+
+logger = logging.getLogger(__name__)
+
+MOTEUR_DEFAUT = 'xhtml2pdf'
+
+# Type de document de chaque template PDF
+DOCUMENTS = {
+    'admin/bulletin.html': 'bulletin',
+    'admin/attestation_inscription.html': 'attestation_inscription',
+    'admin/attestation_frequentation.html': 'attestation_frequentation',
+    'admin/etudiants_admis_pdf.html': 'etudiants_admis',
+    'admin/matieres_non_valides_simple.html': 'matieres_non_valides',
+}
+
+
+def _xhtml2pdf(type_document, html, context, callback=None):
+    return rendre_pdf(html, callback)
+
+
+def _reportlab(type_document, html, context, callback=None):
+    try:
+        return rendu_reportlab.rendre(type_document, context), False
+    except Exception:
+        logger.exception("Échec du rendu ReportLab (%s)", type_document)
+        return b"", True
+
+
+MOTEURS = {
+    'xhtml2pdf': (_xhtml2pdf, None),
+    'reportlab': (_reportlab, rendu_reportlab.DOCUMENTS),
+}
+
+
+def type_document(template_name):
+    return DOCUMENTS.get(template_name, template_name)
+
+
+def moteur(type_document):
+    """Nom du moteur configuré pour `type_document`."""
+    nom = getattr(settings, 'PDF_MOTEURS', {}).get(type_document, MOTEUR_DEFAUT)
+    if nom not in MOTEURS:
+        raise ImproperlyConfigured(f"PDF_MOTEURS : moteur inconnu « {nom} » pour {type_document}")
+    documents = MOTEURS[nom][1]
+    if documents is not None and type_document not in documents:
+        raise ImproperlyConfigured(f"PDF_MOTEURS : le moteur « {nom} » ne sait pas rendre {type_document}")
+    return nom
+
+
+def rendre(type_document, html, context, callback=None, nom_moteur=None):
+    """
+    Rend le document avec le moteur configuré (ou `nom_moteur`).
+    `html` sert au moteur xhtml2pdf, `context` au moteur ReportLab.
+    Retourne (contenu, erreur) ; utilisé aussi dans les processus du pool.
+    """
+    fonction, _ = MOTEURS[nom_moteur or moteur(type_document)]
+    return fonction(type_document, html, context, callback)
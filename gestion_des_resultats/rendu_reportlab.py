@@ -0,0 +1,288 @@
+"""
+Moteur de rendu PDF ReportLab : dessin direct sur un canvas, sans passer
+par le HTML.
+
+Réservé aux documents à mise en page fixe (bulletin, attestations) ; chaque
+fonction reprend la mise en page du template correspondant à partir du même
+contexte, textes et signataires compris (voir documents.py). Les images
+(logo, en-tête, photo, QR code) sont résolues comme pour xhtml2pdf, par
+utils.resoudre_ressource.
+"""
+import base64
+import io
+from functools import lru_cache
+
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils import dateformat, formats
+from django.utils.html import escape
+from PIL import Image as PILImage
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_JUSTIFY
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Paragraph, Table, TableStyle
+
+from .utils import resoudre_ressource
+
+
+LARGEUR, HAUTEUR = A4
+MARGE = 1.5 * cm
+LARGEUR_UTILE = LARGEUR - 2 * MARGE
+RESOLUTION = 300  # dpi des images statiques
+LARGEUR_LOGO = 2.1 * cm
+
+ENTETES_NOTES = ["Matière", "Devoir", "Examen", "Moyenne", "Coef", "Note Pondérée"]
+STYLE_NOTES = TableStyle([
+    ('FONT', (0, 0), (-1, -1), 'Helvetica', 8.5),
+    ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 8.5),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f2f2f2')),
+    ('GRID', (0, 0), (-1, -1), 0.75, colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('REPEATROWS', (0, 0), (-1, 0)),
+])
+
+STYLE_ATTESTATION = ParagraphStyle(
+    'attestation', fontName='Times-Roman', fontSize=13, leading=19.5, alignment=TA_JUSTIFY,
+)
+
+
+def _texte(valeur):
+    """Valeur affichée comme par le moteur de templates (localisée, None → "None")."""
+    return str(formats.localize(valeur))
+
+
+def _date(valeur):
+    return dateformat.format(valeur, "d F Y")
+
+
+def _source(ressource):
+    """Fichier (chemin ou octets d'un data URI) d'une ressource résolue."""
+    if ressource.startswith("data:"):
+        return io.BytesIO(base64.b64decode(ressource.partition(",")[2]))
+    return ressource
+
+
+@lru_cache(maxsize=16)
+def _image_statique(uri, largeur):
+    """
+    Logo, en-tête : préchargés une fois par processus, ramenés à RESOLUTION
+    pour la largeur dessinée et gardés en JPEG, que ReportLab insère tel quel
+    (un PNG ou un grand JPEG était recompressé et haché à chaque document).
+    """
+    image = PILImage.open(_source(resoudre_ressource(uri)))
+    largeur_px = round(largeur / 72 * RESOLUTION)
+    if image.width > largeur_px:
+        image.thumbnail((largeur_px, image.height))
+    fond = PILImage.new('RGB', image.size, 'white')
+    fond.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+    octets = io.BytesIO()
+    fond.save(octets, format='JPEG', quality=90)
+    return octets.getvalue()
+
+
+def _image(uri, largeur):
+    """ImageReader de `uri` (static, media ou data URI) dessinée sur `largeur` points, None si introuvable."""
+    if not uri:
+        return None
+    ressource = resoudre_ressource(uri)
+    if ressource is None:
+        return None
+    if uri.startswith(settings.STATIC_URL):
+        return ImageReader(io.BytesIO(_image_statique(uri, largeur)))
+    return ImageReader(_source(ressource))
+
+
+def _dessiner_image(canvas, image, x, y_haut, largeur):
+    """Dessine `image` à la largeur donnée (proportions conservées) ; retourne sa hauteur."""
+    largeur_px, hauteur_px = image.getSize()
+    hauteur = largeur * hauteur_px / largeur_px
+    canvas.drawImage(image, x, y_haut - hauteur, largeur, hauteur, mask='auto')
+    return hauteur
+
+
+def _entete(canvas, y):
+    """En-tête de l'école (static/header.png) ; retourne la position sous l'en-tête."""
+    image = _image(static('header.png'), LARGEUR_UTILE)
+    if image is None:
+        return y
+    return y - _dessiner_image(canvas, image, MARGE, y, LARGEUR_UTILE) - 0.5 * cm
+
+
+def _lignes_droite(canvas, lignes, y):
+    """Lignes alignées à droite [(police, taille, texte)] ; retourne la position sous le bloc."""
+    for police, taille, texte in lignes:
+        y -= taille * 1.4
+        canvas.setFont(police, taille)
+        canvas.drawRightString(LARGEUR - MARGE, y, texte)
+    return y
+
+
+def _tableau_notes(canvas, lignes, y):
+    """Tableau des notes, continué sur une nouvelle page si nécessaire."""
+    donnees = [ENTETES_NOTES] + [
+        [_texte(ligne[cle]) for cle in ('matiere', 'note_devoir', 'note_examen', 'moyenne_brute', 'coefficient', 'moyenne_ponderee')]
+        for ligne in lignes
+    ]
+    largeurs = [LARGEUR_UTILE * part for part in (0.30, 0.12, 0.12, 0.14, 0.10, 0.22)]
+    morceaux = [Table(donnees, colWidths=largeurs, style=STYLE_NOTES)]
+    while morceaux:
+        tableau = morceaux.pop(0)
+        _, hauteur = tableau.wrapOn(canvas, LARGEUR_UTILE, y - MARGE)
+        if hauteur > y - MARGE:
+            suite = tableau.split(LARGEUR_UTILE, y - MARGE)
+            if len(suite) > 1:
+                morceaux[:0] = suite
+                continue
+            canvas.showPage()
+            y = HAUTEUR - MARGE
+            morceaux.insert(0, tableau)
+            continue
+        tableau.drawOn(canvas, MARGE, y - hauteur)
+        y -= hauteur
+    return y - 0.6 * cm
+
+
+def _titre_section(canvas, texte, y):
+    y -= 0.8 * cm
+    canvas.setFont('Helvetica-Bold', 9.5)
+    canvas.drawString(MARGE, y, texte)
+    canvas.line(MARGE, y - 1.5, MARGE + canvas.stringWidth(texte, 'Helvetica-Bold', 9.5), y - 1.5)
+    return y - 0.2 * cm
+
+
+def bulletin(canvas, context):
+    """Mise en page de admin/bulletin.html."""
+    etudiant = context['etudiant']
+    y = HAUTEUR - MARGE
+
+    logo = _image(context.get('logo_path'), LARGEUR_LOGO)
+    if logo is not None:
+        _dessiner_image(canvas, logo, 0.35 * cm, HAUTEUR - 0.35 * cm, LARGEUR_LOGO)
+
+    y = _entete(canvas, y)
+
+    canvas.setFont('Helvetica-Bold', 18)
+    y -= 0.9 * cm
+    canvas.drawCentredString(LARGEUR / 2, y, "Bulletin de notes")
+    y -= 0.5 * cm
+
+    photo = _image(context.get('photo_url'), 2.65 * cm)
+    if photo is not None:
+        hauteur = _dessiner_image(canvas, photo, MARGE, y, 2.65 * cm)
+        canvas.rect(MARGE, y - hauteur, 2.65 * cm, hauteur)
+        y -= hauteur + 0.3 * cm
+
+    moyenne = context['resultat']['moyenne_generale']
+    infos = [
+        [("Nom(s) et Prénom(s) :", etudiant.nom_prenom), (" | Matricule :", etudiant.matricule)],
+        [("Date et lieu de naissance :", f"{_texte(etudiant.date_naissance)} à {_texte(etudiant.lieu_naissance)}")],
+        [("Classe :", etudiant.classe.nom if etudiant.classe else "")],
+        [("Moyenne Générale :", _texte(moyenne) if moyenne else "0.00")],
+    ]
+    for ligne in infos:
+        y -= 12
+        x = MARGE
+        for libelle, valeur in ligne:
+            canvas.setFont('Helvetica-Bold', 9)
+            canvas.drawString(x, y, libelle)
+            x += canvas.stringWidth(libelle, 'Helvetica-Bold', 9) + 3
+            canvas.setFont('Helvetica', 9)
+            canvas.drawString(x, y, str(valeur))
+            x += canvas.stringWidth(str(valeur), 'Helvetica', 9)
+
+    if context['matieres_valides']:
+        y = _tableau_notes(canvas, context['matieres_valides'], _titre_section(canvas, "Matières Validées", y))
+    else:
+        y -= 0.8 * cm
+        canvas.setFont('Helvetica', 9)
+        canvas.drawString(MARGE, y, "Aucune matière validée.")
+    if context['matieres_non_valides']:
+        y = _tableau_notes(canvas, context['matieres_non_valides'], _titre_section(canvas, "Matières Non Validées", y))
+
+    # Pied de page en bas à droite (nouvelle page s'il n'y a plus la place)
+    if y - MARGE < 2.5 * cm:
+        canvas.showPage()
+    signataire = context['signataire']
+    _lignes_droite(canvas, [
+        ('Helvetica', 8.5, f"Par la Direction de l’{context['ecole']}"),
+        ('Helvetica', 8.5, f"Fait à {context['ville']} le {_date(context['date_du_jour'])}"),
+        ('Helvetica', 8.5, signataire['fonction']),
+        ('Helvetica-Bold', 8.5, signataire['nom']),
+    ], MARGE + 2.5 * cm)
+
+
+def attestation(canvas, context):
+    """Mise en page commune de admin/attestation_*.html."""
+    textes = context['attestation']
+    y = _entete(canvas, HAUTEUR - MARGE)
+
+    # Titre encadré
+    largeur_titre = LARGEUR_UTILE * 0.8
+    y -= 1.1 * cm
+    canvas.setLineWidth(2.6)
+    canvas.rect((LARGEUR - largeur_titre) / 2, y, largeur_titre, 0.9 * cm)
+    canvas.setLineWidth(1)
+    canvas.setFont('Times-Bold', 15)
+    canvas.drawCentredString(LARGEUR / 2, y + 0.3 * cm, textes['titre'])
+
+    annee = str(context['annee'])
+    y -= 1 * cm
+    canvas.setFillColor(colors.red)
+    canvas.setFont('Times-Bold', 13)
+    canvas.drawString(MARGE, y, f"N°{context['numero']}/ESTIM/DG/{annee[2:4]}-{annee[7:]}")
+    canvas.setFillColor(colors.black)
+
+    blocs = [
+        textes['corps'],
+        f"Option : <b>{escape(context['option'])}</b><br/>Niveau : <b>{escape(context['niveau'])}</b><br/>Photo d'identité :",
+    ]
+    y -= 1.2 * cm
+    for texte in blocs:
+        paragraphe = Paragraph(texte, STYLE_ATTESTATION)
+        _, hauteur = paragraphe.wrapOn(canvas, LARGEUR_UTILE, y)
+        paragraphe.drawOn(canvas, MARGE, y - hauteur)
+        y -= hauteur + 0.5 * cm
+
+    photo = _image(context.get('photo_url'), 2.4 * cm)
+    if photo is not None:
+        y -= _dessiner_image(canvas, photo, MARGE, y, 2.4 * cm) + 0.8 * cm
+    else:
+        canvas.setFont('Times-Roman', 13)
+        canvas.drawString(MARGE, y - 13, "Aucune photo d'identité fournie.")
+        y -= 1.5 * cm
+
+    paragraphe = Paragraph(textes['conclusion'], STYLE_ATTESTATION)
+    _, hauteur = paragraphe.wrapOn(canvas, LARGEUR_UTILE, y)
+    paragraphe.drawOn(canvas, MARGE, y - hauteur)
+    y -= hauteur + 0.5 * cm
+
+    qr = _image(context.get('qr_code_url'), 2.1 * cm)
+    if qr is not None:
+        canvas.drawImage(qr, MARGE, y - 2.1 * cm, 2.1 * cm, 2.1 * cm)
+        y -= 2.1 * cm
+
+    signataire = context['signataire']
+    _lignes_droite(canvas, [('Times-Roman', 13, f"Fait à {context['ville']}, le {_date(context['date_du_jour'])}"),
+                            ('Times-Roman', 11.5, signataire['fonction'])], y)
+    _lignes_droite(canvas, [('Times-Bold', 12, signataire['nom'])], y - 3 * cm)
+
+
+DOCUMENTS = {
+    'bulletin': bulletin,
+    'attestation_inscription': attestation,
+    'attestation_frequentation': attestation,
+}
+
+
+def rendre(type_document, context):
+    """PDF (bytes) du document `type_document` dessiné à partir de `context`."""
+    sortie = io.BytesIO()
+    canvas = Canvas(sortie, pagesize=A4, pageCompression=1)
+    DOCUMENTS[type_document](canvas, context)
+    canvas.save()
+    return sortie.getvalue()
@@ -0,0 +1,324 @@
+"""
+Résultats pré-calculés (ResultatMatiere / ResultatSession).
+
+Les lignes sont construites avec le MoteurNotes puis mises à jour de façon
+incrémentale à chaque saisie de note ou changement de coefficient, de sorte
+que les bulletins et listes de résultats se lisent sans recalcul.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404
+
+from parametre.models import Etudiant, Matiere
+from parametre.moteur_notes import MoteurNotes, mention
+from .models import CandidatRattrapage, ParametreResultat, ResultatMatiere, ResultatSession
+
+
+def _session_id(session):
+    return getattr(session, 'pk', session)
+
+
+def session_courante():
+    """Session choisie dans ParametreResultat, None si aucune ne l'est."""
+    parametre = ParametreResultat.objects.select_related('session').first()
+    return parametre.session if parametre else None
+
+
+def session_courante_ou_404():
+    session = session_courante()
+    if session is None:
+        raise Http404("Aucune session de résultats configurée")
+    return session
+
+
+def _lignes_matieres(moteur, etudiant_ids, session_id):
+    """Construit les ResultatMatiere (non sauvegardés) à partir d'un moteur."""
+    lignes = []
+    for etudiant_id in etudiant_ids:
+        for matiere in moteur.matieres:
+            note_devoir = moteur.notes_devoir.get((etudiant_id, matiere.pk))
+            note_examen = moteur.notes_examen.get((etudiant_id, matiere.pk))
+            if note_devoir is None and note_examen is None:
+                continue
+
+            ligne = moteur.moyenne_par_matiere(etudiant_id, matiere)
+            if ligne:
+                lignes.append(ResultatMatiere(
+                    etudiant_id=etudiant_id, session_id=session_id, matiere=matiere,
+                    note_devoir=ligne["note_devoir"], note_examen=ligne["note_examen"],
+                    moyenne_brute=ligne["moyenne_brute"], coefficient=ligne["coefficient"],
+                    moyenne_ponderee=ligne["moyenne_ponderee"],
+                ))
+            else:
+                # Une seule des deux notes : la ligne existe mais ne compte pas
+                lignes.append(ResultatMatiere(
+                    etudiant_id=etudiant_id, session_id=session_id, matiere=matiere,
+                    note_devoir=note_devoir, note_examen=note_examen,
+                    coefficient=matiere.coefficient,
+                ))
+    return lignes
+
+
+def recalculer_agregats(etudiant_ids, session):
+    """
+    Recalcule les ResultatSession des étudiants à partir de leurs
+    ResultatMatiere (une requête de lecture, une d'écriture par lot).
+    """
+    session_id = _session_id(session)
+    etudiant_ids = set(etudiant_ids)
+    if not etudiant_ids:
+        return
+
+    totaux = {etudiant_id: [0, 0, 0] for etudiant_id in etudiant_ids}
+    # Même ordre de sommation que MoteurNotes (ordre des matières), matières de la classe actuelle seulement
+    lignes = (
+        ResultatMatiere.objects
+        .filter(session_id=session_id, etudiant_id__in=etudiant_ids, moyenne_brute__isnull=False,
+                matiere__classe_id=F('etudiant__classe_id'))
+        .order_by('etudiant_id', '-matiere__nom')
+        .values_list('etudiant_id', 'moyenne_ponderee', 'coefficient')
+    )
+    for etudiant_id, moyenne_ponderee, coefficient in lignes:
+        totaux[etudiant_id][0] += moyenne_ponderee
+        totaux[etudiant_id][1] += coefficient
+        totaux[etudiant_id][2] += 1
+
+    with transaction.atomic():
+        existants = {
+            resultat.etudiant_id: resultat
+            for resultat in ResultatSession.objects.filter(session_id=session_id, etudiant_id__in=etudiant_ids)
+        }
+        a_creer, a_modifier = [], []
+        for etudiant_id, (total_ponderee, total_coef, nombre) in totaux.items():
+            moyenne = round(total_ponderee / total_coef, 2) if total_coef else None
+            resultat = existants.get(etudiant_id) or ResultatSession(etudiant_id=etudiant_id, session_id=session_id)
+            resultat.moyenne_generale = moyenne
+            resultat.total_coefficients = total_coef
+            resultat.nombre_matieres = nombre
+            resultat.mention = mention(moyenne)
+            (a_modifier if resultat.pk else a_creer).append(resultat)
+
+        ResultatSession.objects.bulk_create(a_creer)
+        ResultatSession.objects.bulk_update(
+            a_modifier, ['moyenne_generale', 'total_coefficients', 'nombre_matieres', 'mention']
+        )
+
+
+def calculer_resultats(etudiant_ids, session, matieres=None):
+    """
+    (Re)construit les résultats des étudiants pour une session.
+
+    Sans `matieres`, toutes les matières de leur classe sont recalculées ;
+    sinon seules les lignes des matières données sont remplacées.
+    """
+    session_id = _session_id(session)
+    etudiant_ids = list(set(etudiant_ids))
+    if not etudiant_ids:
+        return
+
+    classes = defaultdict(list)
+    for etudiant_id, classe_id in Etudiant.objects.filter(pk__in=etudiant_ids).values_list('id', 'classe_id'):
+        classes[classe_id].append(etudiant_id)
+
+    if matieres is None:
+        matieres_par_classe = defaultdict(list)
+        for matiere in Matiere.objects.filter(classe_id__in=classes.keys()):
+            matieres_par_classe[matiere.classe_id].append(matiere)
+    else:
+        matieres = list(matieres)
+
+    lignes = []
+    for classe_id, ids in classes.items():
+        matieres_classe = matieres_par_classe[classe_id] if matieres is None else matieres
+        moteur = MoteurNotes(None, session_id, etudiants=ids, matieres=matieres_classe)
+        lignes.extend(_lignes_matieres(moteur, ids, session_id))
+
+    with transaction.atomic():
+        anciennes = ResultatMatiere.objects.filter(session_id=session_id, etudiant_id__in=etudiant_ids)
+        if matieres is not None:
+            anciennes = anciennes.filter(matiere__in=matieres)
+        anciennes.delete()
+        ResultatMatiere.objects.bulk_create(lignes)
+        recalculer_agregats(etudiant_ids, session_id)
+
+
+def mettre_a_jour_notes(matiere_id, session, etudiant_ids):
+    """
+    Mise à jour incrémentale après la saisie / suppression de notes d'une
+    matière. Les étudiants jamais calculés pour la session sont construits
+    entièrement, les autres ne voient recalculer que la matière concernée.
+    """
+    session_id = _session_id(session)
+    etudiant_ids = set(etudiant_ids)
+    deja_calcules = set(
+        ResultatSession.objects
+        .filter(session_id=session_id, etudiant_id__in=etudiant_ids)
+        .values_list('etudiant_id', flat=True)
+    )
+
+    if etudiant_ids - deja_calcules:
+        calculer_resultats(etudiant_ids - deja_calcules, session_id)
+    if deja_calcules:
+        matiere = Matiere.objects.filter(pk=matiere_id).first()
+        if matiere:
+            calculer_resultats(deja_calcules, session_id, matieres=[matiere])
+
+
+def changer_classe(etudiant_ids):
+    """
+    Après un changement de classe : supprime les lignes des matières de
+    l'ancienne classe et recalcule les sessions déjà calculées avec les
+    matières de la nouvelle.
+    """
+    etudiant_ids = set(etudiant_ids)
+    sessions = defaultdict(set)
+    for etudiant_id, session_id in ResultatSession.objects.filter(etudiant_id__in=etudiant_ids).values_list('etudiant_id', 'session_id'):
+        sessions[session_id].add(etudiant_id)
+    with transaction.atomic():
+        ResultatMatiere.objects.filter(etudiant_id__in=etudiant_ids).exclude(
+            matiere__classe_id=F('etudiant__classe_id')
+        ).delete()
+        for session_id, ids in sessions.items():
+            calculer_resultats(ids, session_id)
+
+
+def reporter_coefficient(matiere):
+    """Répercute un nouveau coefficient sur les résultats déjà calculés."""
+    sessions = defaultdict(set)
+    for etudiant_id, session_id in ResultatMatiere.objects.filter(matiere=matiere).values_list('etudiant_id', 'session_id'):
+        sessions[session_id].add(etudiant_id)
+    for session_id, ids in sessions.items():
+        calculer_resultats(ids, session_id, matieres=[matiere])
+
+
+def resultats_session(etudiant_ids, session):
+    """
+    Retourne {etudiant_id: ResultatSession}, en calculant au passage les
+    étudiants qui n'ont pas encore de résultat pour la session.
+    """
+    session_id = _session_id(session)
+    etudiant_ids = set(etudiant_ids)
+    resultats = {
+        resultat.etudiant_id: resultat
+        for resultat in ResultatSession.objects.filter(session_id=session_id, etudiant_id__in=etudiant_ids)
+    }
+    manquants = etudiant_ids - resultats.keys()
+    if manquants:
+        calculer_resultats(manquants, session_id)
+        resultats.update({
+            resultat.etudiant_id: resultat
+            for resultat in ResultatSession.objects.filter(session_id=session_id, etudiant_id__in=manquants)
+        })
+    return resultats
+
+
+def resultat_session(etudiant, session):
+    return resultats_session([etudiant.pk], session)[etudiant.pk]
+
+
+def lignes_bulletins(etudiant_ids, session):
+    """
+    Lignes de bulletin pré-calculées de plusieurs étudiants en une requête :
+    {etudiant_id: [ligne, ...]} dans l'ordre des matières.
+    """
+    lignes = {etudiant_id: [] for etudiant_id in etudiant_ids}
+    resultats = (
+        ResultatMatiere.objects
+        .filter(etudiant_id__in=lignes.keys(), session_id=_session_id(session), moyenne_brute__isnull=False)
+        .select_related('matiere')
+        .order_by('-matiere__nom')
+    )
+    for resultat in resultats:
+        lignes[resultat.etudiant_id].append(resultat.ligne())
+    return lignes
+
+
+def lignes_bulletin(etudiant, session):
+    """Lignes de bulletin pré-calculées, dans l'ordre des matières."""
+    return lignes_bulletins([etudiant.pk], session)[etudiant.pk]
+
+
+def bulletin(etudiant, session):
+    """Équivalent pré-calculé de Etudiant.generer_bulletin."""
+    resultat = resultat_session(etudiant, session)
+    return {
+        "etudiant": etudiant.nom_prenom,
+        "classe": etudiant.classe.nom,
+        "matieres": lignes_bulletin(etudiant, session),
+        "moyenne_generale": resultat.moyenne_generale,
+    }
+
+
+def resultats_classes(paires):
+    """
+    Admis et matières non validées des étudiants actifs de plusieurs
+    (classe, session), en quelques requêtes quel que soit le nombre de
+    classes : les étudiants en une requête, puis par session les moyennes
+    (ResultatSession) et les matières sous la moyenne (ResultatMatiere).
+
+    Retourne, dans l'ordre des paires, des dictionnaires : classe, session,
+    admis (étudiants de moyenne >= 10) et non_valides ([(etudiant, lignes)]).
+    """
+    paires = list(paires)
+    etudiants_par_classe = defaultdict(list)
+    for etudiant in (
+        Etudiant.objects
+        .filter(classe_id__in={classe.pk for classe, _ in paires}, actif=True)
+        .select_related('classe')
+        .order_by('nom_prenom', 'id')
+    ):
+        etudiants_par_classe[etudiant.classe_id].append(etudiant)
+
+    ids_par_session = defaultdict(set)
+    for classe, session in paires:
+        ids_par_session[session.pk].update(etudiant.pk for etudiant in etudiants_par_classe[classe.pk])
+
+    moyennes, non_valides = {}, defaultdict(list)
+    for session_id, ids in ids_par_session.items():
+        for etudiant_id, resultat in resultats_session(ids, session_id).items():
+            moyennes[(etudiant_id, session_id)] = resultat.moyenne_generale
+        for resultat in (
+            CandidatRattrapage.objects
+            .filter(etudiant_id__in=ids, session_id=session_id)
+            .select_related('matiere')
+            .order_by('-matiere__nom')
+        ):
+            non_valides[(resultat.etudiant_id, session_id)].append(resultat.ligne())
+
+    blocs = []
+    for classe, session in paires:
+        etudiants = etudiants_par_classe[classe.pk]
+        blocs.append({
+            "classe": classe,
+            "session": session,
+            "admis": [
+                etudiant for etudiant in etudiants
+                if moyennes.get((etudiant.pk, session.pk)) is not None and moyennes[(etudiant.pk, session.pk)] >= 10
+            ],
+            "non_valides": [
+                (etudiant, non_valides[(etudiant.pk, session.pk)]) for etudiant in etudiants
+                if non_valides[(etudiant.pk, session.pk)]
+            ],
+        })
+    return blocs
+
+
+def rattrapages(session, classe_id=None, matiere_id=None, etudiant_id=None):
+    """
+    Candidats au rattrapage d'une session (index CandidatRattrapage), avec
+    étudiant, classe et matière. Les étudiants actifs concernés dont les
+    résultats n'ont pas encore été calculés le sont au passage.
+    """
+    etudiants = Etudiant.objects.filter(actif=True)
+    if classe_id:
+        etudiants = etudiants.filter(classe_id=classe_id)
+    if etudiant_id:
+        etudiants = etudiants.filter(pk=etudiant_id)
+    resultats_session(etudiants.values_list('pk', flat=True), session)
+
+    candidats = CandidatRattrapage.objects.filter(session_id=_session_id(session), etudiant__in=etudiants)
+    if matiere_id:
+        candidats = candidats.filter(matiere_id=matiere_id)
+    return candidats.select_related('etudiant__classe', 'matiere', 'session').order_by('matiere__nom', 'etudiant__nom_prenom')
@@ -1,14 +1,56 @@
 # signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
-from django.contrib.auth.models import User
-from .models.utilisateurs import ProfilAdmin
+from parametre.models import Etudiant, Matiere
+from saisie_notes.signals import notes_modifiees, suppression_en_cascade
+from .models import ResultatSession
+from . import cache_pdf, resultats
 
-@receiver(post_save, sender=User)
-def create_user_profil(sender, instance, created, **kwargs):
-    if created:
-        ProfilAdmin.objects.create(user=instance)
 
-@receiver(post_save, sender=User)
-def save_user_profil(sender, instance, **kwargs):
-    instance.profil.save()
+@receiver(notes_modifiees)
+def maj_resultats_notes(sender, matiere_id, session_id, etudiant_ids, **kwargs):
+    resultats.mettre_a_jour_notes(matiere_id, session_id, etudiant_ids)
+    cache_pdf.invalider_etudiants(etudiant_ids)
+
+
+@receiver(pre_save, sender=Matiere)
+def memoriser_coefficient(sender, instance, **kwargs):
+    instance._coefficient_initial = None
+    if instance.pk:
+        instance._coefficient_initial = sender.objects.filter(pk=instance.pk).values_list('coefficient', flat=True).first()
+
+
+@receiver(post_save, sender=Matiere)
+def maj_resultats_coefficient(sender, instance, created, **kwargs):
+    if not created and instance._coefficient_initial != instance.coefficient:
+        resultats.reporter_coefficient(instance)
+        cache_pdf.invalider_etudiants(Etudiant.objects.filter(classe_id=instance.classe_id).values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Matiere)
+def maj_resultats_matiere_supprimee(sender, instance, **kwargs):
+    if suppression_en_cascade(kwargs.get('origin'), (Matiere,)):
+        return
+
+    # Les lignes de la matière sont supprimées en cascade, il reste les moyennes
+    sessions = {}
+    for etudiant_id, session_id in ResultatSession.objects.filter(etudiant__classe_id=instance.classe_id).values_list('etudiant_id', 'session_id'):
+        sessions.setdefault(session_id, set()).add(etudiant_id)
+    for session_id, ids in sessions.items():
+        resultats.recalculer_agregats(ids, session_id)
+    cache_pdf.invalider_etudiants(Etudiant.objects.filter(classe_id=instance.classe_id).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Etudiant)
+def maj_resultats_classe(sender, instance, created, **kwargs):
+    # Changement de classe (état avant écriture relevé par Etudiant.save) :
+    # les résultats suivent les matières de la nouvelle classe
+    initial = getattr(instance, '_etat_initial', None)
+    if not created and initial and initial['classe_id'] != instance.classe_id:
+        resultats.changer_classe([instance.pk])
+
+
+@receiver(post_save, sender=Etudiant)
+@receiver(post_delete, sender=Etudiant)
+def invalider_pdf_etudiant(sender, instance, **kwargs):
+    cache_pdf.invalider_etudiants([instance.pk])
@@ -33,6 +33,12 @@ try:
 except ImportError:
     NOTES_MOBILE_AVAILABLE = False
 
+try:
+    from views.api import export_router
+    DONNEES_AVAILABLE = True
+except ImportError:
+    DONNEES_AVAILABLE = False
+
 api = NinjaAPI(
     # auth=JWTAuth(), 
     version="1.0.4",
@@ -119,6 +125,14 @@ if NOTES_MOBILE_AVAILABLE:
         tags=["📱 Mobile - Notes"],
     )
 
+if DONNEES_AVAILABLE:
+    # Exports en flux seulement (/donnees/finances/export, /donnees/logs/export), JWT du personnel requis
+    api.add_router(
+        "/donnees/", 
+        export_router, 
+        tags=["🗂️ Exports"],
+    )
+
 # ========== ENDPOINTS DE BASE ==========
 
 @api.get("/", tags=["🏠 Accueil"])
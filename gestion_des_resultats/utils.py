@@ -1,18 +1,109 @@
+"""
+Rendu PDF (xhtml2pdf) et résolution des ressources des templates.
+
+Aucune ressource n'est récupérée en HTTP pendant le rendu : link_callback
+ramène chaque référence (logo, en-tête, police, photo, QR code) à un fichier
+local ou à des octets en mémoire.
+- `data:` (QR code, voir qr.py) : laissé tel quel ;
+- STATIC_URL (ou URL absolue http(s)://hôte/static/...) : fichier trouvé par
+  les finders ou dans STATIC_ROOT, préchargé une fois par processus en data URI ;
+- MEDIA_URL (ou http(s)://hôte/media/...) : chemin du fichier sous MEDIA_ROOT.
+Une référence introuvable localement est ignorée (avertissement dans les logs)
+au lieu de déclencher une requête vers le serveur lui-même.
+"""
+import base64
+import logging
+import mimetypes
+import os
+from functools import lru_cache
+from urllib.parse import unquote, urlparse
+
 from django.conf import settings
 from django.contrib.staticfiles import finders
-import os
+
+logger = logging.getLogger(__name__)
+
+# Ressource vide rendue à xhtml2pdf pour une référence introuvable
+RESSOURCE_VIDE = "data:,"
+
+
+def _chemin_statique(nom):
+    chemin = finders.find(nom)
+    if not chemin and settings.STATIC_ROOT:
+        chemin = os.path.join(settings.STATIC_ROOT, nom)
+    return chemin
+
+
+def _chemin_media(nom):
+    racine = os.path.abspath(settings.MEDIA_ROOT)
+    chemin = os.path.abspath(os.path.join(racine, nom))
+    # Pas de sortie de MEDIA_ROOT via ../
+    return chemin if chemin.startswith(racine + os.sep) else None
+
+
+@lru_cache(maxsize=64)
+def _statique_en_memoire(nom):
+    """Fichier statique lu une seule fois par processus, en data URI."""
+    chemin = _chemin_statique(nom)
+    if not chemin or not os.path.isfile(chemin):
+        return None
+    with open(chemin, "rb") as fichier:
+        contenu = base64.b64encode(fichier.read()).decode("ascii")
+    type_mime = mimetypes.guess_type(chemin)[0] or "application/octet-stream"
+    return f"data:{type_mime};base64,{contenu}"
+
+
+def resoudre_ressource(uri):
+    """
+    Chemin local ou data URI de `uri`, None si la ressource n'est pas
+    disponible localement.
+    """
+    if uri.startswith("data:"):
+        return uri
+
+    # Les URL absolues vers notre propre serveur sont ramenées à leur chemin
+    chemin = unquote(urlparse(uri).path) if uri.startswith(("http://", "https://", "//")) else uri
+
+    if chemin.startswith(settings.STATIC_URL):
+        return _statique_en_memoire(chemin[len(settings.STATIC_URL):])
+    if chemin.startswith(settings.MEDIA_URL):
+        chemin = _chemin_media(chemin[len(settings.MEDIA_URL):])
+        return chemin if chemin and os.path.isfile(chemin) else None
+    return None
+
 
 def link_callback(uri, rel):
     """
-    Convertit les URI HTML (static, media) en chemins absolus pour xhtml2pdf.
+    Convertit les URI HTML (static, media, data) en ressources locales pour
+    xhtml2pdf ; ne renvoie jamais d'URL réseau.
+    """
+    ressource = resoudre_ressource(uri)
+    if ressource is None:
+        logger.warning("Ressource PDF introuvable localement, ignorée : %s", uri)
+        return RESSOURCE_VIDE
+    return ressource
+
+
+def initialiser_worker():
+    """
+    Initialisation des processus de rendu PDF (démarrés en mode « spawn ») :
+    Django doit être chargé pour que link_callback trouve les fichiers statiques.
+    """
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def rendre_pdf(html, callback=None):
+    """
+    Rend un document HTML en PDF avec xhtml2pdf.
+    Retourne (contenu, erreur) ; utilisé aussi dans les processus du pool.
     """
-    if uri.startswith(settings.MEDIA_URL):
-        path = os.path.join(settings.MEDIA_ROOT, uri.replace(settings.MEDIA_URL, ""))
-    elif uri.startswith(settings.STATIC_URL):
-        path = finders.find(uri.replace(settings.STATIC_URL, ""))
-    else:
-        return uri  # URI absolue (ex. http://), laisser tel quel
+    import io
+    from xhtml2pdf import pisa
 
-    if not os.path.isfile(path):
-        raise Exception(f"Fichier introuvable : {path}")
-    return path
+    sortie = io.BytesIO()
+    pisa_status = pisa.CreatePDF(html, dest=sortie, link_callback=callback or link_callback)
+    return sortie.getvalue(), bool(pisa_status.err)
@@ -1,81 +1,91 @@
 from django.http import HttpResponse
-from django.template.loader import get_template
-from xhtml2pdf import pisa
-from django.conf import settings
-import os
+from django.templatetags.static import static
 from .models import ParametreResultat
-from parametre.models import Matiere
+from .resultats import resultat_session, lignes_bulletin
 from django.shortcuts import render
-import qrcode
-import os
-from PIL import Image
 from django.utils import timezone
-from qrcode.constants import ERROR_CORRECT_H
-from .utils import link_callback  # Assure-toi que ce helper est défini
+from .utils import link_callback
+from .cache_pdf import pdf_en_cache, portee_etudiant, reponse_pdf
+from . import documents
+from .qr import donnees_attestation, qr_code_data_uri
 from attestations.models import Attestation
 
-def generate_pdf_resultat_etudiant(request, resultat):
-    template_path = 'admin/bulletin.html'
-    template = get_template(template_path)
-
-    etudiant = resultat.etudiant
-    session = ParametreResultat.objects.first().session
+def photo_etudiant(etudiant):
+    """URL (MEDIA_URL) de la photo, résolue en fichier local au rendu PDF."""
+    return etudiant.photo.url if etudiant.photo else ""
 
-    matieres = Matiere.objects.filter(classe=etudiant.classe)
-    matieres_valides = []
-    matieres_non_valides = []
 
-    for matiere in matieres:
-        res = etudiant.moyenne_par_matiere(matiere, session)
-        if res:
-            if res["moyenne_brute"] >= 10:
-                matieres_valides.append(res)
-            else:
-                matieres_non_valides.append(res)
-
-    # Construction de l'URL complète pour la photo
-    host = request.get_host()
-    photo_url = f"http://{host}{settings.MEDIA_URL}{etudiant.photo}"
+def contexte_bulletin(etudiant, moyenne_generale, lignes):
+    """
+    Contexte du template admin/bulletin.html. Les images sont référencées
+    par leur URL static/media, résolues localement par link_callback ; école,
+    ville et signataire viennent de documents.py.
+    """
+    resultat = {"moyenne_generale": moyenne_generale}
+    matieres_valides = [res for res in lignes if res["moyenne_brute"] >= 10]
+    matieres_non_valides = [res for res in lignes if res["moyenne_brute"] < 10]
 
-    context = {
+    return {
         'etudiant': etudiant,
         'resultat': resultat,
         'matieres_valides': matieres_valides,
         'matieres_non_valides': matieres_non_valides,
-        'photo_url': photo_url,
-        'logo_path': 'http://127.0.0.1:8080/static/logo_estim.jpg',
+        'photo_url': photo_etudiant(etudiant),
+        'logo_path': static('logo_estim.jpg'),
         'date_du_jour': timezone.now(),
+        'ecole': documents.ECOLE,
+        'ville': documents.VILLE,
+        'signataire': documents.SIGNATAIRE_BULLETIN,
     }
 
-    # Création du PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="bulletin_{etudiant.matricule}.pdf"'
 
-    pisa_status = pisa.CreatePDF(
-        template.render(context),
-        dest=response,
-        link_callback=link_callback
-    )
+def contexte_attestation(etudiant, type_attestation):
+    """
+    Contexte des templates admin/attestation_*.html ('inscription' ou
+    'frequentation') : QR code généré en mémoire (data URI, voir qr.py),
+    photo optionnelle, textes et signataire de documents.py.
+    """
+    valeurs = {
+        "nom_complet": etudiant.nom_prenom,
+        "date_naissance": etudiant.date_naissance.strftime("%d/%m/%Y") if etudiant.date_naissance else "Non renseignée",
+        "lieu_naissance": etudiant.lieu_naissance or "Non renseigné",
+        "annee_academique": etudiant.annee_scolaire,
+    }
+    return {
+        **valeurs,
+        "numero": etudiant.matricule,
+        "annee": etudiant.annee_scolaire,
+        "option": etudiant.classe.filiere.nom if etudiant.classe and etudiant.classe.filiere else "Non renseignée",
+        "niveau": etudiant.classe.niveau if etudiant.classe else "Non renseigné",
+        "date_du_jour": timezone.now(),
+        "qr_code_url": qr_code_data_uri(donnees_attestation(etudiant)),
+        "photo_url": photo_etudiant(etudiant),
+        "attestation": documents.textes_attestation(type_attestation, valeurs),
+        "ville": documents.VILLE,
+        "signataire": documents.SIGNATAIRE_ATTESTATION,
+    }
 
-    if pisa_status.err:
-        return HttpResponse('Une erreur est survenue lors de la génération du PDF.', status=500)
 
-    return response
+def generate_pdf_resultat_etudiant(request, resultat):
+    template_path = 'admin/bulletin.html'
+
+    etudiant = resultat.etudiant
+    session = ParametreResultat.objects.first().session
 
+    # Résultats pré-calculés (voir resultats.py)
+    context = contexte_bulletin(
+        etudiant,
+        resultat_session(etudiant, session).moyenne_generale,
+        lignes_bulletin(etudiant, session),
+    )
 
-def link_callback(uri, rel):
-    # Gestion des liens statiques et médias
-    if uri.startswith(settings.MEDIA_URL):
-        path = os.path.join(settings.MEDIA_ROOT, uri[len(settings.MEDIA_URL):])
-    elif uri.startswith(settings.STATIC_URL):
-        path = os.path.join(settings.STATIC_ROOT, uri[len(settings.STATIC_URL):])
-    else:
-        return uri
+    # Création du PDF (resservi depuis le cache si rien n'a changé)
+    contenu = pdf_en_cache(template_path, context, portee_etudiant(etudiant), link_callback)
+    if contenu is None:
+        return HttpResponse('Une erreur est survenue lors de la génération du PDF.', status=500)
 
-    if not os.path.isfile(path):
-        raise Exception(f"Fichier introuvable : {path}")
+    return reponse_pdf(contenu, f"bulletin_{etudiant.matricule}.pdf")
 
-    return path
 
 def hello_world(request):
     return render(request, 'admin/attestation_frequentation.html')
@@ -83,41 +93,8 @@ def hello_world(request):
 
 def attestation_inscription(request, resultat):
     template_path = 'admin/attestation_inscription.html'
-    template = get_template(template_path)
     etudiant = resultat
 
-    # Donnée à encoder dans le QR code
-    qr_data = f"""
-        N° : {etudiant.matricule}/ESTIM/DG/{etudiant.annee_scolaire}
-        Nom et Prénoms : {etudiant.nom_prenom}
-        Fait le  : {timezone.now().strftime("%d/%m/%Y")}
-    """
-
-    # Création du QR code
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_H,
-        box_size=4,
-        border=2,
-    )
-    qr.add_data(qr_data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-
-    # Dossier et nom du fichier QR
-    qr_folder = os.path.join(settings.MEDIA_ROOT, 'qr_codes')
-    os.makedirs(qr_folder, exist_ok=True)
-    qr_filename = f"{etudiant.matricule}_qr.png"
-    qr_path = os.path.join(qr_folder, qr_filename)
-    img.save(qr_path)
-
-    # URL vers l’image QR code
-    qr_url = f"{settings.MEDIA_URL}qr_codes/{qr_filename}"
-
-    # URL de la photo de l’étudiant
-    photo_url = f"http://{request.get_host()}{settings.MEDIA_URL}{etudiant.photo}"
-
-
     # Création de l'attestation dans la base de données
 
     Attestation.objects.create(
@@ -127,76 +104,21 @@ def attestation_inscription(request, resultat):
     )
 
     # Contexte du template
-    context = {
-        "numero": etudiant.matricule,
-        "annee": etudiant.annee_scolaire,
-        "nom_complet": etudiant.nom_prenom,
-        "date_naissance": etudiant.date_naissance.strftime("%d/%m/%Y") if etudiant.date_naissance else "Non renseignée",
-        "lieu_naissance": etudiant.lieu_naissance or "Non renseigné",
-        "annee_academique": etudiant.annee_scolaire,
-        "option": etudiant.classe.filiere.nom if etudiant.classe and etudiant.classe.filiere else "Non renseignée",
-        "niveau": etudiant.classe.niveau if etudiant.classe else "Non renseigné",
-        "date_du_jour": timezone.now(),
-        "qr_code_url": qr_url,
-        "photo_url": photo_url,
-    }
+    context = contexte_attestation(etudiant, 'inscription')
 
-    # Génération du PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="Attestation_inscription__{etudiant.nom_prenom}.pdf"'
-
-    pisa_status = pisa.CreatePDF(
-        template.render(context),
-        dest=response,
-        link_callback=link_callback
-    )
-
-    if pisa_status.err:
+    # Génération du PDF (resservi depuis le cache si rien n'a changé)
+    contenu = pdf_en_cache(template_path, context, portee_etudiant(etudiant), link_callback)
+    if contenu is None:
         return HttpResponse('Une erreur est survenue lors de la génération du PDF.', status=500)
 
-    return response
+    return reponse_pdf(contenu, f"Attestation_inscription__{etudiant.nom_prenom}.pdf")
 
 
 
 def attestation_frequentation(request, resultat):
     template_path = 'admin/attestation_frequentation.html'
-    template = get_template(template_path)
     etudiant = resultat
 
-    # Donnée à encoder dans le QR code
-    qr_data = f"""
-        N° : {etudiant.matricule}/ESTIM/DG/{etudiant.annee_scolaire}
-        Nom et Prénoms : {etudiant.nom_prenom}
-        Fait le  : {timezone.now().strftime("%d/%m/%Y")}
-    """
-    
-    # Création du QR code
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=ERROR_CORRECT_H,
-        box_size=4,
-        border=2,
-    )
-    qr.add_data(qr_data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-
-    # Dossier et nom du fichier de sortie
-    qr_folder = os.path.join(settings.MEDIA_ROOT, 'qr_codes')
-    os.makedirs(qr_folder, exist_ok=True)
-    qr_filename = f"{etudiant.matricule}_qr.png"
-    qr_path = os.path.join(qr_folder, qr_filename)
-
-    # Sauvegarde du QR code
-    img.save(qr_path)
-
-    # URL vers l’image QR code (accessible dans le template)
-    qr_url = f"{settings.MEDIA_URL}qr_codes/{qr_filename}"
-
-    # URL de la photo de l’étudiant (optionnelle)
-    photo_url = f"http://{request.get_host()}{settings.MEDIA_URL}{etudiant.photo}" if etudiant.photo else ""
-
-
     # Création de l'attestation dans la base de données
     Attestation.objects.create(
     etudiant=etudiant,
@@ -205,31 +127,11 @@ def attestation_frequentation(request, resultat):
     )
 
     # Contexte du template
-    context = {
-        "numero": etudiant.matricule,
-        "annee": etudiant.annee_scolaire,
-        "nom_complet": etudiant.nom_prenom,
-        "date_naissance": etudiant.date_naissance.strftime("%d/%m/%Y") if etudiant.date_naissance else "Non renseignée",
-        "lieu_naissance": etudiant.lieu_naissance or "Non renseigné",
-        "annee_academique": etudiant.annee_scolaire,
-        "option": etudiant.classe.filiere.nom if etudiant.classe and etudiant.classe.filiere else "Non renseignée",
-        "niveau": etudiant.classe.niveau if etudiant.classe else "Non renseigné",
-        'date_du_jour': timezone.now(),
-        'qr_code_url': qr_url,
-        'photo_url': photo_url,
-    }
-
-    # Génération du PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="Attestation_frequentation__{etudiant.nom_prenom}.pdf"'
-
-    pisa_status = pisa.CreatePDF(
-        template.render(context),
-        dest=response,
-        link_callback=link_callback
-    )
+    context = contexte_attestation(etudiant, 'frequentation')
 
-    if pisa_status.err:
+    # Génération du PDF (resservi depuis le cache si rien n'a changé)
+    contenu = pdf_en_cache(template_path, context, portee_etudiant(etudiant), link_callback)
+    if contenu is None:
         return HttpResponse('Une erreur est survenue lors de la génération du PDF.', status=500)
 
-    return response
+    return reponse_pdf(contenu, f"Attestation_frequentation__{etudiant.nom_prenom}.pdf")
@@ -14,6 +14,12 @@ from import_export.widgets import ForeignKeyWidget, DateWidget
 from .xls import CustomExcelDateWidget  # adapte le chemin si besoin
 from gestion_des_resultats.views import attestation_inscription, attestation_frequentation
 from django.shortcuts import redirect
+from django.db import IntegrityError, transaction
+from django.template.response import TemplateResponse
+from django.urls import path
+from finances.soldes import modifier_montants
+from gestion_des_resultats.forms import ImportExcelForm
+from .import_etudiants import ErreurImport, appliquer_import, deserialiser, lire_feuille, preparer_import, serialiser
 
 # class EtudiantResourceResultat(resources.ModelResource):
 #     class Meta:
@@ -63,6 +69,8 @@ class EtudiantAdmin(ModelAdmin, ImportExportModelAdmin):
     resource_class = EtudiantResource
     import_form_class = ImportForm
     export_form_class = ExportForm
+    # Bouton « Importer des étudiants (Excel) » : import en masse (voir import_etudiants.py)
+    import_export_change_list_template = 'admin/etudiant_changelist.html'
     list_display = ('photo_etudiant', 'nom_prenom', 'classe', 'date_naissance', 'lieu_naissance', 'matricule', 'montant')
     list_filter = ('classe__nom', 'classe__filiere', 'classe__niveau', 'actif')
     list_editable = ('montant',)
@@ -73,6 +81,66 @@ class EtudiantAdmin(ModelAdmin, ImportExportModelAdmin):
     autocomplete_fields = ['classe']
     actions = ['attestation_inscription', 'attestation_frequentation']
 
+    def changelist_view(self, request, extra_context=None):
+        # Montants modifiés dans la liste : enregistrés ensemble, frais compris (voir finances/soldes.py)
+        if request.method != 'POST' or '_save' not in request.POST:
+            return super().changelist_view(request, extra_context)
+        request.montants_modifies = {}
+        with transaction.atomic():
+            response = super().changelist_view(request, extra_context)
+            modifier_montants(request.montants_modifies)
+        return response
+
+    def save_model(self, request, obj, form, change):
+        montants = getattr(request, 'montants_modifies', None)
+        if change and montants is not None and form.changed_data == ['montant']:
+            montants[obj.pk] = obj.montant
+            return
+        super().save_model(request, obj, form, change)
+
+    def get_urls(self):
+        return [
+            path('import-excel/', self.admin_site.admin_view(self.import_excel_view), name='import_etudiants'),
+        ] + super().get_urls()
+
+    def import_excel_view(self, request):
+        # Aperçu du diff à l'envoi du fichier ; les lignes lues restent en session jusqu'à la confirmation
+        if not self.has_add_permission(request):
+            return redirect('admin:parametre_etudiant_changelist')
+        if request.method == 'POST' and 'confirmer' in request.POST:
+            donnees = request.session.pop('import_etudiants', None)
+            if donnees is None:
+                self.message_user(request, "Aperçu expiré : renvoyez le fichier.", level="warning")
+                return redirect('admin:import_etudiants')
+            # Diff recalculé sur l'état actuel de la base
+            rapport = preparer_import(deserialiser(donnees['lignes']), [tuple(erreur) for erreur in donnees['erreurs']])
+            try:
+                crees, modifies = appliquer_import(rapport)
+            except IntegrityError:
+                self.message_user(request, "Import annulé : des étudiants ont été ajoutés entre-temps, relancez l'aperçu.", level="error")
+                return redirect('admin:import_etudiants')
+            self.message_user(request, f"Import terminé : {crees} étudiant(s) créé(s), {modifies} modifié(s), "
+                                       f"{len(rapport['erreurs'])} ligne(s) ignorée(s).")
+            return redirect('admin:parametre_etudiant_changelist')
+
+        form = ImportExcelForm(request.POST or None, request.FILES or None)
+        rapport = None
+        if request.method == 'POST' and form.is_valid():
+            try:
+                lignes, erreurs = lire_feuille(form.cleaned_data['excel_file'])
+            except ErreurImport as exc:
+                form.add_error('excel_file', str(exc))
+            else:
+                rapport = preparer_import(lignes, erreurs)
+                request.session['import_etudiants'] = {'lignes': serialiser(lignes), 'erreurs': erreurs}
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Importer des étudiants",
+            'form': form,
+            'rapport': rapport,
+        }
+        return TemplateResponse(request, 'admin/import_excel.html', context)
 
 
 
@@ -5,3 +5,6 @@ class ParametreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'parametre'
     verbose_name = "PARAMETRES SYSTEME"
+
+    def ready(self):
+        import parametre.signals
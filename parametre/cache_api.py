@@ -0,0 +1,101 @@
+"""
+Cache des réponses de l'API (routes en lecture seule).
+
+    @router.get("/classes", response=list[ClasseOut])
+    @decorate_view(reponse_en_cache(Classe, Filiere))
+    def list_classes(request):
+        ...
+
+La réponse JSON d'un GET est conservée dans le cache Django (API_CACHE_TTL
+secondes, 300 par défaut, ou `ttl` par route) avec un ETag ; un client qui
+renvoie cet ETag dans If-None-Match reçoit un 304 sans corps.
+
+La clé dépend de l'URL complète et d'une version par modèle dont dépend la
+route : toute écriture sur l'un de ces modèles (voir signals.py) change sa
+version, ce qui rend obsolètes d'un coup toutes les réponses concernées. Les
+écritures qui ne passent pas par save()/delete() (update(), bulk_*) doivent
+appeler invalider() elles-mêmes.
+
+Les versions vivent dans le cache : il doit être partagé par tous les
+processus (Redis, Memcached, base de données, fichiers). Avec le LocMemCache
+par défaut, propre à chaque processus, une écriture traitée par un worker
+laisserait les autres servir leurs réponses périmées jusqu'à l'expiration :
+la mise en cache est alors désactivée, sauf si API_CACHE_LOCAL = True
+(déploiement à un seul processus).
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+
+
+TTL_DEFAUT = 300
+PREFIXE = "api"
+
+
+def cache_partage():
+    """Vrai si le cache par défaut est commun à tous les processus (ou déclaré suffisant)."""
+    return getattr(settings, 'API_CACHE_LOCAL', False) or not isinstance(caches['default'], LocMemCache)
+
+
+def _cle_version(modele):
+    return f"{PREFIXE}:version:{modele._meta.label_lower}"
+
+
+def versions(modeles):
+    """Versions courantes des modèles (créées au premier accès)."""
+    cles = [_cle_version(modele) for modele in modeles]
+    courantes = cache.get_many(cles)
+    for cle in cles:
+        if cle not in courantes:
+            # Une version évincée ne doit pas retomber sur une ancienne valeur
+            cache.add(cle, time.time_ns(), None)
+            courantes[cle] = cache.get(cle)
+    return [courantes[cle] for cle in cles]
+
+
+def invalider(*modeles):
+    for modele in modeles:
+        cache.set(_cle_version(modele), time.time_ns(), None)
+
+
+def reponse_en_cache(*modeles, ttl=None):
+    """
+    Décorateur de vue (à appliquer via ninja.decorators.decorate_view) :
+    met en cache les réponses 200 des GET, invalidées par les écritures sur
+    `modeles`.
+    """
+    def decorateur(vue):
+        @wraps(vue)
+        def enveloppe(request, *args, **kwargs):
+            if request.method != "GET" or not cache_partage():
+                return vue(request, *args, **kwargs)
+
+            empreinte = f"{request.get_full_path()}|{versions(modeles)}"
+            cle = f"{PREFIXE}:reponse:{hashlib.sha256(empreinte.encode()).hexdigest()}"
+
+            entree = cache.get(cle)
+            if entree is None:
+                response = vue(request, *args, **kwargs)
+                if response.status_code != 200 or response.streaming:
+                    return response
+                etag = f'"{hashlib.md5(response.content).hexdigest()}"'
+                entree = (response.content, response['Content-Type'], etag)
+                duree = ttl if ttl is not None else getattr(settings, 'API_CACHE_TTL', TTL_DEFAUT)
+                cache.set(cle, entree, duree)
+
+            contenu, content_type, etag = entree
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = HttpResponse(contenu, content_type=content_type)
+            response['ETag'] = etag
+            return response
+
+        return enveloppe
+
+    return decorateur
@@ -0,0 +1,65 @@
+"""
+Exports en flux (NDJSON ou CSV).
+
+Les lignes sont lues par paquets (`.iterator(chunk_size=...)`) et écrites une
+à une dans une StreamingHttpResponse : la mémoire reste bornée quelle que soit
+la taille de l'export.
+"""
+import csv
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+TAILLE_LOT_DEFAUT = 2000
+
+
+def taille_lot():
+    return getattr(settings, 'EXPORT_TAILLE_LOT', TAILLE_LOT_DEFAUT)
+
+
+def lignes(queryset, colonnes):
+    """
+    Parcourt le queryset par paquets et produit des dictionnaires
+    {nom: valeur} ; `colonnes` associe chaque nom exporté à un chemin ORM.
+    """
+    for valeurs in queryset.values_list(*colonnes.values()).iterator(chunk_size=taille_lot()):
+        yield dict(zip(colonnes.keys(), valeurs))
+
+
+class _Tampon:
+    """Pseudo-fichier pour csv.writer : retourne la ligne au lieu de l'écrire."""
+    def write(self, valeur):
+        return valeur
+
+
+def _ndjson(donnees):
+    encodeur = DjangoJSONEncoder(ensure_ascii=False)
+    for ligne in donnees:
+        yield encodeur.encode(ligne) + "\n"
+
+
+def _csv(donnees, entetes):
+    writer = csv.writer(_Tampon())
+    yield writer.writerow(entetes)
+    for ligne in donnees:
+        yield writer.writerow([ligne[entete] for entete in entetes])
+
+
+def reponse_export(donnees, entetes, format, nom_fichier):
+    """
+    StreamingHttpResponse NDJSON ou CSV sur l'itérable `donnees`.
+    Lève ValueError si le format n'est pas supporté.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Format non supporté : {format} (ndjson ou csv)")
+
+    contenu = _ndjson(donnees) if format == "ndjson" else _csv(donnees, list(entetes))
+    response = StreamingHttpResponse(contenu, content_type=FORMATS[format])
+    response['Content-Disposition'] = f'attachment; filename="{nom_fichier}.{format}"'
+    return response
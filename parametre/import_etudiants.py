@@ -0,0 +1,253 @@
+"""
+Import en masse des étudiants depuis une feuille Excel (inscriptions).
+
+Colonnes reconnues (première ligne, casse et espaces ignorés) :
+nom_prenom et classe (obligatoires), date_naissance, lieu_naissance,
+montant. Un étudiant est identifié par (nom_prenom, classe), comme
+l'unique_together du modèle.
+
+Le traitement se fait en trois temps :
+
+- `lire_feuille` : lecture openpyxl en mode read_only (les lignes sont lues
+  en flux, sans charger les styles), dates et montants convertis à la volée ;
+- `preparer_import` : une requête pour les classes, une pour les étudiants
+  existants, puis le diff (à créer / à modifier / inchangés / erreurs)
+  calculé en mémoire, sans rien écrire : c'est l'aperçu ;
+- `appliquer_import` : bulk_create / bulk_update par lots de
+  IMPORT_TAILLE_LOT lignes (500 par défaut) dans une transaction.
+
+Les écritures en masse ne déclenchent pas les signaux : `appliquer_import`
+attribue lui-même les matricules (une réservation par année scolaire) et
+fait les invalidations (avancement des classes, versions, PDF, frais,
+tableau de bord, cache de l'API). Une cellule vide ne modifie pas un
+étudiant existant.
+"""
+import datetime
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from openpyxl import load_workbook
+
+from finances.soldes import recalculer_reste_a_payer
+from finances.tableau_de_bord import invalider_tableau_de_bord
+from gestion_des_resultats import cache_pdf
+from saisie_notes import avancement
+from . import cache_api
+from .matricules import attribuer_matricules
+from .models import Classe, Etudiant
+from .versions import toucher_etudiants
+
+COLONNES = ('nom_prenom', 'classe', 'date_naissance', 'lieu_naissance', 'montant')
+COLONNES_OBLIGATOIRES = ('nom_prenom', 'classe')
+CHAMPS_MODIFIABLES = ('date_naissance', 'lieu_naissance', 'montant')
+LIEU_PAR_DEFAUT = 'Non renseigné'
+TAILLE_LOT_DEFAUT = 500
+
+# Excel compte les jours depuis le 30/12/1899 (voir xls.py)
+ORIGINE_EXCEL = datetime.date(1899, 12, 30)
+FORMATS_DATE = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y')
+
+
+class ErreurImport(Exception):
+    """Feuille inutilisable (colonnes obligatoires absentes, fichier illisible)."""
+
+
+def taille_lot():
+    return getattr(settings, 'IMPORT_TAILLE_LOT', TAILLE_LOT_DEFAUT)
+
+
+def _entete(valeur):
+    return re.sub(r'\s+', '_', str(valeur or '').strip().lower())
+
+
+def _texte(valeur):
+    return re.sub(r'\s+', ' ', str(valeur)).strip() if valeur is not None else ''
+
+
+def _date(valeur):
+    if valeur in (None, ''):
+        return None
+    if isinstance(valeur, datetime.datetime):
+        return valeur.date()
+    if isinstance(valeur, datetime.date):
+        return valeur
+    if isinstance(valeur, (int, float)):
+        return ORIGINE_EXCEL + datetime.timedelta(days=int(valeur))
+    for format_date in FORMATS_DATE:
+        try:
+            return datetime.datetime.strptime(str(valeur).strip(), format_date).date()
+        except ValueError:
+            pass
+    raise ValueError(f"date de naissance invalide « {valeur} »")
+
+
+def _montant(valeur):
+    if valeur in (None, ''):
+        return None
+    try:
+        montant = Decimal(str(valeur).replace(' ', '').replace(',', '.'))
+    except InvalidOperation:
+        raise ValueError(f"montant invalide « {valeur} »")
+    if not montant.is_finite() or montant < 0:
+        raise ValueError(f"montant invalide « {valeur} »")
+    return montant
+
+
+def lire_feuille(fichier):
+    """
+    Lit la première feuille du classeur. Retourne (lignes, erreurs) :
+    lignes = [{'ligne': n, 'nom_prenom': ..., 'classe': ..., ...}],
+    erreurs = [(n, message)] pour les cellules invalides.
+    """
+    try:
+        classeur = load_workbook(fichier, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ErreurImport(f"Fichier Excel illisible : {exc}")
+    try:
+        rangees = classeur.worksheets[0].iter_rows(values_only=True)
+        entetes = [_entete(valeur) for valeur in next(rangees, ())]
+        manquantes = [colonne for colonne in COLONNES_OBLIGATOIRES if colonne not in entetes]
+        if manquantes:
+            raise ErreurImport("Colonnes obligatoires absentes : " + ", ".join(manquantes))
+        positions = {colonne: entetes.index(colonne) for colonne in COLONNES if colonne in entetes}
+
+        lignes, erreurs = [], []
+        for numero, rangee in enumerate(rangees, start=2):
+            cellules = {colonne: rangee[position] if position < len(rangee) else None
+                        for colonne, position in positions.items()}
+            if all(valeur in (None, '') for valeur in cellules.values()):
+                continue  # Ligne vide
+            try:
+                lignes.append({
+                    'ligne': numero,
+                    'nom_prenom': _texte(cellules['nom_prenom']),
+                    'classe': _texte(cellules['classe']),
+                    'date_naissance': _date(cellules.get('date_naissance')),
+                    'lieu_naissance': _texte(cellules.get('lieu_naissance')) or None,
+                    'montant': _montant(cellules.get('montant')),
+                })
+            except ValueError as exc:
+                erreurs.append((numero, str(exc)))
+        return lignes, erreurs
+    finally:
+        classeur.close()
+
+
+def serialiser(lignes):
+    """Lignes lues -> données JSON (conservées en session entre l'aperçu et la confirmation)."""
+    return [
+        dict(ligne,
+             date_naissance=ligne['date_naissance'] and ligne['date_naissance'].isoformat(),
+             montant=ligne['montant'] if ligne['montant'] is None else str(ligne['montant']))
+        for ligne in lignes
+    ]
+
+
+def deserialiser(donnees):
+    return [
+        dict(ligne,
+             date_naissance=ligne['date_naissance'] and datetime.date.fromisoformat(ligne['date_naissance']),
+             montant=ligne['montant'] if ligne['montant'] is None else Decimal(ligne['montant']))
+        for ligne in donnees
+    ]
+
+
+def preparer_import(lignes, erreurs=()):
+    """
+    Calcule le diff de l'import sans rien écrire (deux requêtes). Retourne
+    un dict : a_creer (Etudiant non enregistrés), a_modifier ([(etudiant,
+    {champ: (ancien, nouveau)})]), inchanges (nombre) et erreurs.
+    """
+    erreurs = list(erreurs)
+    classes = {}
+    for classe in Classe.objects.filter(nom__in={ligne['classe'] for ligne in lignes}):
+        classes.setdefault(classe.nom, []).append(classe)
+    existants = {
+        (etudiant.nom_prenom, etudiant.classe_id): etudiant
+        for etudiant in Etudiant.objects.select_related('classe').filter(
+            classe__in=[classe for homonymes in classes.values() for classe in homonymes],
+            nom_prenom__in={ligne['nom_prenom'] for ligne in lignes},
+        )
+    }
+
+    a_creer, a_modifier, inchanges, vues = [], [], 0, {}
+    for ligne in lignes:
+        numero, nom_prenom = ligne['ligne'], ligne['nom_prenom']
+        homonymes = classes.get(ligne['classe'], [])
+        if not nom_prenom or not ligne['classe']:
+            erreurs.append((numero, "nom_prenom et classe sont obligatoires"))
+            continue
+        if len(homonymes) != 1:
+            erreurs.append((numero, f"classe « {ligne['classe']} » "
+                                    + ("introuvable" if not homonymes else "ambiguë (plusieurs classes de ce nom)")))
+            continue
+        classe = homonymes[0]
+        cle = (nom_prenom, classe.pk)
+        if cle in vues:
+            erreurs.append((numero, f"doublon de la ligne {vues[cle]} ({nom_prenom}, {classe.nom})"))
+            continue
+        vues[cle] = numero
+
+        etudiant = existants.get(cle)
+        if etudiant is None:
+            a_creer.append(Etudiant(
+                nom_prenom=nom_prenom,
+                classe=classe,
+                date_naissance=ligne['date_naissance'],
+                lieu_naissance=ligne['lieu_naissance'] or LIEU_PAR_DEFAUT,
+                montant=ligne['montant'] if ligne['montant'] is not None else Decimal('0.0'),
+            ))
+            continue
+        changements = {
+            champ: (getattr(etudiant, champ), ligne[champ])
+            for champ in CHAMPS_MODIFIABLES
+            if ligne[champ] is not None and ligne[champ] != getattr(etudiant, champ)
+        }
+        if changements:
+            for champ, (_, nouveau) in changements.items():
+                setattr(etudiant, champ, nouveau)
+            a_modifier.append((etudiant, changements))
+        else:
+            inchanges += 1
+
+    erreurs.sort()
+    return {'a_creer': a_creer, 'a_modifier': a_modifier, 'inchanges': inchanges, 'erreurs': erreurs}
+
+
+def appliquer_import(rapport):
+    """
+    Enregistre le diff de `preparer_import` par lots, puis fait les
+    invalidations que les signaux auraient faites. Retourne (créés, modifiés).
+    """
+    a_creer = rapport['a_creer']
+    modifies = [etudiant for etudiant, _ in rapport['a_modifier']]
+    champs = sorted({champ for _, changements in rapport['a_modifier'] for champ in changements})
+    montants_modifies = [etudiant.pk for etudiant, changements in rapport['a_modifier'] if 'montant' in changements]
+
+    with transaction.atomic():
+        attribuer_matricules(a_creer)
+        crees = Etudiant.objects.bulk_create(a_creer, batch_size=taille_lot())
+        if modifies:
+            Etudiant.objects.bulk_update(modifies, champs, batch_size=taille_lot())
+        if montants_modifies:
+            recalculer_reste_a_payer(pk__in=montants_modifies)
+
+        if crees:
+            # Effectif des classes changé : avancement de la saisie des notes
+            avancement.recalculer_classes({etudiant.classe_id for etudiant in crees})
+        if modifies:
+            toucher_etudiants(pk__in=[etudiant.pk for etudiant in modifies])
+            cache_pdf.invalider_etudiants([etudiant.pk for etudiant in modifies])
+        if crees or modifies:
+            invalider_tableau_de_bord()
+            cache_api.invalider(Etudiant)
+    return len(crees), len(modifies)
+
+
+def importer(fichier):
+    """Lit, prépare et applique l'import d'un fichier ; retourne le rapport."""
+    rapport = preparer_import(*lire_feuille(fichier))
+    rapport['crees'], rapport['modifies'] = appliquer_import(rapport)
+    return rapport
@@ -0,0 +1,105 @@
+"""
+Journal des actions de l'administration (LogEntry).
+
+Le fil d'activité est paginé par curseur (keyset) sur (action_time, id), du
+plus récent au plus ancien : chaque page est une lecture bornée de l'index
+(voir migration 0008), quelle que soit la taille du journal. Les entrées
+anciennes peuvent être archivées dans un fichier NDJSON compressé puis
+supprimées (commande `archiver_journal`).
+"""
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .export import lignes
+from .pagination import decoder_curseur, encoder_curseur
+
+
+LIMITE_DEFAUT = 20
+LIMITE_MAX = 200
+
+# Colonnes archivées (nom -> chemin ORM)
+COLONNES = {
+    "id": "id",
+    "action_time": "action_time",
+    "user_id": "user_id",
+    "user_username": "user__username",
+    "content_type_id": "content_type_id",
+    "content_type": "content_type__model",
+    "object_id": "object_id",
+    "object_repr": "object_repr",
+    "action_flag": "action_flag",
+    "change_message": "change_message",
+}
+
+
+def _curseur(entree):
+    return encoder_curseur(entree.action_time.isoformat(), entree.pk)
+
+
+def page_journal(curseur=None, limite=LIMITE_DEFAUT, user_id=None, content_type_id=None):
+    """
+    Retourne (entrees, curseur_suivant) : les LogEntry (avec user et
+    content_type) du plus récent au plus ancien ; curseur_suivant vaut None
+    sur la dernière page. Lève ValueError si le curseur est invalide.
+    """
+    limite = max(1, min(limite, LIMITE_MAX))
+    queryset = LogEntry.objects.select_related('user', 'content_type')
+
+    if user_id is not None:
+        queryset = queryset.filter(user_id=user_id)
+    if content_type_id is not None:
+        queryset = queryset.filter(content_type_id=content_type_id)
+
+    if curseur:
+        action_time, entree_id = decoder_curseur(curseur)
+        action_time = parse_datetime(action_time)
+        if action_time is None:
+            raise ValueError("Curseur invalide")
+        queryset = queryset.filter(
+            Q(action_time__lt=action_time) | Q(action_time=action_time, id__lt=entree_id)
+        )
+
+    entrees = list(queryset.order_by('-action_time', '-id')[:limite + 1])
+
+    curseur_suivant = None
+    if len(entrees) > limite:
+        entrees = entrees[:limite]
+        curseur_suivant = _curseur(entrees[-1])
+
+    return entrees, curseur_suivant
+
+
+def dossier_archives():
+    return getattr(settings, 'JOURNAL_ARCHIVES', os.path.join(settings.BASE_DIR, 'archives_journal'))
+
+
+def archiver_journal(avant, chemin=None):
+    """
+    Écrit les entrées antérieures à `avant` dans un fichier NDJSON gzip puis
+    les supprime. Retourne (chemin, nombre d'entrées archivées) ; aucun
+    fichier n'est créé s'il n'y a rien à archiver.
+    """
+    anciennes = LogEntry.objects.filter(action_time__lt=avant)
+    if not anciennes.exists():
+        return None, 0
+
+    if chemin is None:
+        os.makedirs(dossier_archives(), exist_ok=True)
+        chemin = os.path.join(dossier_archives(), f"journal_avant_{avant:%Y%m%d_%H%M%S}.ndjson.gz")
+
+    encodeur = DjangoJSONEncoder(ensure_ascii=False)
+    with transaction.atomic():
+        with gzip.open(chemin, 'wt', encoding='utf-8') as fichier:
+            for ligne in lignes(anciennes.order_by('action_time', 'id'), COLONNES):
+                fichier.write(encodeur.encode(ligne) + "\n")
+        # LogEntry n'a ni dépendances ni signaux : suppression en une requête
+        total, _ = anciennes.delete()
+
+    return chemin, total
@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from parametre.journal import archiver_journal
+
+
+class Command(BaseCommand):
+    help = "Archive (NDJSON gzip) puis supprime les entrées du journal de l'administration plus anciennes que N jours"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jours', type=int, default=180, help="Ancienneté minimale des entrées archivées (180 par défaut)")
+        parser.add_argument('--fichier', help="Chemin du fichier d'archive (par défaut dans JOURNAL_ARCHIVES)")
+
+    def handle(self, *args, **options):
+        avant = timezone.now() - timedelta(days=options['jours'])
+        chemin, total = archiver_journal(avant, options['fichier'])
+        if not total:
+            self.stdout.write("Aucune entrée à archiver")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{total} entrée(s) archivée(s) dans {chemin}"))
@@ -0,0 +1,118 @@
+"""
+Attribution des matricules étudiants.
+
+Les numéros viennent d'un compteur en base (CompteurMatricule) : une
+réservation de n numéros coûte deux requêtes quel que soit n (incrément du
+compteur puis relecture, dans la même transaction), et deux réservations
+concurrentes ne peuvent pas obtenir les mêmes numéros, l'incrément
+verrouillant la ligne du compteur jusqu'à la fin de la transaction.
+
+Le format se règle dans les settings :
+
+    MATRICULE_FORMAT = "{aa}{numero}"   # "{numero}" par défaut
+    MATRICULE_LARGEUR = 5               # 4 par défaut (zéros à gauche)
+
+`{numero}` est le numéro du compteur, `{annee}` et `{aa}` la première année
+de l'année scolaire de l'étudiant (2024 / 24). Un format qui contient
+l'année a un compteur par année. Un nouveau compteur démarre après le plus
+grand matricule existant au même format, pour ne jamais réutiliser un
+numéro déjà attribué.
+"""
+import re
+import string
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CompteurMatricule, Etudiant
+
+
+FORMAT_DEFAUT = "{numero}"
+LARGEUR_DEFAUT = 4
+
+
+def format_matricule():
+    return getattr(settings, 'MATRICULE_FORMAT', FORMAT_DEFAUT)
+
+
+def largeur_matricule():
+    return getattr(settings, 'MATRICULE_LARGEUR', LARGEUR_DEFAUT)
+
+
+def _annees(annee_scolaire):
+    annee = str(annee_scolaire or "")[:4]
+    return {'annee': annee, 'aa': annee[2:]}
+
+
+def cle_compteur(annee_scolaire=None):
+    """Clé du compteur : le format, avec l'année s'il la contient."""
+    return format_matricule().replace("{numero}", "#").format(**_annees(annee_scolaire))
+
+
+def _motif(annee_scolaire):
+    """Expression régulière des matricules au format courant (numéro capturé)."""
+    morceaux = []
+    for texte, champ, _, _ in string.Formatter().parse(format_matricule()):
+        morceaux.append(re.escape(texte))
+        if champ == 'numero':
+            morceaux.append(r"(\d+)")
+        elif champ is not None:
+            morceaux.append(re.escape(_annees(annee_scolaire)[champ]))
+    return "^" + "".join(morceaux) + "$"
+
+
+def _plus_grand_existant(annee_scolaire):
+    motif = _motif(annee_scolaire)
+    numeros = [
+        int(re.match(motif, matricule).group(1))
+        for matricule in Etudiant.objects.filter(matricule__regex=motif).values_list('matricule', flat=True)
+    ]
+    return max(numeros, default=0)
+
+
+def _incrementer(cle, nombre):
+    """Incrémente le compteur `cle` de `nombre` ; retourne le nouveau dernier numéro, None s'il n'existe pas."""
+    if not CompteurMatricule.objects.filter(cle=cle).update(dernier=F('dernier') + nombre):
+        return None
+    return CompteurMatricule.objects.values_list('dernier', flat=True).get(cle=cle)
+
+
+def reserver_numeros(nombre, annee_scolaire=None):
+    """Réserve `nombre` numéros consécutifs ; retourne le range correspondant."""
+    cle = cle_compteur(annee_scolaire)
+    with transaction.atomic():
+        dernier = _incrementer(cle, nombre)
+        if dernier is None:
+            # Premier usage de ce format : le compteur part du plus grand matricule existant
+            try:
+                with transaction.atomic():
+                    CompteurMatricule.objects.create(cle=cle, dernier=_plus_grand_existant(annee_scolaire))
+            except IntegrityError:
+                pass  # Créé entre-temps par une réservation concurrente
+            dernier = _incrementer(cle, nombre)
+    return range(dernier - nombre + 1, dernier + 1)
+
+
+def formater(numero, annee_scolaire=None):
+    return format_matricule().format(numero=str(numero).zfill(largeur_matricule()), **_annees(annee_scolaire))
+
+
+def reserver_matricules(nombre, annee_scolaire=None):
+    """Réserve `nombre` matricules pour l'année scolaire donnée (deux requêtes)."""
+    return [formater(numero, annee_scolaire) for numero in reserver_numeros(nombre, annee_scolaire)]
+
+
+def attribuer_matricules(etudiants):
+    """
+    Donne un matricule aux étudiants (non enregistrés) qui n'en ont pas, avant
+    un bulk_create : une réservation par année scolaire présente.
+    """
+    par_annee = {}
+    for etudiant in etudiants:
+        if not etudiant.matricule:
+            par_annee.setdefault(etudiant.annee_scolaire, []).append(etudiant)
+    for annee_scolaire, groupe in par_annee.items():
+        for etudiant, matricule in zip(groupe, reserver_matricules(len(groupe), annee_scolaire)):
+            etudiant.matricule = matricule
+    return etudiants
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parametre', '0006_etudiant_montant'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='etudiant',
+            index=models.Index(fields=['nom_prenom', 'id'], name='etudiant_nom_prenom_id_idx'),
+        ),
+    ]
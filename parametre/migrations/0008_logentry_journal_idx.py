@@ -0,0 +1,36 @@
+# Index du fil d'activité (parametre/journal.py) sur la table du journal de
+# l'administration (django_admin_log).
+#
+# Pourquoi ici : LogEntry appartient à django.contrib.admin, dont on ne
+# modifie ni le Meta ni les migrations ; or seul le journal de `parametre`
+# pagine par curseur sur (action_time, id), globalement ou filtré par
+# utilisateur / type de contenu, et a besoin de ces index. Une opération
+# AddIndex ne vise que les modèles de l'app qui la porte : les index sont
+# donc créés en SQL brut (SQLite et PostgreSQL), sans toucher à l'état des
+# migrations de l'app admin, avec leur suppression explicite au retour
+# arrière. Les noms d'index sont ceux de la première version de cette
+# migration : une base déjà migrée reste cohérente.
+
+from django.db import migrations
+
+
+INDEX = [
+    ('logentry_time_id_idx', 'action_time DESC, id DESC'),
+    ('logentry_user_time_idx', 'user_id, action_time DESC, id DESC'),
+    ('logentry_ct_time_idx', 'content_type_id, action_time DESC, id DESC'),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parametre', '0007_etudiant_nom_prenom_id_idx'),
+        ('admin', '0003_logentry_add_action_flag_choices'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[f'CREATE INDEX "{nom}" ON "django_admin_log" ({colonnes});' for nom, colonnes in INDEX],
+            reverse_sql=[f'DROP INDEX "{nom}";' for nom, _ in INDEX],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 16:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parametre', '0008_logentry_journal_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etudiant',
+            name='date_maj',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='etudiant',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 17:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parametre', '0009_etudiant_version_date_maj'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompteurMatricule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cle', models.CharField(max_length=100, unique=True)),
+                ('dernier', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'COMPTEUR DE MATRICULES',
+                'verbose_name_plural': 'COMPTEURS DE MATRICULES',
+            },
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.core.exceptions import ValidationError
 from django.utils.crypto import get_random_string
 from django.db.models import Q
+from django.utils import timezone
 from datetime import date
 
 class Filiere(models.Model):
@@ -87,41 +88,54 @@ class Etudiant(models.Model):
     photo = models.ImageField(upload_to='photos/', blank=True, null=True, default='photos/default.png')
     actif = models.BooleanField(default=True)
     annee_scolaire = models.CharField(max_length=20, default="2024-2025")
+    # Incrémentés à chaque changement du profil, des notes ou des frais (voir versions.py)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    date_maj = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         verbose_name = "-> ETUDIANTS"
         verbose_name_plural = "-> ETUDIANTS"
         unique_together = ('nom_prenom', 'classe')
         ordering = ['nom_prenom']
+        indexes = [
+            # Pagination par curseur (voir pagination.py)
+            models.Index(fields=['nom_prenom', 'id'], name='etudiant_nom_prenom_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nom_prenom} - ({self.matricule}) - {self.classe.nom}"
 
     def generate_unique_matricule(self):
-        from random import randint
-        matricule = f"{randint(1000, 9999)}"
-        while Etudiant.objects.filter(matricule=matricule).exists():
-            matricule = f"{randint(1000, 9999)}"
-        return matricule
-
-    def check_finance(self):
-        etudiant_data = Etudiant.objects.get(id=self.id)
-        if etudiant_data.montant != self.montant:
-            finances = self.frais_scolarite.all()
-            for finance in finances:
-                finances.reste_a_payer = self.montant - finance.montant
-                finance.save()
+        # Numéro suivant du compteur de l'année (voir matricules.py)
+        from parametre.matricules import reserver_matricules
+        return reserver_matricules(1, self.annee_scolaire)[0]
+
+    def check_finance(self, ancien_montant):
+        # Montant modifié : reste à payer de tous ses frais recalculé en une requête
+        if ancien_montant is not None and ancien_montant != self.montant:
+            from finances.soldes import recalculer_reste_a_payer
+            recalculer_reste_a_payer(pk=self.pk)
 
     def save(self, *args, **kwargs):
-        
+        # État de la ligne avant écriture, relu une seule fois : sert au reste à payer
+        # (check_finance) et aux signaux post_save (effectif des classes, résultats)
+        self._etat_initial = None
         if not self.id:
             self.annee_scolaire = "2024-2025"
             self.matricule = self.generate_unique_matricule() if not self.matricule else self.matricule
+        else:
+            self._etat_initial = Etudiant.objects.filter(pk=self.pk).values('montant', 'classe_id', 'actif').first()
+            if self._etat_initial is not None and not kwargs.get('force_insert'):
+                # version / date_maj ne sont incrémentés qu'en SQL (versions.py) : une instance
+                # chargée avant un incrément ne doit pas réécrire l'ancienne valeur
+                champs = kwargs.get('update_fields')
+                if champs is None:
+                    champs = [champ.name for champ in self._meta.concrete_fields if not champ.primary_key]
+                kwargs['update_fields'] = [champ for champ in champs if champ not in ('version', 'date_maj')]
 
-        if self.id: 
-            self.check_finance()
         super().save(*args, **kwargs)
-        
+        self.check_finance(self._etat_initial and self._etat_initial['montant'])
+
 
     # Méthodes pour obtenir les notes
     def get_note_examen(self, matiere, session):
@@ -130,62 +144,27 @@ class Etudiant(models.Model):
     def get_note_devoir(self, matiere, session):
         return self.notes_devoir.filter(devoir__matiere=matiere, devoir__session=session).first()
 
+    def moteur_notes(self, code_session, matieres=None):
+        """
+        Moteur de calcul limité à cet étudiant (voir parametre.moteur_notes).
+        """
+        from parametre.moteur_notes import MoteurNotes
+        return MoteurNotes(self.classe, code_session, etudiants=[self], matieres=matieres)
+
     def moyenne_par_matiere(self, matiere, code_session):
-        try:
-            note_examen_obj = self.get_note_examen(matiere, code_session)
-            note_devoir_obj = self.get_note_devoir(matiere, code_session)
-
-            if not note_examen_obj or not note_devoir_obj:
-                return None
-
-            note_examen = note_examen_obj.note
-            note_devoir = note_devoir_obj.note
-
-            moyenne_brute = (note_devoir * 0.3) + (note_examen * 0.7)
-            moyenne_ponderee = moyenne_brute * matiere.coefficient
-
-            return {
-                "matiere": matiere.nom,
-                "note_devoir": round(note_devoir, 2),
-                "note_examen": round(note_examen, 2),
-                "moyenne_brute": round(moyenne_brute, 2),
-                "coefficient": matiere.coefficient,
-                "moyenne_ponderee": round(moyenne_ponderee, 2),
-            }
-        except Exception as e:
-            print("Erreur dans moyenne_par_matiere:", e)
-            return {
-                "matiere": matiere.nom,
-                "note_devoir": 0,
-                "note_examen": 0,
-                "moyenne_brute": 0,
-                "coefficient": matiere.coefficient,
-                "moyenne_ponderee": 0,
-            }
+        return self.moteur_notes(code_session, matieres=[matiere]).moyenne_par_matiere(self.pk, matiere)
 
     def matieres_non_valides(self, code_session):
         """
         Retourne la liste des matières où la moyenne brute est < 10.
         """
-        matieres = Matiere.objects.filter(classe=self.classe)
-        non_valides = []
-        for matiere in matieres:
-            result = self.moyenne_par_matiere(matiere, code_session)
-            if result and result["moyenne_brute"] < 10:
-                non_valides.append(result)
-        return non_valides
+        return self.moteur_notes(code_session).matieres_non_valides(self.pk)
 
     def matieres_valides(self, code_session):
         """
         Retourne les matières validées (moyenne brute >= 10).
         """
-        matieres = Matiere.objects.filter(classe=self.classe)
-        valides = []
-        for matiere in matieres:
-            result = self.moyenne_par_matiere(matiere, code_session)
-            if result and result["moyenne_brute"] >= 10:
-                valides.append(result)
-        return valides
+        return self.moteur_notes(code_session).matieres_valides(self.pk)
 
     def get_matieres_avec_notes(self, code_session):
         """
@@ -200,38 +179,29 @@ class Etudiant(models.Model):
         ).distinct()
 
     def moyenne_generale(self, code_session):
-        matieres = Matiere.objects.filter(classe=self.classe)
-        total_ponderee = 0
-        total_coef = 0
-        for matiere in matieres:
-            result = self.moyenne_par_matiere(matiere, code_session)
-            if result:
-                total_ponderee += result["moyenne_ponderee"]
-                total_coef += matiere.coefficient
-        if total_coef == 0:
-            return None
-        return round(total_ponderee / total_coef, 2)
+        return self.moteur_notes(code_session).moyenne_generale(self.pk)
 
     def generer_bulletin(self, code_session):
-        matieres = Matiere.objects.filter(classe=self.classe)
-        lignes = []
-        total_ponderee = 0
-        total_coef = 0
-        for matiere in matieres:
-            result = self.moyenne_par_matiere(matiere, code_session)
-            if result:
-                lignes.append(result)
-                total_ponderee += result["moyenne_ponderee"]
-                total_coef += matiere.coefficient
-        moyenne_generale = round(total_ponderee / total_coef, 2) if total_coef else None
-        return {
-            "etudiant": self.nom_prenom,
-            "classe": self.classe.nom,
-            "matieres": lignes,
-            "moyenne_generale": moyenne_generale,
-        }
+        return self.moteur_notes(code_session).bulletin(self)
+
 
 
+class CompteurMatricule(models.Model):
+    """
+    Dernier numéro de matricule attribué, par format (et par année si le
+    format contient l'année). Les numéros sont réservés par blocs, voir
+    matricules.py.
+    """
+    cle = models.CharField(max_length=100, unique=True)
+    dernier = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "COMPTEUR DE MATRICULES"
+        verbose_name_plural = "COMPTEURS DE MATRICULES"
+
+    def __str__(self):
+        return f"{self.cle} : {self.dernier}"
+
 
 class SemestreExamen(models.Model):
     session_choices = (
@@ -0,0 +1,149 @@
+from parametre.models import Matiere
+from saisie_notes.models import NoteDevoir, NoteExamen
+
+
+# Pondération devoir / examen dans la moyenne d'une matière
+POIDS_DEVOIR = 0.3
+POIDS_EXAMEN = 0.7
+
+
+def ligne_matiere(matiere, note_devoir, note_examen):
+    """
+    Construit la ligne de bulletin d'une matière à partir des deux notes.
+    Retourne None si l'une des deux notes manque.
+    """
+    if note_devoir is None or note_examen is None:
+        return None
+
+    moyenne_brute = (note_devoir * POIDS_DEVOIR) + (note_examen * POIDS_EXAMEN)
+    moyenne_ponderee = moyenne_brute * matiere.coefficient
+
+    return {
+        "matiere": matiere.nom,
+        "note_devoir": round(note_devoir, 2),
+        "note_examen": round(note_examen, 2),
+        "moyenne_brute": round(moyenne_brute, 2),
+        "coefficient": matiere.coefficient,
+        "moyenne_ponderee": round(moyenne_ponderee, 2),
+    }
+
+
+def mention(moyenne):
+    """Mention correspondant à une moyenne générale."""
+    moyenne = moyenne or 0
+    if moyenne >= 16:
+        return "Très Bien"
+    elif moyenne >= 14:
+        return "Bien"
+    elif moyenne >= 12:
+        return "Assez Bien"
+    elif moyenne >= 10:
+        return "Passable"
+    return "Échec"
+
+
+class MoteurNotes:
+    """
+    Calcule en mémoire les résultats d'une classe pour une session.
+
+    Toutes les notes de devoirs et d'examens de la classe sont chargées en
+    deux requêtes (plus une pour les matières), puis les moyennes, matières
+    validées / non validées et moyennes générales sont calculées sans
+    retourner en base.
+    """
+
+    def __init__(self, classe, session, etudiants=None, matieres=None):
+        # `classe` peut être None si les matières sont fournies explicitement
+        self.classe = classe
+        self.session = session
+
+        if matieres is None:
+            matieres = Matiere.objects.filter(classe=classe)
+        self.matieres = list(matieres)
+
+        etudiant_ids = None
+        if etudiants is not None:
+            etudiant_ids = [getattr(e, 'pk', e) for e in etudiants]
+
+        self.notes_devoir = self._charger(
+            NoteDevoir.objects.filter(devoir__session=session),
+            'devoir__matiere_id',
+            etudiant_ids,
+        )
+        self.notes_examen = self._charger(
+            NoteExamen.objects.filter(examen__session=session),
+            'examen__matiere_id',
+            etudiant_ids,
+        )
+
+    def _charger(self, queryset, champ_matiere, etudiant_ids):
+        """
+        Retourne un dictionnaire {(etudiant_id, matiere_id): note}.
+        En cas de doublon, la première note (par id) est conservée, comme
+        le faisait `.first()`.
+        """
+        queryset = queryset.filter(**{f"{champ_matiere}__in": [m.pk for m in self.matieres]})
+        if etudiant_ids is not None:
+            queryset = queryset.filter(etudiant_id__in=etudiant_ids)
+
+        notes = {}
+        for etudiant_id, matiere_id, note in queryset.order_by('pk').values_list('etudiant_id', champ_matiere, 'note'):
+            notes.setdefault((etudiant_id, matiere_id), note)
+        return notes
+
+    # Calculs par étudiant
+
+    def etudiant_ids(self):
+        """Identifiants des étudiants ayant au moins une note chargée."""
+        return {cle[0] for cle in self.notes_devoir} | {cle[0] for cle in self.notes_examen}
+
+    def moyenne_par_matiere(self, etudiant_id, matiere):
+        return ligne_matiere(
+            matiere,
+            self.notes_devoir.get((etudiant_id, matiere.pk)),
+            self.notes_examen.get((etudiant_id, matiere.pk)),
+        )
+
+    def lignes(self, etudiant_id):
+        """Lignes de bulletin (matières ayant les deux notes) dans l'ordre des matières."""
+        lignes = []
+        for matiere in self.matieres:
+            result = self.moyenne_par_matiere(etudiant_id, matiere)
+            if result:
+                lignes.append(result)
+        return lignes
+
+    def matieres_valides(self, etudiant_id):
+        return [ligne for ligne in self.lignes(etudiant_id) if ligne["moyenne_brute"] >= 10]
+
+    def matieres_non_valides(self, etudiant_id):
+        return [ligne for ligne in self.lignes(etudiant_id) if ligne["moyenne_brute"] < 10]
+
+    def moyenne_generale(self, etudiant_id, lignes=None):
+        if lignes is None:
+            lignes = self.lignes(etudiant_id)
+        total_ponderee = 0
+        total_coef = 0
+        for ligne in lignes:
+            total_ponderee += ligne["moyenne_ponderee"]
+            total_coef += ligne["coefficient"]
+        if total_coef == 0:
+            return None
+        return round(total_ponderee / total_coef, 2)
+
+    def bulletin(self, etudiant):
+        lignes = self.lignes(etudiant.pk)
+        return {
+            "etudiant": etudiant.nom_prenom,
+            "classe": self.classe.nom,
+            "matieres": lignes,
+            "moyenne_generale": self.moyenne_generale(etudiant.pk, lignes),
+        }
+
+    # Calculs pour toute la classe
+
+    def moyennes_generales(self, etudiant_ids=None):
+        """Retourne {etudiant_id: moyenne_generale} pour toute la classe."""
+        if etudiant_ids is None:
+            etudiant_ids = self.etudiant_ids()
+        return {etudiant_id: self.moyenne_generale(etudiant_id) for etudiant_id in etudiant_ids}
@@ -0,0 +1,100 @@
+"""
+Liste paginée des étudiants.
+
+Pagination par curseur (keyset) sur (nom_prenom, id) : chaque page reprend
+après le dernier étudiant de la précédente, sans OFFSET, et reste stable si
+des étudiants sont ajoutés entre deux appels. Seuls les champs demandés sont
+lus (`.values()`), les jointures n'étant faites que si un champ de la classe
+est demandé.
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+from parametre.models import Etudiant
+
+
+# Champ exposé -> chemin ORM
+CHAMPS = {
+    "id": "id",
+    "matricule": "matricule",
+    "nom_prenom": "nom_prenom",
+    "classe": "classe_id",
+    "classe_nom": "classe__nom",
+    "filiere": "classe__filiere__nom",
+    "niveau": "classe__niveau",
+    "date_naissance": "date_naissance",
+    "lieu_naissance": "lieu_naissance",
+    "photo": "photo",
+    "actif": "actif",
+    "annee_scolaire": "annee_scolaire",
+}
+CHAMPS_DEFAUT = ["id", "matricule", "nom_prenom", "classe", "photo"]
+
+LIMITE_DEFAUT = 50
+LIMITE_MAX = 200
+
+
+def encoder_curseur(nom_prenom, etudiant_id):
+    return base64.urlsafe_b64encode(json.dumps([nom_prenom, etudiant_id]).encode()).decode()
+
+
+def decoder_curseur(curseur):
+    """Retourne (nom_prenom, id) ; lève ValueError si le curseur est invalide."""
+    try:
+        nom_prenom, etudiant_id = json.loads(base64.urlsafe_b64decode(curseur.encode()))
+    except Exception:
+        raise ValueError("Curseur invalide")
+    if not isinstance(nom_prenom, str) or not isinstance(etudiant_id, int):
+        raise ValueError("Curseur invalide")
+    return nom_prenom, etudiant_id
+
+
+def champs_demandes(fields):
+    """Liste des champs à partir du paramètre `fields` (séparés par des virgules)."""
+    if not fields:
+        return list(CHAMPS_DEFAUT)
+    champs = [champ.strip() for champ in fields.split(",") if champ.strip()]
+    inconnus = [champ for champ in champs if champ not in CHAMPS]
+    if inconnus:
+        raise ValueError(f"Champs inconnus : {', '.join(inconnus)}")
+    return champs
+
+
+def page_etudiants(champs, curseur=None, limite=LIMITE_DEFAUT, classe=None, filiere=None,
+                   niveau=None, actif=None, annee_scolaire=None):
+    """
+    Retourne (lignes, curseur_suivant). Les lignes sont des dictionnaires
+    {champ: valeur} ; curseur_suivant vaut None sur la dernière page.
+    """
+    limite = max(1, min(limite, LIMITE_MAX))
+    queryset = Etudiant.objects.all()
+
+    if classe is not None:
+        queryset = queryset.filter(classe_id=classe)
+    if filiere is not None:
+        queryset = queryset.filter(classe__filiere_id=filiere)
+    if niveau:
+        queryset = queryset.filter(classe__niveau=niveau)
+    if actif is not None:
+        queryset = queryset.filter(actif=actif)
+    if annee_scolaire:
+        queryset = queryset.filter(annee_scolaire=annee_scolaire)
+
+    if curseur:
+        nom_prenom, etudiant_id = decoder_curseur(curseur)
+        queryset = queryset.filter(
+            Q(nom_prenom__gt=nom_prenom) | Q(nom_prenom=nom_prenom, id__gt=etudiant_id)
+        )
+
+    # La clé du curseur est toujours lue, même si elle n'est pas demandée
+    chemins = {CHAMPS[champ] for champ in champs} | {"nom_prenom", "id"}
+    lignes = list(queryset.order_by("nom_prenom", "id").values(*chemins)[:limite + 1])
+
+    curseur_suivant = None
+    if len(lignes) > limite:
+        lignes = lignes[:limite]
+        curseur_suivant = encoder_curseur(lignes[-1]["nom_prenom"], lignes[-1]["id"])
+
+    return [{champ: ligne[CHAMPS[champ]] for champ in champs} for ligne in lignes], curseur_suivant
@@ -0,0 +1,65 @@
+# signals.py
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from .models import Classe, Etudiant, Filiere, Matiere, SemestreExamen
+from . import cache_api
+from .versions import toucher_etudiants
+from saisie_notes.models import NoteDevoir, NoteExamen
+
+
+@receiver(post_save, sender=Classe)
+@receiver(post_delete, sender=Classe)
+@receiver(post_save, sender=Matiere)
+@receiver(post_delete, sender=Matiere)
+@receiver(post_save, sender=Filiere)
+@receiver(post_delete, sender=Filiere)
+@receiver(post_save, sender=SemestreExamen)
+@receiver(post_delete, sender=SemestreExamen)
+@receiver(post_save, sender=Etudiant)
+@receiver(post_delete, sender=Etudiant)
+def invalider_reponses_api(sender, **kwargs):
+    cache_api.invalider(sender)
+
+
+# Versions des étudiants (GET conditionnels, voir versions.py)
+
+@receiver(post_save, sender=Etudiant)
+def version_etudiant(sender, instance, **kwargs):
+    toucher_etudiants(pk=instance.pk)
+
+
+@receiver(post_save, sender=Classe)
+def version_etudiants_classe(sender, instance, created, **kwargs):
+    if not created:
+        toucher_etudiants(classe=instance)
+
+
+@receiver(post_save, sender=Matiere)
+@receiver(post_delete, sender=Matiere)
+def version_etudiants_matiere(sender, instance, **kwargs):
+    toucher_etudiants(classe_id=instance.classe_id)
+
+
+def _etudiants_notes_session(session_id):
+    """Étudiants ayant au moins une note (devoir ou examen) dans la session."""
+    return set(NoteDevoir.objects.filter(devoir__session_id=session_id).values_list('etudiant_id', flat=True)) | set(
+        NoteExamen.objects.filter(examen__session_id=session_id).values_list('etudiant_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=SemestreExamen)
+def version_etudiants_session(sender, instance, created, **kwargs):
+    # Seuls les étudiants notés dans la session en dépendent
+    if not created:
+        toucher_etudiants(pk__in=_etudiants_notes_session(instance.pk))
+
+
+@receiver(pre_delete, sender=SemestreExamen)
+def memoriser_etudiants_session(sender, instance, **kwargs):
+    # Les notes sont supprimées en cascade avant post_delete
+    instance._etudiants_notes = _etudiants_notes_session(instance.pk)
+
+
+@receiver(post_delete, sender=SemestreExamen)
+def version_etudiants_session_supprimee(sender, instance, **kwargs):
+    toucher_etudiants(pk__in=getattr(instance, '_etudiants_notes', ()))
@@ -0,0 +1,92 @@
+import numpy as np
+
+from parametre.moteur_notes import POIDS_DEVOIR, POIDS_EXAMEN
+
+
+# Seuils des mentions (moyenne générale minimale), du plus bas au plus haut
+SEUILS_MENTIONS = [10, 12, 14, 16]
+MENTIONS = ["Échec", "Passable", "Assez Bien", "Bien", "Très Bien"]
+PERCENTILES = [25, 50, 75, 90]
+
+
+def _remplir(matrice, notes, index_etudiants, index_matieres):
+    cellules = [
+        (index_etudiants[etudiant_id], index_matieres[matiere_id], note)
+        for (etudiant_id, matiere_id), note in notes.items()
+        if etudiant_id in index_etudiants
+    ]
+    if cellules:
+        lignes, colonnes, valeurs = zip(*cellules)
+        matrice[list(lignes), list(colonnes)] = valeurs
+
+
+def matrices_notes(moteur, etudiant_ids):
+    """
+    Pivote les notes chargées par un MoteurNotes en deux matrices
+    étudiant × matière (devoirs, examens). Une note absente vaut NaN.
+    Retourne aussi le vecteur des coefficients des matières.
+    """
+    index_etudiants = {etudiant_id: i for i, etudiant_id in enumerate(etudiant_ids)}
+    index_matieres = {matiere.pk: j for j, matiere in enumerate(moteur.matieres)}
+    forme = (len(etudiant_ids), len(moteur.matieres))
+
+    devoirs = np.full(forme, np.nan)
+    examens = np.full(forme, np.nan)
+    _remplir(devoirs, moteur.notes_devoir, index_etudiants, index_matieres)
+    _remplir(examens, moteur.notes_examen, index_etudiants, index_matieres)
+
+    coefficients = np.array([matiere.coefficient for matiere in moteur.matieres], dtype=float)
+    return devoirs, examens, coefficients
+
+
+def moyennes_generales(devoirs, examens, coefficients):
+    """
+    Moyennes générales de tous les étudiants en une seule passe.
+    Seules les matières ayant les deux notes comptent, comme dans
+    Etudiant.moyenne_generale. NaN si l'étudiant n'a aucune matière complète.
+    """
+    brutes = (devoirs * POIDS_DEVOIR) + (examens * POIDS_EXAMEN)
+    ponderees = np.round(brutes * coefficients, 2)
+    completes = ~np.isnan(ponderees)
+
+    total_ponderee = np.where(completes, ponderees, 0).sum(axis=1)
+    total_coef = np.where(completes, coefficients, 0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.round(total_ponderee / total_coef, 2)
+
+
+def statistiques_moyennes(moyennes):
+    """
+    Statistiques d'une classe à partir du vecteur des moyennes générales
+    (les moyennes manquantes comptent pour 0).
+    """
+    moyennes = np.nan_to_num(np.asarray(moyennes, dtype=float), nan=0.0)
+    if moyennes.size == 0:
+        return {
+            "moyenne_classe": 0,
+            "note_max": 0,
+            "note_min": 0,
+            "nombre_admis": 0,
+            "taux_reussite": 0,
+            "repartition_mentions": {},
+            "percentiles": {},
+        }
+
+    histogramme = np.bincount(np.digitize(moyennes, SEUILS_MENTIONS), minlength=len(MENTIONS))
+    nombre_admis = int((moyennes >= 10).sum())
+    valeurs_percentiles = np.percentile(moyennes, PERCENTILES)
+
+    return {
+        "moyenne_classe": round(float(moyennes.mean()), 2),
+        "note_max": float(moyennes.max()),
+        "note_min": float(moyennes.min()),
+        "nombre_admis": nombre_admis,
+        "taux_reussite": round(nombre_admis / moyennes.size * 100, 2),
+        # Du meilleur au moins bon, comme l'ancien calcul
+        "repartition_mentions": {
+            mention: int(histogramme[i]) for i, mention in reversed(list(enumerate(MENTIONS)))
+        },
+        "percentiles": {
+            f"p{p}": round(float(valeur), 2) for p, valeur in zip(PERCENTILES, valeurs_percentiles)
+        },
+    }
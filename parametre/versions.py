@@ -0,0 +1,51 @@
+"""
+Version des ressources d'un étudiant (GET conditionnels).
+
+Etudiant.version et Etudiant.date_maj changent à chaque écriture sur le
+profil, les notes ou les frais de l'étudiant, ainsi que sur sa classe, ses
+matières ou les sessions (voir les signals.py de parametre, saisie_notes et
+finances). Les routes décorées par `ressource_etudiant` en tirent un ETag et
+un Last-Modified : si le client est à jour, une seule lecture indexée (par
+matricule) suffit pour répondre 304.
+"""
+from functools import wraps
+
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Etudiant
+
+
+def toucher_etudiants(**filtre):
+    """Change la version des étudiants correspondant au filtre (une requête, sans signaux)."""
+    Etudiant.objects.filter(**filtre).update(version=F('version') + 1, date_maj=timezone.now())
+
+
+def ressource_etudiant(vue):
+    """
+    Décorateur de vue (à appliquer via ninja.decorators.decorate_view) pour
+    les routes GET ayant un paramètre `matricule`.
+    """
+    @wraps(vue)
+    def enveloppe(request, *args, **kwargs):
+        if request.method != "GET":
+            return vue(request, *args, **kwargs)
+
+        ligne = Etudiant.objects.filter(matricule=kwargs.get('matricule')).values_list('version', 'date_maj').first()
+        if ligne is None:
+            return vue(request, *args, **kwargs)
+
+        etag = f'"v{ligne[0]}"'
+        last_modified = int(ligne[1].timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = vue(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    return enveloppe
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import NoteDevoir, NoteExamen
+from .models import AvancementSaisie, NoteDevoir, NoteExamen
 from parametre.models import Etudiant
 from unfold.admin import ModelAdmin
 from examen_devoir.models import Devoir, Examen
@@ -36,4 +36,17 @@ class NoteDevoirAdmin(ModelAdmin):
 
 
     # list_filter_submit = True  # Submit button at the bottom of the filter
-   
\ No newline at end of file
+
+
+
+
+@admin.register(AvancementSaisie)
+class AvancementSaisieAdmin(ModelAdmin):
+    list_display = ('matiere', 'type_evaluation', 'session', 'notes_saisies', 'etudiants_actifs', 'date_maj')
+    list_filter = ('session', 'type_evaluation', 'matiere__classe')
+    search_fields = ('matiere__nom',)
+    list_select_related = ('matiere', 'session')
+    readonly_fields = ('type_evaluation', 'evaluation_id', 'matiere', 'session', 'notes_saisies', 'etudiants_actifs', 'date_maj')
+
+    def has_add_permission(self, request):
+        return False
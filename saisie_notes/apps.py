@@ -6,3 +6,6 @@ class SaisieNotesConfig(AppConfig):
     name = 'saisie_notes'
     verbose_name = "SAISIE DES NOTES (Saisissez les notes des étudiants)"
     verbose_name_plural = "SAISIE DES NOTES (Saisissez les notes des étudiants)"
+
+    def ready(self):
+        import saisie_notes.signals
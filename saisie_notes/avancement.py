@@ -0,0 +1,174 @@
+"""
+Avancement de la saisie des notes d'une classe.
+
+Les compteurs (évaluations, notes saisies, étudiants actifs) sont calculés
+par des sous-requêtes Count dans la requête qui liste les matières ou les
+évaluations : une seule requête, quel que soit le nombre de matières.
+
+Les compteurs par évaluation sont en outre conservés dans AvancementSaisie,
+recalculés (une requête + un upsert par lot) à chaque écriture de notes,
+création d'évaluation ou changement d'effectif (voir signals.py).
+"""
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from parametre.models import Etudiant, Matiere
+from examen_devoir.models import Devoir, Examen
+from .models import MODELES_NOTES, AvancementSaisie, NoteDevoir, NoteExamen
+
+
+def _compte(queryset, cle):
+    """Sous-requête : nombre de lignes de `queryset` groupées sur `cle`."""
+    return Coalesce(
+        Subquery(queryset.order_by().values(cle).annotate(n=Count('pk')).values('n')[:1], output_field=IntegerField()),
+        Value(0),
+    )
+
+
+def _pourcentage(saisies, attendues):
+    return round(saisies / attendues * 100, 2) if attendues else 0
+
+
+def _etudiants_actifs(classe_ref):
+    return _compte(Etudiant.objects.filter(classe_id=OuterRef(classe_ref), actif=True), 'classe_id')
+
+
+def matieres_classe(classe_id):
+    """
+    Matières de la classe avec, pour chacune : devoirs_existants,
+    examens_existants, notes_devoirs, notes_examens (notes des étudiants
+    actifs de la classe), etudiants_actifs, notes_attendues et
+    pourcentage_completion.
+    """
+    matieres = Matiere.objects.filter(classe_id=classe_id).annotate(
+        devoirs_existants=_compte(Devoir.objects.filter(matiere=OuterRef('pk')), 'matiere_id'),
+        examens_existants=_compte(Examen.objects.filter(matiere=OuterRef('pk')), 'matiere_id'),
+        notes_devoirs=_compte(
+            NoteDevoir.objects.filter(
+                devoir__matiere=OuterRef('pk'), etudiant__actif=True, etudiant__classe_id=OuterRef('classe_id')
+            ), 'devoir__matiere_id'
+        ),
+        notes_examens=_compte(
+            NoteExamen.objects.filter(
+                examen__matiere=OuterRef('pk'), etudiant__actif=True, etudiant__classe_id=OuterRef('classe_id')
+            ), 'examen__matiere_id'
+        ),
+        etudiants_actifs=_etudiants_actifs('classe_id'),
+    )
+
+    lignes = []
+    for matiere in matieres:
+        attendues = matiere.etudiants_actifs * (matiere.devoirs_existants + matiere.examens_existants)
+        saisies = matiere.notes_devoirs + matiere.notes_examens
+        lignes.append({
+            "id": matiere.pk,
+            "nom": matiere.nom,
+            "abreviation": matiere.abreviation,
+            "coefficient": matiere.coefficient,
+            "devoirs_existants": matiere.devoirs_existants,
+            "examens_existants": matiere.examens_existants,
+            "etudiants_actifs": matiere.etudiants_actifs,
+            "notes_devoirs": matiere.notes_devoirs,
+            "notes_examens": matiere.notes_examens,
+            "notes_attendues": attendues,
+            "pourcentage_completion": _pourcentage(saisies, attendues),
+        })
+    return lignes
+
+
+def evaluations_classe(type_evaluation, classe_id):
+    """
+    Devoirs ou examens de la classe (avec matière et session) annotés de
+    notes_saisies (étudiants actifs de la classe) et etudiants_actifs.
+    """
+    modele_note, modele, champ = MODELES_NOTES[type_evaluation]
+    return (
+        modele.objects
+        .filter(matiere__classe_id=classe_id)
+        .select_related('matiere', 'session')
+        .annotate(
+            notes_saisies=_compte(
+                modele_note.objects.filter(
+                    **{champ: OuterRef('pk')}, etudiant__actif=True, etudiant__classe_id=OuterRef('matiere__classe_id')
+                ), f"{champ}_id"
+            ),
+            etudiants_actifs=_etudiants_actifs('matiere__classe_id'),
+        )
+    )
+
+
+def pourcentage_completion(evaluation):
+    """Pourcentage de notes saisies d'une évaluation annotée par evaluations_classe."""
+    return _pourcentage(evaluation.notes_saisies, evaluation.etudiants_actifs)
+
+
+def recalculer(type_evaluation, evaluation_ids):
+    """Recalcule les compteurs AvancementSaisie des évaluations données."""
+    if not evaluation_ids:
+        return
+    modele_note, modele, champ = MODELES_NOTES[type_evaluation]
+    evaluations = modele.objects.filter(pk__in=evaluation_ids).annotate(
+        notes_saisies=_compte(
+            modele_note.objects.filter(
+                **{champ: OuterRef('pk')}, etudiant__actif=True, etudiant__classe_id=OuterRef('matiere__classe_id')
+            ), f"{champ}_id"
+        ),
+        etudiants_actifs=_etudiants_actifs('matiere__classe_id'),
+    )
+    AvancementSaisie.objects.bulk_create(
+        [
+            AvancementSaisie(
+                type_evaluation=type_evaluation,
+                evaluation_id=evaluation.pk,
+                matiere_id=evaluation.matiere_id,
+                session_id=evaluation.session_id,
+                notes_saisies=evaluation.notes_saisies,
+                etudiants_actifs=evaluation.etudiants_actifs,
+            )
+            for evaluation in evaluations
+        ],
+        update_conflicts=True,
+        unique_fields=['type_evaluation', 'evaluation_id'],
+        update_fields=['matiere', 'session', 'notes_saisies', 'etudiants_actifs', 'date_maj'],
+    )
+
+
+def recalculer_classes(classe_ids):
+    """Recalcule toutes les évaluations des classes (changement d'effectif)."""
+    for type_evaluation, (_, modele, _) in MODELES_NOTES.items():
+        recalculer(type_evaluation, list(
+            modele.objects.filter(matiere__classe_id__in=classe_ids).values_list('pk', flat=True)
+        ))
+
+
+def avancement_evaluation(type_evaluation, evaluation_id):
+    """AvancementSaisie d'une évaluation (avec sa matière), créé au besoin ; None si elle n'existe pas."""
+    filtre = {'type_evaluation': type_evaluation, 'evaluation_id': evaluation_id}
+    suivis = AvancementSaisie.objects.select_related('matiere').filter(**filtre)
+    suivi = suivis.first()
+    if suivi is None:
+        recalculer(type_evaluation, [evaluation_id])
+        suivi = suivis.first()
+    return suivi
+
+
+def avancement_session(session_id, classe_id=None):
+    """
+    AvancementSaisie de toutes les évaluations d'une session (d'une classe),
+    avec matière et classe. Les évaluations antérieures au suivi sont
+    calculées au premier appel.
+    """
+    suivis = AvancementSaisie.objects.filter(session_id=session_id)
+    if classe_id:
+        suivis = suivis.filter(matiere__classe_id=classe_id)
+
+    connus = set(suivis.values_list('type_evaluation', 'evaluation_id'))
+    for type_evaluation, (_, modele, _) in MODELES_NOTES.items():
+        evaluations = modele.objects.filter(session_id=session_id)
+        if classe_id:
+            evaluations = evaluations.filter(matiere__classe_id=classe_id)
+        recalculer(type_evaluation, [
+            pk for pk in evaluations.values_list('pk', flat=True) if (type_evaluation, pk) not in connus
+        ])
+
+    return suivis.select_related('matiere__classe').order_by('matiere__classe__nom', 'matiere__nom', 'type_evaluation')
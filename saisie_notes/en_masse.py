@@ -0,0 +1,154 @@
+"""
+Écriture de notes en masse.
+
+Les lignes existantes sont chargées en une requête, les conflits (étudiant ou
+note inconnus, doublon sur unique_together) sont détectés en mémoire, puis
+les notes valides sont écrites par lots (bulk_create / bulk_update, taille
+NOTES_TAILLE_LOT) dans une seule transaction. Une note créée entre-temps par
+une autre requête est signalée comme doublon, comme celles vues en mémoire. Les écritures en masse ne
+déclenchant pas post_save, les abonnés (résultats, caches) sont prévenus par
+notes_modifiees.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from parametre.models import Etudiant
+from .models import MODELES_NOTES
+from .signals import envoyer_notes_modifiees
+
+
+# type_evaluation -> (modèle de note, modèle d'évaluation, champ de l'évaluation)
+MODELES = MODELES_NOTES
+
+TAILLE_LOT = 500
+
+CONFLIT_EVALUATION = "Évaluation inconnue"
+CONFLIT_ETUDIANT = "Étudiant inconnu"
+CONFLIT_DOUBLON = "Une note existe déjà pour cet étudiant et cette évaluation"
+CONFLIT_NOTE = "Note inconnue"
+
+
+def taille_lot():
+    return getattr(settings, 'NOTES_TAILLE_LOT', TAILLE_LOT)
+
+
+def evaluation(type_evaluation, evaluation_id):
+    """Retourne le Devoir / Examen (avec sa matière) ou None."""
+    _, modele, _ = MODELES[type_evaluation]
+    return modele.objects.select_related('matiere').filter(pk=evaluation_id).first()
+
+
+def enregistrer_notes(type_evaluation, evaluation_id, notes):
+    """
+    Crée ou met à jour les notes {etudiant_id: note} d'une évaluation.
+    Retourne l'ensemble des etudiant_id dont la note a été créée.
+    """
+    modele, _, champ = MODELES[type_evaluation]
+    if not notes:
+        return set()
+
+    with transaction.atomic():
+        existantes = set(
+            modele.objects
+            .filter(**{f"{champ}_id": evaluation_id}, etudiant_id__in=notes.keys())
+            .values_list('etudiant_id', flat=True)
+        )
+        modele.objects.bulk_create(
+            [
+                modele(**{f"{champ}_id": evaluation_id}, etudiant_id=etudiant_id, note=note)
+                for etudiant_id, note in notes.items()
+            ],
+            batch_size=taille_lot(),
+            update_conflicts=True,
+            unique_fields=[champ, 'etudiant'],
+            update_fields=['note'],
+        )
+        envoyer_notes_modifiees(modele, evaluation_id, notes.keys())
+
+    return set(notes) - existantes
+
+
+def creer_notes(type_evaluation, evaluation_id, entrees):
+    """
+    Crée les notes [(etudiant_id, note), ...] d'une évaluation.
+    Retourne (notes_creees, conflits) : les notes créées dans l'ordre des
+    entrées et la liste des (entree, message) refusées.
+    """
+    modele, modele_evaluation, champ = MODELES[type_evaluation]
+    if not modele_evaluation.objects.filter(pk=evaluation_id).exists():
+        return [], [(entree, CONFLIT_EVALUATION) for entree in entrees]
+
+    etudiant_ids = {etudiant_id for etudiant_id, _ in entrees}
+    connus = set(Etudiant.objects.filter(pk__in=etudiant_ids).values_list('id', flat=True))
+
+    def notes_existantes():
+        return set(
+            modele.objects
+            .filter(**{f"{champ}_id": evaluation_id}, etudiant_id__in=etudiant_ids)
+            .values_list('etudiant_id', flat=True)
+        )
+
+    deja_notes = notes_existantes()
+    a_creer, conflits = [], []
+    for entree in entrees:
+        etudiant_id, note = entree
+        if etudiant_id not in connus:
+            conflits.append((entree, CONFLIT_ETUDIANT))
+        elif etudiant_id in deja_notes:
+            conflits.append((entree, CONFLIT_DOUBLON))
+        else:
+            deja_notes.add(etudiant_id)
+            a_creer.append((entree, modele(**{f"{champ}_id": evaluation_id}, etudiant_id=etudiant_id, note=note)))
+
+    while a_creer:
+        notes = [note for _, note in a_creer]
+        try:
+            with transaction.atomic():
+                modele.objects.bulk_create(notes, batch_size=taille_lot())
+                envoyer_notes_modifiees(modele, evaluation_id, [note.etudiant_id for note in notes])
+            break
+        except IntegrityError:
+            # Notes insérées par une requête concurrente : doublons, on réessaie sans elles
+            concurrentes = notes_existantes()
+            if not any(note.etudiant_id in concurrentes for note in notes):
+                raise
+            conflits.extend((entree, CONFLIT_DOUBLON) for entree, note in a_creer if note.etudiant_id in concurrentes)
+            a_creer = [(entree, note) for entree, note in a_creer if note.etudiant_id not in concurrentes]
+            for note in notes:
+                note.pk = None
+
+    return [note for _, note in a_creer], conflits
+
+
+def modifier_notes(type_evaluation, entrees):
+    """
+    Met à jour les notes [(note_id, note), ...].
+    Retourne (notes_modifiees, conflits) comme creer_notes.
+    """
+    modele, _, champ = MODELES[type_evaluation]
+    existantes = modele.objects.in_bulk({note_id for note_id, _ in entrees})
+
+    modifiees, conflits = [], []
+    for entree in entrees:
+        note_id, valeur = entree
+        note = existantes.get(note_id)
+        if note is None:
+            conflits.append((entree, CONFLIT_NOTE))
+        else:
+            note.note = valeur
+            modifiees.append(note)
+
+    if modifiees:
+        par_evaluation = defaultdict(set)
+        for note in modifiees:
+            par_evaluation[getattr(note, f"{champ}_id")].add(note.etudiant_id)
+
+        with transaction.atomic():
+            # Une même note citée deux fois n'est écrite qu'une fois (dernière valeur)
+            modele.objects.bulk_update(list({note.pk: note for note in modifiees}.values()), ['note'], batch_size=taille_lot())
+            for evaluation_id, etudiant_ids in par_evaluation.items():
+                envoyer_notes_modifiees(modele, evaluation_id, etudiant_ids)
+
+    return modifiees, conflits
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 16:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parametre', '0009_etudiant_version_date_maj'),
+        ('saisie_notes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvancementSaisie',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_evaluation', models.CharField(choices=[('devoir', 'Devoir'), ('examen', 'Examen')], max_length=10)),
+                ('evaluation_id', models.PositiveIntegerField()),
+                ('notes_saisies', models.PositiveIntegerField(default=0, help_text='Notes des étudiants actifs')),
+                ('etudiants_actifs', models.PositiveIntegerField(default=0)),
+                ('date_maj', models.DateTimeField(auto_now=True)),
+                ('matiere', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='parametre.matiere')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='parametre.semestreexamen')),
+            ],
+            options={
+                'verbose_name': 'AVANCEMENT DE LA SAISIE (CALCULÉ)',
+                'verbose_name_plural': 'AVANCEMENT DE LA SAISIE (CALCULÉ)',
+                'unique_together': {('type_evaluation', 'evaluation_id')},
+            },
+        ),
+    ]
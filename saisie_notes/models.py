@@ -1,5 +1,5 @@
 from django.db import models
-from parametre.models import  Etudiant
+from parametre.models import  Etudiant, Matiere, SemestreExamen
 from examen_devoir.models import Devoir, Examen
 
 
@@ -31,4 +31,48 @@ class NoteExamen(models.Model):
 
     def __str__(self):
         return f"{self.etudiant.nom_prenom} - {self.examen.matiere.nom} : {self.note}"
-    
\ No newline at end of file
+    
+
+
+class AvancementSaisie(models.Model):
+    """
+    Avancement de la saisie des notes d'une évaluation (devoir ou examen).
+    Tenu à jour par les signaux de saisie des notes (voir avancement.py).
+    """
+    TYPE_CHOICES = (
+        ('devoir', 'Devoir'),
+        ('examen', 'Examen'),
+    )
+    type_evaluation = models.CharField(max_length=10, choices=TYPE_CHOICES)
+    evaluation_id = models.PositiveIntegerField()
+    matiere = models.ForeignKey(Matiere, on_delete=models.CASCADE)
+    session = models.ForeignKey(SemestreExamen, on_delete=models.CASCADE)
+    notes_saisies = models.PositiveIntegerField(default=0, help_text="Notes des étudiants actifs")
+    etudiants_actifs = models.PositiveIntegerField(default=0)
+    date_maj = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('type_evaluation', 'evaluation_id')
+        verbose_name = "AVANCEMENT DE LA SAISIE (CALCULÉ)"
+        verbose_name_plural = "AVANCEMENT DE LA SAISIE (CALCULÉ)"
+
+    def __str__(self):
+        return f"{self.type_evaluation} {self.evaluation_id} : {self.notes_saisies}/{self.etudiants_actifs}"
+
+    @property
+    def notes_manquantes(self):
+        return max(self.etudiants_actifs - self.notes_saisies, 0)
+
+    @property
+    def pourcentage_completion(self):
+        return round(self.notes_saisies / self.etudiants_actifs * 100, 2) if self.etudiants_actifs else 0
+
+    def est_complet(self):
+        return self.notes_saisies >= self.etudiants_actifs
+
+
+# type_evaluation -> (modèle de note, modèle d'évaluation, champ de l'évaluation)
+MODELES_NOTES = {
+    "devoir": (NoteDevoir, Devoir, 'devoir'),
+    "examen": (NoteExamen, Examen, 'examen'),
+}
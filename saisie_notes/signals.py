@@ -0,0 +1,120 @@
+# saisie_notes/signals.py
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver, Signal
+from examen_devoir.models import Devoir, Examen
+from parametre.models import Etudiant
+from parametre.versions import toucher_etudiants
+from .models import AvancementSaisie, NoteDevoir, NoteExamen
+from . import avancement
+
+
+# Émis après toute écriture de notes, unitaire ou en masse.
+# Arguments : matiere_id, session_id, etudiant_ids, evaluation_id
+notes_modifiees = Signal()
+
+
+def _evaluation(sender):
+    return (Devoir, 'devoir_id') if sender is NoteDevoir else (Examen, 'examen_id')
+
+
+def envoyer_notes_modifiees(sender, evaluation_id, etudiant_ids):
+    """
+    Prévient les abonnés (résultats, caches, ...) que des notes d'une
+    évaluation ont changé. Utilisé aussi par les écritures en masse, qui ne
+    déclenchent pas post_save.
+    """
+    modele, _ = _evaluation(sender)
+    cle = modele.objects.filter(pk=evaluation_id).values_list('matiere_id', 'session_id').first()
+    if cle is None:
+        return
+    notes_modifiees.send(
+        sender=sender,
+        matiere_id=cle[0],
+        session_id=cle[1],
+        etudiant_ids=set(etudiant_ids),
+        evaluation_id=evaluation_id,
+    )
+
+
+def suppression_en_cascade(origin, modeles):
+    """
+    Vrai si la suppression vient d'un objet parent (étudiant, matière,
+    classe...) qui n'est pas dans `modeles` : ses propres signaux s'en chargent.
+    """
+    if origin is None:
+        return False
+    modele = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return modele not in modeles
+
+
+@receiver(pre_save, sender=NoteDevoir)
+@receiver(pre_save, sender=NoteExamen)
+def memoriser_cle_note(sender, instance, **kwargs):
+    # Une mise à jour peut changer l'évaluation ou l'étudiant de la note
+    _, champ = _evaluation(sender)
+    instance._cle_initiale = None
+    if instance.pk:
+        instance._cle_initiale = sender.objects.filter(pk=instance.pk).values_list(champ, 'etudiant_id').first()
+
+
+@receiver(post_save, sender=NoteDevoir)
+@receiver(post_delete, sender=NoteDevoir)
+@receiver(post_save, sender=NoteExamen)
+@receiver(post_delete, sender=NoteExamen)
+def note_modifiee(sender, instance, **kwargs):
+    if suppression_en_cascade(kwargs.get('origin'), (NoteDevoir, NoteExamen, Devoir, Examen)):
+        return
+
+    _, champ = _evaluation(sender)
+    cle = (getattr(instance, champ), instance.etudiant_id)
+    ancienne_cle = getattr(instance, '_cle_initiale', None)
+
+    envoyer_notes_modifiees(sender, cle[0], [cle[1]])
+    if ancienne_cle and ancienne_cle != cle:
+        envoyer_notes_modifiees(sender, ancienne_cle[0], [ancienne_cle[1]])
+
+
+@receiver(notes_modifiees)
+def version_etudiants_notes(sender, etudiant_ids, **kwargs):
+    toucher_etudiants(pk__in=etudiant_ids)
+
+
+# Avancement de la saisie (voir avancement.py)
+
+@receiver(notes_modifiees)
+def avancement_notes(sender, evaluation_id, **kwargs):
+    avancement.recalculer('devoir' if sender is NoteDevoir else 'examen', [evaluation_id])
+
+
+@receiver(post_save, sender=Devoir)
+@receiver(post_save, sender=Examen)
+def avancement_evaluation_creee(sender, instance, **kwargs):
+    avancement.recalculer('devoir' if sender is Devoir else 'examen', [instance.pk])
+
+
+@receiver(post_delete, sender=Devoir)
+@receiver(post_delete, sender=Examen)
+def avancement_evaluation_supprimee(sender, instance, **kwargs):
+    AvancementSaisie.objects.filter(
+        type_evaluation='devoir' if sender is Devoir else 'examen', evaluation_id=instance.pk
+    ).delete()
+
+
+@receiver(post_save, sender=Etudiant)
+def avancement_effectif(sender, instance, created, **kwargs):
+    # État avant écriture relevé par Etudiant.save
+    initial = getattr(instance, '_etat_initial', None)
+    if initial and (initial['classe_id'], initial['actif']) == (instance.classe_id, instance.actif):
+        return
+    classes = {instance.classe_id}
+    if initial:
+        classes.add(initial['classe_id'])
+    avancement.recalculer_classes(classes)
+
+
+@receiver(post_delete, sender=Etudiant)
+def avancement_etudiant_supprime(sender, instance, **kwargs):
+    if suppression_en_cascade(kwargs.get('origin'), (Etudiant,)):
+        return
+    avancement.recalculer_classes({instance.classe_id})
@@ -44,6 +44,9 @@ class ExamenApiOut(BaseModel):
     session_id: int
     session_titre: str
     coefficient: int
+    notes_saisies: int = 0
+    etudiants_actifs: int = 0
+    pourcentage_completion: float = 0
 
     class Config:
         from_attributes = True
@@ -64,6 +67,11 @@ class LogEntryOut(BaseModel):
     class Config:
         from_attributes = True
 
+# Page du journal (pagination par curseur)
+class LogEntryPageOut(BaseModel):
+    resultats: list[LogEntryOut]
+    suivant: Optional[str] = None
+
 # Schéma pour les statistiques de finances par classe
 class StatistiqueFinanceOut(BaseModel):
     classe_id: int
@@ -31,6 +31,24 @@ class ResultatEtudiantOut(BaseModel):
     class Config:
         from_attributes = True
 
+class RattrapageOut(BaseModel):
+    etudiant_id: int
+    matricule: str
+    etudiant: str
+    classe_id: int
+    classe: str
+    matiere_id: int
+    matiere: str
+    session_id: int
+    session: str
+    note_devoir: float = None
+    note_examen: float = None
+    moyenne_brute: float
+    coefficient: int
+
+    class Config:
+        from_attributes = True
+
 class ResultatEtudiantCreate(BaseModel):
     etudiant_id: int
    
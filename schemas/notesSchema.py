@@ -86,6 +86,7 @@ class NotesStatsOut(BaseModel):
     nombre_admis: int = Field(..., ge=0)
     taux_reussite: float = Field(..., ge=0, le=100, description="Pourcentage de réussite")
     repartition_mentions: Dict[str, int] = Field(..., description="Répartition par mention")
+    percentiles: Dict[str, float] = Field(default_factory=dict, description="Percentiles des moyennes (p25, p50, p75, p90)")
 
     class Config:
         from_attributes = True
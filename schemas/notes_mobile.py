@@ -1,10 +1,14 @@
 # views/notes_mobile.py
 from ninja import Router
+from ninja.decorators import decorate_view
+from ninja.errors import HttpError
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
-from parametre.models import Etudiant, Classe, Matiere
+from parametre.models import Etudiant, Classe, Matiere, Filiere
+from parametre.cache_api import reponse_en_cache
 from examen_devoir.models import Devoir, Examen, SemestreExamen
 from saisie_notes.models import NoteDevoir, NoteExamen
+from saisie_notes import avancement, en_masse
 from schemas.notesMobileSchema import (
     ClasseNotesConfigOut,
     EtudiantNoteEntryOut,
@@ -16,7 +20,7 @@ from schemas.notesMobileSchema import (
 notes_mobile_router = Router()
 
 @notes_mobile_router.get("/classe/{classe_nom}/configuration")
-def get_classe_notes_config(request, classe_nom: str, type_evaluation: str, matiere_id: int = None):
+def get_classe_notes_config(request, classe_nom: str, type_evaluation: str, matiere_id: int = None, evaluation_id: int = None):
     """
     Configuration pour la saisie de notes d'une classe.
     
@@ -24,10 +28,13 @@ def get_classe_notes_config(request, classe_nom: str, type_evaluation: str, mati
     - **classe_nom** (str) : Nom de la classe (ex: "GI-2", "INFO-1")
     - **type_evaluation** (str) : "devoir" ou "examen"  
     - **matiere_id** (int, optionnel) : ID de la matière pour filtrer
+    - **evaluation_id** (int, optionnel) : ID du devoir / de l'examen à recharger
+      (sinon, l'évaluation de la matière pour la session la plus récente)
     
     **Réponses :**
     - **200** : Configuration de saisie
-    - **404** : Classe non trouvée
+    - **400** : Type d'évaluation invalide
+    - **404** : Classe ou évaluation non trouvée
     
     **Exemple de réponse :**
     ```json
@@ -65,65 +72,49 @@ def get_classe_notes_config(request, classe_nom: str, type_evaluation: str, mati
     }
     ```
     """
+    if type_evaluation not in en_masse.MODELES:
+        raise HttpError(400, "type_evaluation doit être 'devoir' ou 'examen'")
+    modele_note, modele_evaluation, champ = en_masse.MODELES[type_evaluation]
+
     # Récupérer la classe
     classe = get_object_or_404(Classe, nom=classe_nom)
     
+    # Récupérer les sessions disponibles
+    sessions = list(SemestreExamen.objects.all().order_by('-id')[:5])  # 5 dernières sessions
+    
+    # Résoudre l'évaluation une seule fois pour toute la classe
+    evaluation = None
+    if evaluation_id:
+        evaluation = en_masse.evaluation(type_evaluation, evaluation_id)
+        if evaluation is None or evaluation.matiere.classe_id != classe.pk:
+            raise HttpError(404, "Évaluation non trouvée pour cette classe")
+        matiere_id = evaluation.matiere_id
+    elif matiere_id and sessions:
+        evaluation = modele_evaluation.objects.filter(matiere_id=matiere_id, session=sessions[0]).first()
+    
     # Récupérer les matières de la classe
     matieres_query = Matiere.objects.filter(classe=classe)
     if matiere_id:
         matieres_query = matieres_query.filter(id=matiere_id)
     
-    # Récupérer les sessions disponibles
-    sessions = SemestreExamen.objects.all().order_by('-id')[:5]  # 5 dernières sessions
+    # Notes existantes de l'évaluation, en une requête
+    notes = {}
+    if evaluation:
+        notes = dict(modele_note.objects.filter(**{champ: evaluation}).values_list('etudiant_id', 'note'))
     
     # Récupérer les étudiants actifs de la classe
-    etudiants = Etudiant.objects.filter(classe=classe, actif=True).order_by('nom_prenom')
+    etudiants = Etudiant.objects.filter(classe=classe, actif=True).order_by('nom_prenom').only('id', 'matricule', 'nom_prenom')
     
-    # Pour chaque étudiant, vérifier s'il a déjà une note
-    etudiants_data = []
-    for etudiant in etudiants:
-        note_existante = None
-        evaluation_id = None
-        
-        if matiere_id and sessions.exists():
-            # Chercher une évaluation existante
-            session_actuelle = sessions.first()
-            
-            if type_evaluation == "devoir":
-                devoir = Devoir.objects.filter(
-                    matiere_id=matiere_id, 
-                    session=session_actuelle
-                ).first()
-                if devoir:
-                    evaluation_id = devoir.id
-                    note_obj = NoteDevoir.objects.filter(
-                        devoir=devoir, 
-                        etudiant=etudiant
-                    ).first()
-                    if note_obj:
-                        note_existante = float(note_obj.note)
-            
-            elif type_evaluation == "examen":
-                examen = Examen.objects.filter(
-                    matiere_id=matiere_id, 
-                    session=session_actuelle
-                ).first()
-                if examen:
-                    evaluation_id = examen.id
-                    note_obj = NoteExamen.objects.filter(
-                        examen=examen, 
-                        etudiant=etudiant
-                    ).first()
-                    if note_obj:
-                        note_existante = float(note_obj.note)
-        
-        etudiants_data.append({
+    etudiants_data = [
+        {
             "id": etudiant.pk,
             "matricule": etudiant.matricule,
             "nom_prenom": etudiant.nom_prenom,
-            "note_existante": note_existante,
-            "evaluation_id": evaluation_id
-        })
+            "note_existante": float(notes[etudiant.pk]) if etudiant.pk in notes else None,
+            "evaluation_id": evaluation.pk if evaluation else None
+        }
+        for etudiant in etudiants
+    ]
     
     return {
         "classe": {
@@ -261,57 +252,67 @@ def saisie_notes_bulk_mobile(request, data: NoteBulkSaisieRequest):
     }
     ```
     """
-    notes_creees = 0
-    notes_mises_a_jour = 0
-    erreurs = 0
     details_succes = []
     details_erreurs = []
     
+    def erreur(note_data, message):
+        details_erreurs.append({
+            "etudiant_id": note_data.etudiant_id,
+            "erreur": message,
+            "note_tentee": float(note_data.note)
+        })
+    
+    # Évaluation et étudiants validés en deux requêtes pour toute la feuille
+    evaluation_obj = en_masse.evaluation(data.type_evaluation, data.evaluation_id)
+    etudiants = {
+        etudiant.id: etudiant
+        for etudiant in Etudiant.objects.filter(id__in={n.etudiant_id for n in data.notes}).only('id', 'nom_prenom', 'classe_id')
+    }
+    
+    lignes_valides = []
     for note_data in data.notes:
-        try:
-            etudiant = Etudiant.objects.get(id=note_data.etudiant_id)
-            
-            if data.type_evaluation == "devoir":
-                note_obj, created = NoteDevoir.objects.update_or_create(
-                    devoir_id=data.evaluation_id,
-                    etudiant=etudiant,
-                    defaults={'note': note_data.note}
-                )
-            else:  # examen
-                note_obj, created = NoteExamen.objects.update_or_create(
-                    examen_id=data.evaluation_id,
-                    etudiant=etudiant,
-                    defaults={'note': note_data.note}
-                )
-            
-            if created:
-                notes_creees += 1
-                action = "créée"
-            else:
-                notes_mises_a_jour += 1
-                action = "mise à jour"
-            
-            details_succes.append({
-                "etudiant_id": etudiant.id,
-                "etudiant_nom": etudiant.nom_prenom,
-                "note": float(note_data.note),
-                "action": action
-            })
-            
-        except Etudiant.DoesNotExist:
-            erreurs += 1
-            details_erreurs.append({
-                "etudiant_id": note_data.etudiant_id,
-                "erreur": "Étudiant non trouvé",
-                "note_tentee": float(note_data.note)
-            })
-        except Exception as e:
-            erreurs += 1
-            details_erreurs.append({
-                "etudiant_id": note_data.etudiant_id,
-                "erreur": str(e),
-                "note_tentee": float(note_data.note)
-            })
+        etudiant = etudiants.get(note_data.etudiant_id)
+        if evaluation_obj is None:
+            erreur(note_data, "Évaluation non trouvée")
+        elif etudiant is None:
+            erreur(note_data, "Étudiant non trouvé")
+        elif etudiant.classe_id != evaluation_obj.matiere.classe_id:
+            erreur(note_data, "L'étudiant n'appartient pas à la classe de l'évaluation")
+        else:
+            lignes_valides.append((note_data, etudiant))
+    
+    # Une seule écriture (upsert) dans une transaction ; en cas de doublon
+    # dans la feuille, la dernière note l'emporte
+    try:
+        creees = en_masse.enregistrer_notes(
+            data.type_evaluation,
+            data.evaluation_id,
+            {etudiant.id: float(note_data.note) for note_data, etudiant in lignes_valides},
+        )
+    except Exception as e:
+        for note_data, _ in lignes_valides:
+            erreur(note_data, str(e))
+        lignes_valides = []
+    
+    notes_creees = 0
+    notes_mises_a_jour = 0
+    for note_data, etudiant in lignes_valides:
+        if etudiant.id in creees:
+            creees.discard(etudiant.id)
+            notes_creees += 1
+            action = "créée"
+        else:
+            notes_mises_a_jour += 1
+            action = "mise à jour"
+        
+        details_succes.append({
+            "etudiant_id": etudiant.id,
+            "etudiant_nom": etudiant.nom_prenom,
+            "note": float(note_data.note),
+            "action": action
+        })
+    
+    erreurs = len(details_erreurs)
     
     return {
         "success": erreurs == 0,
@@ -324,13 +325,15 @@ def saisie_notes_bulk_mobile(request, data: NoteBulkSaisieRequest):
     }
 
 @notes_mobile_router.get("/verification-notes/{evaluation_id}")
-def verification_notes_saisies(request, evaluation_id: int, type_evaluation: str):
+def verification_notes_saisies(request, evaluation_id: int, type_evaluation: str, details: bool = True):
     """
     Vérifie les notes déjà saisies pour une évaluation.
     
     **Paramètres :**
     - **evaluation_id** (int) : ID de l'évaluation
     - **type_evaluation** (str) : "devoir" ou "examen"
+    - **details** (bool, optionnel) : liste des notes saisies (par défaut) ;
+      `false` ne renvoie que les compteurs
     
     **Réponses :**
     - **200** : Liste des notes saisies
@@ -348,62 +351,123 @@ def verification_notes_saisies(request, evaluation_id: int, type_evaluation: str
                 "etudiant_nom": "DUPONT Jean",
                 "matricule": "1234",
                 "note": 15.5,
-                "date_saisie": "2024-01-15T10:30:00"
+                "date_saisie": null
             }
         ],
         "total_notes": 15,
         "notes_manquantes": 10,
-        "pourcentage_completion": 60.0
+        "pourcentage_completion": 60.0,
+        "date_maj": "2024-01-15T10:30:00"
     }
     ```
     """
-    if type_evaluation == "devoir":
-        evaluation = get_object_or_404(Devoir, id=evaluation_id)
-        notes = NoteDevoir.objects.filter(devoir=evaluation).select_related('etudiant')
-        matiere_nom = evaluation.matiere.nom
-    else:
-        evaluation = get_object_or_404(Examen, id=evaluation_id)
-        notes = NoteExamen.objects.filter(examen=evaluation).select_related('etudiant')
-        matiere_nom = evaluation.matiere.nom
-    
-    # Compter le total d'étudiants dans la classe
-    if type_evaluation == "devoir":
-        total_etudiants = Etudiant.objects.filter(
-            classe=evaluation.matiere.classe, 
-            actif=True
-        ).count()
-    else:
-        total_etudiants = Etudiant.objects.filter(
-            classe=evaluation.matiere.classe, 
-            actif=True
-        ).count()
+    type_evaluation = "devoir" if type_evaluation == "devoir" else "examen"
+    modele_note, _, champ = en_masse.MODELES[type_evaluation]
     
-    notes_saisies_data = [
-        {
-            "etudiant_id": note.etudiant.id,
-            "etudiant_nom": note.etudiant.nom_prenom,
-            "matricule": note.etudiant.matricule,
-            "note": float(note.note),
-            "date_saisie": note.created_at.isoformat() if hasattr(note, 'created_at') else None
-        }
-        for note in notes
-    ]
+    # Compteurs tenus à jour à chaque saisie (voir saisie_notes/avancement.py)
+    suivi = avancement.avancement_evaluation(type_evaluation, evaluation_id)
+    if suivi is None:
+        raise HttpError(404, "Évaluation non trouvée")
     
-    total_notes_saisies = len(notes_saisies_data)
-    notes_manquantes = total_etudiants - total_notes_saisies
-    pourcentage_completion = (total_notes_saisies / total_etudiants * 100) if total_etudiants > 0 else 0
+    notes_saisies_data = []
+    if details:
+        notes_saisies_data = [
+            {
+                "etudiant_id": etudiant_id,
+                "etudiant_nom": nom_prenom,
+                "matricule": matricule,
+                "note": float(note),
+                "date_saisie": None
+            }
+            for etudiant_id, nom_prenom, matricule, note in (
+                modele_note.objects
+                .filter(**{f"{champ}_id": evaluation_id}, etudiant__actif=True)
+                .values_list('etudiant_id', 'etudiant__nom_prenom', 'etudiant__matricule', 'note')
+            )
+        ]
     
     return {
         "evaluation_id": evaluation_id,
         "type": type_evaluation,
-        "matiere": matiere_nom,
+        "matiere": suivi.matiere.nom,
         "notes_saisies": notes_saisies_data,
-        "total_notes": total_notes_saisies,
-        "notes_manquantes": notes_manquantes,
-        "pourcentage_completion": round(pourcentage_completion, 2)
+        "total_notes": suivi.notes_saisies,
+        "notes_manquantes": suivi.notes_manquantes,
+        "pourcentage_completion": suivi.pourcentage_completion,
+        "date_maj": suivi.date_maj
+    }
+
+@notes_mobile_router.get("/avancement/session/{session_id}")
+def avancement_saisie_session(request, session_id: int, classe_id: int = None, incompletes: bool = False):
+    """
+    Avancement de la saisie de toutes les évaluations d'une session.
+    
+    **Paramètres :**
+    - **session_id** (int) : ID de la session
+    - **classe_id** (int, optionnel) : limiter à une classe
+    - **incompletes** (bool, optionnel) : ne renvoyer que les évaluations incomplètes
+    
+    **Réponses :**
+    - **200** : Avancement par évaluation
+    - **404** : Session non trouvée
+    
+    **Exemple de réponse :**
+    ```json
+    {
+        "session_id": 1,
+        "evaluations": [
+            {
+                "type": "examen",
+                "evaluation_id": 3,
+                "classe_id": 1,
+                "classe": "GI-2",
+                "matiere_id": 2,
+                "matiere": "Français",
+                "notes_saisies": 20,
+                "etudiants_actifs": 25,
+                "notes_manquantes": 5,
+                "pourcentage_completion": 80.0,
+                "complet": false,
+                "date_maj": "2024-01-15T10:30:00"
+            }
+        ],
+        "total_evaluations": 12,
+        "evaluations_incompletes": 3
+    }
+    ```
+    """
+    session = get_object_or_404(SemestreExamen, id=session_id)
+    suivis = list(avancement.avancement_session(session.pk, classe_id))
+    total_evaluations = len(suivis)
+    incompletes_total = sum(1 for suivi in suivis if not suivi.est_complet())
+    if incompletes:
+        suivis = [suivi for suivi in suivis if not suivi.est_complet()]
+    
+    return {
+        "session_id": session.pk,
+        "evaluations": [
+            {
+                "type": suivi.type_evaluation,
+                "evaluation_id": suivi.evaluation_id,
+                "classe_id": suivi.matiere.classe_id,
+                "classe": suivi.matiere.classe.nom,
+                "matiere_id": suivi.matiere_id,
+                "matiere": suivi.matiere.nom,
+                "notes_saisies": suivi.notes_saisies,
+                "etudiants_actifs": suivi.etudiants_actifs,
+                "notes_manquantes": suivi.notes_manquantes,
+                "pourcentage_completion": suivi.pourcentage_completion,
+                "complet": suivi.est_complet(),
+                "date_maj": suivi.date_maj
+            }
+            for suivi in suivis
+        ],
+        "total_evaluations": total_evaluations,
+        "evaluations_incompletes": incompletes_total
     }
 
 @notes_mobile_router.get("/classes-disponibles")
+@decorate_view(reponse_en_cache(Classe, Filiere, Etudiant, Matiere))
 def get_classes_pour_saisie(request):
     """
     Récupère la liste des classes disponibles pour la saisie de notes.
@@ -473,29 +537,18 @@ def get_matieres_classe(request, classe_id: int):
             "abreviation": "FR",
             "coefficient": 2,
             "devoirs_existants": 2,
-            "examens_existants": 1
+            "examens_existants": 1,
+            "etudiants_actifs": 25,
+            "notes_devoirs": 50,
+            "notes_examens": 20,
+            "notes_attendues": 75,
+            "pourcentage_completion": 93.33
         }
     ]
     ```
     """
     classe = get_object_or_404(Classe, id=classe_id)
-    matieres = Matiere.objects.filter(classe=classe)
-    
-    result = []
-    for matiere in matieres:
-        devoirs_count = Devoir.objects.filter(matiere=matiere).count()
-        examens_count = Examen.objects.filter(matiere=matiere).count()
-        
-        result.append({
-            "id": matiere.pk,
-            "nom": matiere.nom,
-            "abreviation": matiere.abreviation,
-            "coefficient": matiere.coefficient,
-            "devoirs_existants": devoirs_count,
-            "examens_existants": examens_count
-        })
-    
-    return result
+    return avancement.matieres_classe(classe.pk)
 
 @notes_mobile_router.post("/note-individuelle")
 def saisie_note_individuelle(request, data: NoteSaisieRequest):
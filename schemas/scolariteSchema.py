@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import date
+from decimal import Decimal
 
 # Schéma utilisé pour la lecture (output) avec toutes les infos
 class MatiereOut(BaseModel):
@@ -59,4 +60,15 @@ class FilliereCreate(BaseModel):
     nom: str
 
     class Config:
-        from_attributes = True  # Important pour que Django Model fonctionne avec Pydantic
\ No newline at end of file
+        from_attributes = True  # Important pour que Django Model fonctionne avec Pydantic
+
+# Montant des frais appliqué à toute une classe (input)
+class MontantClasseIn(BaseModel):
+    # Mêmes bornes que Etudiant.montant (l'UPDATE en masse ne passe pas par la validation du modèle)
+    montant: Decimal = Field(..., ge=0, max_digits=10, decimal_places=1, description="Montant en FCFA")
+    actifs_seulement: bool = False
+
+
+class MontantClasseOut(BaseModel):
+    etudiants: int
+    frais: int
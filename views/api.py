@@ -1,21 +1,45 @@
 from ninja import Router
+from ninja.errors import HttpError
+from ninja_jwt.authentication import JWTAuth
 from django.contrib.admin.models import LogEntry
-from django.db.models import Sum, Count, Q
-from datetime import datetime
-from parametre.models import Etudiant, Classe
+from parametre.models import Etudiant
 from finances.models import FraisScolarite
-from examen_devoir.models import Devoir, Examen
+from finances.tableau_de_bord import tableau_de_bord
+from parametre import journal
+from parametre.export import lignes, reponse_export
+from saisie_notes import avancement
 from schemas.apiSchema import (
     EtudiantApiOut, 
     FinanceApiOut, 
     ExamenApiOut, 
-    LogEntryOut, 
+    LogEntryPageOut, 
     StatistiqueFinanceOut,
     StatistiqueClasseOut
 )
 
 api_router = Router()
 
+# Exports en flux : seuls montés dans l'API (/donnees/...), réservés au personnel authentifié
+export_router = Router(auth=JWTAuth())
+
+
+def _exiger_personnel(request):
+    if not request.user.is_staff:
+        raise HttpError(403, "Export réservé au personnel de l'administration")
+
+# Colonnes de l'export des finances (nom exporté -> chemin ORM)
+COLONNES_FINANCES = {
+    "id": "id",
+    "etudiant_id": "etudiant_id",
+    "etudiant_nom": "etudiant__nom_prenom",
+    "etudiant_matricule": "etudiant__matricule",
+    "classe_nom": "etudiant__classe__nom",
+    "mois": "mois",
+    "montant": "montant",
+    "date_paiement": "date_paiement",
+    "is_complet": "is_complet",
+}
+
 # 1. Récupération de la liste des étudiants (tous les étudiants)
 @api_router.get("/etudiants", response=list[EtudiantApiOut])
 def list_all_etudiants(request):
@@ -59,65 +83,93 @@ def list_finances(request):
         for frais in FraisScolarite.objects.select_related('etudiant__classe').all()
     ]
 
+# 2 bis. Export en flux des finances
+@export_router.get("/finances/export")
+def export_finances(request, format: str = "ndjson"):
+    """
+    Export en flux des frais de scolarité (mêmes champs que /finances),
+    au format "ndjson" (par défaut) ou "csv". JWT d'un membre du personnel requis.
+    """
+    _exiger_personnel(request)
+    frais = FraisScolarite.objects.order_by('pk')
+    try:
+        return reponse_export(lignes(frais, COLONNES_FINANCES), COLONNES_FINANCES, format, "finances")
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
 # 3. Récupération de la liste des examens avec paramètre type d'après une classe
 @api_router.get("/examens/classe/{classe_id}", response=list[ExamenApiOut])
 def list_examens_by_classe_type(request, classe_id: int, type: str = "examen"):
     """
-    Récupère la liste des examens ou devoirs pour une classe donnée
+    Récupère la liste des examens ou devoirs pour une classe donnée,
+    avec l'avancement de la saisie des notes (étudiants actifs)
     type: 'examen' ou 'devoir'
     """
-    if type.lower() == "devoir":
-        devoirs = Devoir.objects.filter(matiere__classe_id=classe_id).select_related('matiere', 'session')
-        return [
-            {
-                "id": devoir.pk,
-                "type": "devoir",
-                "matiere_id": devoir.matiere.id,
-                "matiere_nom": devoir.matiere.nom,
-                "classe_id": classe_id,
-                "session_id": devoir.session.id,
-                "session_titre": devoir.session.titre,
-                "coefficient": devoir.matiere.coefficient
-            }
-            for devoir in devoirs
-        ]
-    else:  # type == "examen"
-        examens = Examen.objects.filter(matiere__classe_id=classe_id).select_related('matiere', 'session')
-        return [
+    type_evaluation = "devoir" if type.lower() == "devoir" else "examen"
+    return [
+        {
+            "id": evaluation.pk,
+            "type": type_evaluation,
+            "matiere_id": evaluation.matiere.id,
+            "matiere_nom": evaluation.matiere.nom,
+            "classe_id": classe_id,
+            "session_id": evaluation.session.id,
+            "session_titre": evaluation.session.titre,
+            "coefficient": evaluation.matiere.coefficient,
+            "notes_saisies": evaluation.notes_saisies,
+            "etudiants_actifs": evaluation.etudiants_actifs,
+            "pourcentage_completion": avancement.pourcentage_completion(evaluation)
+        }
+        for evaluation in avancement.evaluations_classe(type_evaluation, classe_id)
+    ]
+
+# 4. Récupération des logs Django (paginés)
+@api_router.get("/logs", response=LogEntryPageOut)
+def list_django_logs(request, curseur: str = None, limite: int = journal.LIMITE_DEFAUT,
+                     user_id: int = None, content_type_id: int = None):
+    """
+    Récupère les logs Django de l'administration, du plus récent au plus ancien,
+    par pages (curseur `suivant` de la page précédente ; 200 au plus par page).
+    Filtres optionnels : user_id, content_type_id. L'historique complet est
+    disponible via /logs/export.
+    """
+    try:
+        logs, suivant = journal.page_journal(curseur, limite, user_id=user_id, content_type_id=content_type_id)
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
+    return {
+        "resultats": [
             {
-                "id": examen.pk,
-                "type": "examen",
-                "matiere_id": examen.matiere.id,
-                "matiere_nom": examen.matiere.nom,
-                "classe_id": classe_id,
-                "session_id": examen.session.id,
-                "session_titre": examen.session.titre,
-                "coefficient": examen.matiere.coefficient
+                "id": log.pk,
+                "action_time": log.action_time,
+                "user_id": log.user_id,
+                "user_username": log.user.username if log.user else None,
+                "content_type_id": log.content_type_id,
+                "content_type": str(log.content_type) if log.content_type else None,
+                "object_id": log.object_id,
+                "object_repr": log.object_repr,
+                "action_flag": log.action_flag,
+                "change_message": log.change_message
             }
-            for examen in examens
-        ]
+            for log in logs
+        ],
+        "suivant": suivant,
+    }
 
-# 4. Récupération de tous les logs Django
-@api_router.get("/logs", response=list[LogEntryOut])
-def list_django_logs(request):
+# 4 bis. Export en flux des logs
+@export_router.get("/logs/export")
+def export_django_logs(request, format: str = "ndjson"):
     """
-    Récupère tous les logs Django de l'administration
+    Export en flux des logs de l'administration (mêmes champs que /logs),
+    au format "ndjson" (par défaut) ou "csv". JWT d'un membre du personnel requis.
     """
-    return [
-        {
-            "id": log.pk,
-            "action_time": log.action_time,
-            "user_id": log.user_id,
-            "user_username": log.user.username if log.user else None,
-            "content_type_id": log.content_type_id,
-            "content_type": str(log.content_type) if log.content_type else None,
-            "object_id": log.object_id,
-            "object_repr": log.object_repr,
-            "action_flag": log.action_flag,
-            "change_message": log.change_message
-        }
-        for log in LogEntry.objects.select_related('user', 'content_type').order_by('-action_time')
-    ]
+    _exiger_personnel(request)
+    logs = LogEntry.objects.order_by('-action_time', '-id')
+    try:
+        return reponse_export(lignes(logs, journal.COLONNES), journal.COLONNES, format, "logs")
+    except ValueError as e:
+        raise HttpError(400, str(e))
 
 # 5. Route statistique pour récupérer les finances par classe étudiant et nombre d'étudiants par classe
 @api_router.get("/statistiques/finances", response=list[StatistiqueFinanceOut])
@@ -127,64 +179,21 @@ def statistiques_finances_par_classe(request):
     - Total payé le mois en cours pour chaque classe
     - Nombre d'étudiants par classe
     """
-    # Récupérer le mois actuel
-    mois_actuel = datetime.now().strftime('%B')  # Format: 'January', 'February', etc.
-    
-    # Mapping des mois en français (selon le tuple MOIS_CHOICES du modèle)
-    mois_mapping = {
-        'January': 'Janvier',
-        'February': 'Février',
-        'March': 'Mars',
-        'April': 'Avril',
-        'May': 'Mai',
-        'June': 'Juin',
-        'July': 'Juillet',
-        'August': 'Août',     # Note: Dans le modèle, il n'y a pas 'Août' et 'Septembre'
-        'September': 'Septembre',
-        'October': 'Octobre',
-        'November': 'Novembre',
-        'December': 'Décembre'
-    }
-    
-    mois_francais = mois_mapping.get(mois_actuel, 'Janvier')
-    
-    classes = Classe.objects.all()
-    statistiques = []
-    
-    for classe in classes:
-        # Compter le nombre d'étudiants par classe
-        nombre_etudiants = Etudiant.objects.filter(classe=classe, actif=True).count()
-        
-        # Calculer le total payé pour le mois en cours pour cette classe
-        total_paye_mois = FraisScolarite.objects.filter(
-            etudiant__classe=classe,
-            mois=mois_francais,
-            is_complet=True
-        ).aggregate(total=Sum('montant'))['total'] or 0
-        
-        # Calculer le total général pour cette classe (tous les mois)
-        total_general = FraisScolarite.objects.filter(
-            etudiant__classe=classe,
-            is_complet=True
-        ).aggregate(total=Sum('montant'))['total'] or 0
-        
-        # Nombre de paiements en attente pour cette classe
-        paiements_en_attente = FraisScolarite.objects.filter(
-            etudiant__classe=classe,
-            is_complet=False
-        ).count()
-        
-        statistiques.append({
-            "classe_id": classe.id,
-            "classe_nom": classe.nom,
-            "nombre_etudiants": nombre_etudiants,
-            "mois_actuel": mois_francais,
-            "total_paye_mois_actuel": float(total_paye_mois),
-            "total_general_paye": float(total_general),
-            "paiements_en_attente": paiements_en_attente
-        })
+    # Indicateurs de toutes les classes (deux requêtes groupées, mis en cache)
+    indicateurs = tableau_de_bord()
     
-    return statistiques
+    return [
+        {
+            "classe_id": ligne["classe_id"],
+            "classe_nom": ligne["classe_nom"],
+            "nombre_etudiants": ligne["etudiants_actifs"],
+            "mois_actuel": indicateurs["mois"],
+            "total_paye_mois_actuel": float(ligne["total_paye_mois"]),
+            "total_general_paye": float(ligne["total_paye"]),
+            "paiements_en_attente": ligne["paiements_en_attente"]
+        }
+        for ligne in indicateurs["classes"]
+    ]
 
 # 6. Route statistique additionnelle pour les classes
 @api_router.get("/statistiques/classes", response=list[StatistiqueClasseOut])
@@ -192,22 +201,21 @@ def statistiques_classes(request):
     """
     Statistiques générales par classe
     """
-    classes = Classe.objects.all()
     statistiques = []
     
-    for classe in classes:
-        nombre_etudiants_actifs = Etudiant.objects.filter(classe=classe, actif=True).count()
-        nombre_etudiants_inactifs = Etudiant.objects.filter(classe=classe, actif=False).count()
+    for ligne in tableau_de_bord()["classes"]:
+        nombre_etudiants_actifs = ligne["etudiants_actifs"]
+        nombre_etudiants_inactifs = ligne["etudiants_inactifs"]
         total_etudiants = nombre_etudiants_actifs + nombre_etudiants_inactifs
         
         # Calculer le pourcentage de présence
         pourcentage_actifs = (nombre_etudiants_actifs / total_etudiants * 100) if total_etudiants > 0 else 0
         
         statistiques.append({
-            "classe_id": classe.id,
-            "classe_nom": classe.nom,
-            "filiere_nom": classe.filiere.nom,
-            "niveau": classe.niveau,
+            "classe_id": ligne["classe_id"],
+            "classe_nom": ligne["classe_nom"],
+            "filiere_nom": ligne["filiere_nom"],
+            "niveau": ligne["niveau"],
             "total_etudiants": total_etudiants,
             "etudiants_actifs": nombre_etudiants_actifs,
             "etudiants_inactifs": nombre_etudiants_inactifs,
@@ -222,33 +230,19 @@ def statistiques_generales(request):
     """
     Statistiques générales du système
     """
-    total_etudiants = Etudiant.objects.count()
-    total_etudiants_actifs = Etudiant.objects.filter(actif=True).count()
-    total_classes = Classe.objects.count()
+    indicateurs = tableau_de_bord()
     
-    # Total des finances
-    total_revenus = FraisScolarite.objects.filter(is_complet=True).aggregate(
-        total=Sum('montant')
-    )['total'] or 0
+    total_etudiants_actifs = indicateurs["etudiants_actifs"]
+    total_etudiants = total_etudiants_actifs + indicateurs["etudiants_inactifs"]
+    total_classes = len(indicateurs["classes"])
     
-    total_en_attente = FraisScolarite.objects.filter(is_complet=False).aggregate(
-        total=Sum('montant')
-    )['total'] or 0
+    # Total des finances
+    total_revenus = indicateurs["total_paye"]
+    total_en_attente = indicateurs["total_en_attente"]
     
     # Mois actuel
-    mois_actuel = datetime.now().strftime('%B')
-    mois_mapping = {
-        'January': 'Janvier', 'February': 'Février', 'March': 'Mars',
-        'April': 'Avril', 'May': 'Mai', 'June': 'Juin',
-        'July': 'Juillet', 'October': 'Octobre', 
-        'November': 'Novembre', 'December': 'Décembre'
-    }
-    mois_francais = mois_mapping.get(mois_actuel, 'Janvier')
-    
-    revenus_mois_actuel = FraisScolarite.objects.filter(
-        mois=mois_francais,
-        is_complet=True
-    ).aggregate(total=Sum('montant'))['total'] or 0
+    mois_francais = indicateurs["mois"]
+    revenus_mois_actuel = indicateurs["total_paye_mois"]
     
     return {
         "total_etudiants": total_etudiants,
@@ -1,12 +1,16 @@
 # views/classes.py
 from ninja import Router
+from ninja.decorators import decorate_view
 from django.shortcuts import get_object_or_404
 from parametre.models import Classe, Etudiant
-from schemas.scolariteSchema import ClasseOut
+from parametre.cache_api import reponse_en_cache
+from finances.soldes import modifier_montant_classe
+from schemas.scolariteSchema import ClasseOut, MontantClasseIn, MontantClasseOut
 
 classes_router = Router()
 
 @classes_router.get("", response=list[ClasseOut])
+@decorate_view(reponse_en_cache(Classe))
 def list_classes(request):
     """
     Récupère la liste de toutes les classes.
@@ -109,4 +113,34 @@ def list_etudiants_classe(request, classe_id: int):
             "photo": request.build_absolute_uri(etudiant.photo.url) if etudiant.photo else None,
         }
         for etudiant in etudiants
-    ]
\ No newline at end of file
+    ]
+
+
+@classes_router.post("/{classe_id}/montant", response=MontantClasseOut)
+def modifier_montant(request, classe_id: int, payload: MontantClasseIn):
+    """
+    Applique un montant de frais de scolarité à tous les étudiants d'une
+    classe ; le reste à payer de leurs frais est recalculé (un UPDATE par
+    table, quel que soit l'effectif).
+
+    **Paramètres :**
+    - **classe_id** (int) : ID de la classe
+    - **montant** (décimal) : nouveau montant des frais
+    - **actifs_seulement** (bool, optionnel) : ne modifier que les étudiants actifs
+
+    **Réponses :**
+    - **200** : Nombre d'étudiants et de frais mis à jour
+    - **404** : Classe non trouvée
+    - **422** : Montant négatif, ou avec plus d'une décimale
+
+    **Exemple de réponse :**
+    ```json
+    {
+        "etudiants": 32,
+        "frais": 154
+    }
+    ```
+    """
+    classe = get_object_or_404(Classe, id=classe_id)
+    etudiants, frais = modifier_montant_classe(classe.pk, payload.montant, payload.actifs_seulement)
+    return {"etudiants": etudiants, "frais": frais}
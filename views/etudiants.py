@@ -1,8 +1,12 @@
 from django.shortcuts import get_object_or_404
 from django.db.models import Count, Q
 from ninja import Router
+from ninja.decorators import decorate_view
 from parametre.models import Etudiant, Filiere
-from gestion_des_resultats.models import ParametreResultat
+from gestion_des_resultats.resultats import bulletin, session_courante_ou_404
+from parametre import pagination
+from parametre.versions import ressource_etudiant
+from parametre.pagination import LIMITE_DEFAUT, champs_demandes
 from schemas.etudiantSchema import (
     EtudiantOut,
     EtudiantCreate,
@@ -20,13 +24,53 @@ def list_etudiants(request):
         "id" : student.pk,
         "matricule" : student.matricule,
         "nom_prenom" : student.nom_prenom,
-        "classe" : student.classe.pk,
+        "classe" : student.classe_id,
         "photo" : request.build_absolute_uri(student.photo.url) if student.photo else None,
     }
 
         for student in Etudiant.objects.all()
     ]
 
+
+@etudiant_router.get("page")
+def page_etudiants(request, curseur: str = None, limite: int = LIMITE_DEFAUT, classe: int = None,
+                   filiere: int = None, niveau: str = None, actif: bool = None,
+                   annee_scolaire: str = None, fields: str = None):
+    """
+    Liste paginée des étudiants (pagination par curseur sur nom_prenom, id).
+
+    **Paramètres de requête :**
+    - **curseur** (str, optionnel) : valeur `suivant` de la page précédente
+    - **limite** (int, optionnel) : taille de la page (50 par défaut, 200 au plus)
+    - **classe**, **filiere** (int), **niveau**, **annee_scolaire** (str), **actif** (bool) : filtres
+    - **fields** (str, optionnel) : champs à renvoyer, séparés par des virgules
+      (id, matricule, nom_prenom, classe, classe_nom, filiere, niveau,
+      date_naissance, lieu_naissance, photo, actif, annee_scolaire)
+
+    **Exemple de réponse :**
+    ```json
+    {
+        "resultats": [{"id": 1, "matricule": "1234", "nom_prenom": "DUPONT Jean"}],
+        "suivant": "WyJEVVBPTlQgSmVhbiIsIDFd"
+    }
+    ```
+    """
+    try:
+        champs = champs_demandes(fields)
+        lignes, suivant = pagination.page_etudiants(
+            champs, curseur, limite,
+            classe=classe, filiere=filiere, niveau=niveau, actif=actif, annee_scolaire=annee_scolaire,
+        )
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
+    if "photo" in champs:
+        stockage = Etudiant._meta.get_field('photo').storage
+        for ligne in lignes:
+            ligne["photo"] = request.build_absolute_uri(stockage.url(ligne["photo"])) if ligne["photo"] else None
+
+    return {"resultats": lignes, "suivant": suivant}
+
 @etudiant_router.post("", response=EtudiantOut)
 def create_etudiant(request, payload: EtudiantCreate):
     student = Etudiant(**payload.dict())
@@ -86,6 +130,7 @@ def delete_etudiant(request, etudiant_id: int):
 
 # 1. Trouver un étudiant par son matricule
 @etudiant_router.get("by-matricule/{matricule}/")
+@decorate_view(ressource_etudiant)
 def get_etudiant_by_matricule(request, matricule: str):
     student = get_object_or_404(Etudiant, matricule=matricule)
     return {
@@ -123,7 +168,7 @@ def get_resultat_etudiant(request, etudiant_matricule: int):
     etudiant = get_object_or_404(Etudiant, matricule=etudiant_matricule)
    
     if etudiant.actif:
-        result = etudiant.generer_bulletin(code_session=ParametreResultat.objects.all().first().session)
+        result = bulletin(etudiant, session_courante_ou_404())
         result.update({"photo" : request.build_absolute_uri(etudiant.photo.url) if etudiant.photo else None})
         return  result
     else:
@@ -1,14 +1,19 @@
 # views/examen.py (version améliorée avec documentation complète)
 from ninja import Router
+from ninja.errors import HttpError
+from ninja.decorators import decorate_view
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from examen_devoir.models import SemestreExamen, Devoir, Examen
 from saisie_notes.models import NoteDevoir, NoteExamen
 from parametre.models import Etudiant
 from gestion_des_resultats.models import ResultatEtudiant
+from gestion_des_resultats.resultats import rattrapages, resultats_session, resultat_session, session_courante_ou_404
+from parametre.export import lignes, reponse_export
+from parametre.cache_api import reponse_en_cache
 from schemas.examenSchema import (
     SessionExamenOut, SessionExamenCreate, SessionExamenUpdate,
-    ResultatEtudiantOut, ResultatEtudiantCreate,
+    ResultatEtudiantOut, ResultatEtudiantCreate, RattrapageOut,
     DevoirOut, DevoirCreate,
     ExamenOut, ExamenCreate,
     NoteDevoirOut, NoteDevoirCreate,
@@ -21,9 +26,36 @@ from schemas.notesSchema import (
 
 examen_route = Router()
 
+# Colonnes des exports (nom exporté -> chemin ORM)
+COLONNES_NOTES_DEVOIR = {
+    "id": "id",
+    "devoir_id": "devoir_id",
+    "devoir_matiere": "devoir__matiere__nom",
+    "devoir_session": "devoir__session__titre",
+    "etudiant_id": "etudiant_id",
+    "etudiant_nom": "etudiant__nom_prenom",
+    "etudiant_matricule": "etudiant__matricule",
+    "etudiant_classe": "etudiant__classe__nom",
+    "note": "note",
+    "coefficient": "devoir__matiere__coefficient",
+}
+COLONNES_NOTES_EXAMEN = {
+    "id": "id",
+    "examen_id": "examen_id",
+    "examen_matiere": "examen__matiere__nom",
+    "examen_session": "examen__session__titre",
+    "etudiant_id": "etudiant_id",
+    "etudiant_nom": "etudiant__nom_prenom",
+    "etudiant_matricule": "etudiant__matricule",
+    "etudiant_classe": "etudiant__classe__nom",
+    "note": "note",
+    "coefficient": "examen__matiere__coefficient",
+}
+
 # ========== GESTION DES SESSIONS D'EXAMENS ==========
 
 @examen_route.get("/setup-semestre", response=list[SessionExamenOut])
+@decorate_view(reponse_en_cache(SemestreExamen))
 def list_setup_reseultats(request):
     """
     Récupère la liste de toutes les sessions d'examens.
@@ -396,6 +428,33 @@ def list_notes_devoir(request, devoir_id: int = None, etudiant_id: int = None, c
         for note in notes
     ]
 
+@examen_route.get("/notes-devoir/export")
+def export_notes_devoir(request, format: str = "ndjson", devoir_id: int = None, etudiant_id: int = None, classe_id: int = None):
+    """
+    Export en flux des notes de devoirs (mêmes champs et filtres que /notes-devoir).
+    
+    **Paramètres de requête :**
+    - **format** (str) : "ndjson" (par défaut) ou "csv"
+    - **devoir_id**, **etudiant_id**, **classe_id** (int, optionnels) : filtres
+    
+    **Réponses :**
+    - **200** : Fichier NDJSON (une note par ligne) ou CSV, envoyé au fil de l'eau
+    - **400** : Format non supporté
+    """
+    notes = NoteDevoir.objects.order_by('pk')
+    
+    if devoir_id:
+        notes = notes.filter(devoir_id=devoir_id)
+    if etudiant_id:
+        notes = notes.filter(etudiant_id=etudiant_id)
+    if classe_id:
+        notes = notes.filter(etudiant__classe_id=classe_id)
+    
+    try:
+        return reponse_export(lignes(notes, COLONNES_NOTES_DEVOIR), COLONNES_NOTES_DEVOIR, format, "notes_devoir")
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
 @examen_route.get("/notes-devoir/etudiant/{matricule}", response=list[NoteDevoirFilterOut])
 def list_notes_devoir_etudiant(request, matricule: str):
     """
@@ -580,6 +639,33 @@ def list_notes_examen(request, examen_id: int = None, etudiant_id: int = None, c
         for note in notes
     ]
 
+@examen_route.get("/notes-examen/export")
+def export_notes_examen(request, format: str = "ndjson", examen_id: int = None, etudiant_id: int = None, classe_id: int = None):
+    """
+    Export en flux des notes d'examens (mêmes champs et filtres que /notes-examen).
+    
+    **Paramètres de requête :**
+    - **format** (str) : "ndjson" (par défaut) ou "csv"
+    - **examen_id**, **etudiant_id**, **classe_id** (int, optionnels) : filtres
+    
+    **Réponses :**
+    - **200** : Fichier NDJSON (une note par ligne) ou CSV, envoyé au fil de l'eau
+    - **400** : Format non supporté
+    """
+    notes = NoteExamen.objects.order_by('pk')
+    
+    if examen_id:
+        notes = notes.filter(examen_id=examen_id)
+    if etudiant_id:
+        notes = notes.filter(etudiant_id=etudiant_id)
+    if classe_id:
+        notes = notes.filter(etudiant__classe_id=classe_id)
+    
+    try:
+        return reponse_export(lignes(notes, COLONNES_NOTES_EXAMEN), COLONNES_NOTES_EXAMEN, format, "notes_examen")
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
 @examen_route.get("/notes-examen/etudiant/{matricule}", response=list[NoteExamenFilterOut])
 def list_notes_examen_etudiant(request, matricule: str):
     """
@@ -713,6 +799,7 @@ def list_resultats(request):
     
     **Réponse :**
     - **200** : Liste des résultats
+    - **404** : Aucune session de résultats configurée
     
     **Exemple de réponse :**
     ```json
@@ -728,15 +815,22 @@ def list_resultats(request):
     ]
     ```
     """
+    session = session_courante_ou_404()
+    resultats = list(ResultatEtudiant.objects.select_related('etudiant__classe'))
+    
+    # Moyennes lues dans les résultats pré-calculés de la session courante
+    moyennes = resultats_session([resultat.etudiant_id for resultat in resultats], session)
+    
     return [
         {
             "id": resultat.pk,
             "etudiant": resultat.etudiant.nom_prenom,
             "classe": resultat.etudiant.classe.nom,
-            "moyenne_generale": resultat.moyenne_generale,
-            "mention": resultat.mention,
+            "moyenne_generale": moyennes[resultat.etudiant_id].moyenne_generale or 0,
+            "mention": moyennes[resultat.etudiant_id].mention,
+            "photo": request.build_absolute_uri(resultat.etudiant.photo.url) if resultat.etudiant.photo else "",
         }
-        for resultat in ResultatEtudiant.objects.all()
+        for resultat in resultats
     ]
 
 @examen_route.get("/resultat/{matricule}", response=ResultatEtudiantOut)
@@ -749,7 +843,7 @@ def resultat_etudiant(request, matricule: str):
     
     **Réponses :**
     - **200** : Résultat de l'étudiant
-    - **404** : Étudiant non trouvé
+    - **404** : Étudiant non trouvé, ou aucune session de résultats configurée
     
     **Exemple de réponse :**
     ```json
@@ -766,39 +860,76 @@ def resultat_etudiant(request, matricule: str):
     etudiant = get_object_or_404(Etudiant, matricule=matricule)
     resultat = ResultatEtudiant.objects.filter(etudiant=etudiant).first()
     
-    if not resultat:
-        # Calculer la moyenne si pas de résultat enregistré
-        moyenne = etudiant.moyenne_generale() or 0
-        mention = "En cours"
-        if moyenne >= 16:
-            mention = "Très Bien"
-        elif moyenne >= 14:
-            mention = "Bien"
-        elif moyenne >= 12:
-            mention = "Assez Bien"
-        elif moyenne >= 10:
-            mention = "Passable"
-        else:
-            mention = "Échec"
-        
-        return {
-            "id": 0,
-            "etudiant": etudiant.nom_prenom,
-            "classe": etudiant.classe.nom,
-            "moyenne_generale": moyenne,
-            "mention": mention,
-            "photo": request.build_absolute_uri(etudiant.photo.url) if etudiant.photo else ""
-        }
+    # Moyenne pré-calculée pour la session courante (calculée si absente)
+    calcul = resultat_session(etudiant, session_courante_ou_404())
     
     return {
-        "id": resultat.pk,
-        "etudiant": resultat.etudiant.nom_prenom,
-        "classe": resultat.etudiant.classe.nom,
-        "moyenne_generale": resultat.moyenne_generale,
-        "mention": resultat.mention,
-        "photo": request.build_absolute_uri(resultat.etudiant.photo.url) if resultat.etudiant.photo else ""
+        "id": resultat.pk if resultat else 0,
+        "etudiant": etudiant.nom_prenom,
+        "classe": etudiant.classe.nom,
+        "moyenne_generale": calcul.moyenne_generale or 0,
+        "mention": calcul.mention,
+        "photo": request.build_absolute_uri(etudiant.photo.url) if etudiant.photo else ""
     }
 
+@examen_route.get("/rattrapages", response=list[RattrapageOut])
+def list_rattrapages(request, session_id: int = None, classe_id: int = None, matiere_id: int = None, matricule: str = None):
+    """
+    Candidats au rattrapage : matières dont la moyenne brute est inférieure à 10
+    (lecture de l'index pré-calculé).
+    
+    **Paramètres de requête :**
+    - **session_id** (int, optionnel) : session (par défaut, la session courante)
+    - **classe_id**, **matiere_id** (int, optionnels) : filtres
+    - **matricule** (str, optionnel) : un seul étudiant
+    
+    **Réponses :**
+    - **200** : Liste des candidats, par matière puis par étudiant
+    - **404** : Session ou étudiant non trouvé (ou, sans session_id, aucune session courante configurée)
+    
+    **Exemple de réponse :**
+    ```json
+    [
+        {
+            "etudiant_id": 1,
+            "matricule": "1234",
+            "etudiant": "DUPONT Jean",
+            "classe_id": 1,
+            "classe": "INFO-1",
+            "matiere_id": 3,
+            "matiere": "Algorithmes",
+            "session_id": 1,
+            "session": "Semestre 1",
+            "note_devoir": 8.0,
+            "note_examen": 7.5,
+            "moyenne_brute": 7.7,
+            "coefficient": 3
+        }
+    ]
+    ```
+    """
+    session = get_object_or_404(SemestreExamen, id=session_id) if session_id else session_courante_ou_404()
+    etudiant_id = get_object_or_404(Etudiant, matricule=matricule).pk if matricule else None
+    
+    return [
+        {
+            "etudiant_id": candidat.etudiant_id,
+            "matricule": candidat.etudiant.matricule,
+            "etudiant": candidat.etudiant.nom_prenom,
+            "classe_id": candidat.etudiant.classe_id,
+            "classe": candidat.etudiant.classe.nom,
+            "matiere_id": candidat.matiere_id,
+            "matiere": candidat.matiere.nom,
+            "session_id": candidat.session_id,
+            "session": candidat.session.titre,
+            "note_devoir": candidat.note_devoir,
+            "note_examen": candidat.note_examen,
+            "moyenne_brute": candidat.moyenne_brute,
+            "coefficient": candidat.coefficient
+        }
+        for candidat in rattrapages(session, classe_id=classe_id, matiere_id=matiere_id, etudiant_id=etudiant_id)
+    ]
+
 @examen_route.post("/resultats")
 def create_resultat(request, data: ResultatEtudiantCreate):
     """
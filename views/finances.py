@@ -1,10 +1,13 @@
 # views/finances.py
 from ninja import Router
+from ninja.decorators import decorate_view
 from django.shortcuts import get_object_or_404
 from django.db.models import Sum, Q
 from decimal import Decimal
 from parametre.models import Etudiant, Classe
 from finances.models import FraisScolarite
+from finances.registre import registre_classe, totaux_registre
+from parametre.versions import ressource_etudiant
 from schemas.financeSchema import (
     FraisScolariteOut,
     FraisScolariteCreate,
@@ -16,6 +19,7 @@ from schemas.financeSchema import (
 finance_router = Router()
 
 @finance_router.get("/etudiant/{matricule}", response=EtudiantFinanceOut)
+@decorate_view(ressource_etudiant)
 def get_finance_etudiant(request, matricule: str):
     """
     Récupère l'état financier complet d'un étudiant.
@@ -253,24 +257,19 @@ def get_finances_classe(request, classe_id: int, mois: str = None):
             "total_paye": 150000.00,
             "total_du": 200000.00,
             "solde": -50000.00,
+            "mois_couverts": ["Octobre", "Novembre"],
             "statut": "En retard"
         }
     ]
     ```
     """
     classe = get_object_or_404(Classe, id=classe_id)
-    etudiants = Etudiant.objects.filter(classe=classe, actif=True)
     
     result = []
-    for etudiant in etudiants:
-        frais_query = FraisScolarite.objects.filter(etudiant=etudiant)
-        
-        if mois:
-            frais_query = frais_query.filter(mois=mois)
-        
-        total_paye = frais_query.filter(is_complet=True).aggregate(Sum('montant'))['montant__sum'] or Decimal('0')
-        total_du = frais_query.aggregate(Sum('montant'))['montant__sum'] or Decimal('0')
-        solde = total_paye - total_du
+    # Totaux de tous les étudiants en une seule requête
+    for ligne in registre_classe(classe, mois):
+        etudiant = ligne["etudiant"]
+        solde = ligne["solde"]
         
         # Déterminer le statut
         if solde >= 0:
@@ -286,21 +285,23 @@ def get_finances_classe(request, classe_id: int, mois: str = None):
                 "matricule": etudiant.matricule,
                 "nom_prenom": etudiant.nom_prenom
             },
-            "total_paye": float(total_paye),
-            "total_du": float(total_du),
+            "total_paye": float(ligne["total_paye"]),
+            "total_du": float(ligne["total_du"]),
             "solde": float(solde),
+            "mois_couverts": ligne["mois_couverts"],
             "statut": statut
         })
     
     return result
 
 @finance_router.get("/statistiques/classe/{classe_id}")
-def get_statistiques_financieres_classe(request, classe_id: int):
+def get_statistiques_financieres_classe(request, classe_id: int, mois: str = None):
     """
     Récupère les statistiques financières d'une classe.
     
     **Paramètres :**
     - **classe_id** (int) : ID de la classe
+    - **mois** (str, optionnel) : Filtrer par mois
     
     **Réponses :**
     - **200** : Statistiques financières
@@ -321,36 +322,22 @@ def get_statistiques_financieres_classe(request, classe_id: int):
     ```
     """
     classe = get_object_or_404(Classe, id=classe_id)
-    etudiants = Etudiant.objects.filter(classe=classe, actif=True)
+    lignes = registre_classe(classe, mois)
+    totaux = totaux_registre(lignes)
     
-    total_attendu = Decimal('0')
-    total_percu = Decimal('0')
-    etudiants_a_jour = 0
-    etudiants_en_retard = 0
-    
-    for etudiant in etudiants:
-        frais = FraisScolarite.objects.filter(etudiant=etudiant)
-        etudiant_du = frais.aggregate(Sum('montant'))['montant__sum'] or Decimal('0')
-        etudiant_paye = frais.filter(is_complet=True).aggregate(Sum('montant'))['montant__sum'] or Decimal('0')
-        
-        total_attendu += etudiant_du
-        total_percu += etudiant_paye
-        
-        if etudiant_paye >= etudiant_du:
-            etudiants_a_jour += 1
-        else:
-            etudiants_en_retard += 1
+    total_attendu = totaux["total_attendu"]
+    total_percu = totaux["total_percu"]
     
     taux_recouvrement = (float(total_percu) / float(total_attendu) * 100) if total_attendu > 0 else 0
     montant_impaye = total_attendu - total_percu
     
     return {
         "classe": classe.nom,
-        "nombre_etudiants": len(etudiants),
+        "nombre_etudiants": len(lignes),
         "total_attendu": float(total_attendu),
         "total_percu": float(total_percu),
         "taux_recouvrement": round(taux_recouvrement, 2),
-        "etudiants_a_jour": etudiants_a_jour,
-        "etudiants_en_retard": etudiants_en_retard,
+        "etudiants_a_jour": totaux["etudiants_a_jour"],
+        "etudiants_en_retard": totaux["etudiants_en_retard"],
         "montant_impaye": float(montant_impaye)
     }
\ No newline at end of file
@@ -1,9 +1,15 @@
 # views/notes.py
 from ninja import Router
+from ninja.decorators import decorate_view
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
-from parametre.models import Etudiant
+from parametre.models import Etudiant, Classe
+from parametre.moteur_notes import MoteurNotes
+from parametre.versions import ressource_etudiant
+from parametre.statistiques import matrices_notes, moyennes_generales, statistiques_moyennes
 from saisie_notes.models import NoteDevoir, NoteExamen
+from saisie_notes import en_masse
+from gestion_des_resultats.resultats import session_courante_ou_404
 from schemas.notesSchema import (
     NotesEtudiantOut, 
     NoteDetailOut,
@@ -15,6 +21,7 @@ from schemas.notesSchema import (
 notes_router = Router()
 
 @notes_router.get("/etudiant/{matricule}", response=NotesEtudiantOut)
+@decorate_view(ressource_etudiant)
 def get_notes_etudiant(request, matricule: str):
     """
     Récupère toutes les notes d'un étudiant (devoirs et examens).
@@ -181,33 +188,28 @@ def create_notes_bulk(request, data: NoteBulkCreateIn):
     - **200** : Notes créées avec succès
     - **400** : Données invalides
     """
-    created_notes = []
-    errors = []
+    # Conflits détectés en mémoire, écriture par lots dans une transaction
+    notes, conflits = en_masse.creer_notes(
+        data.type,
+        data.evaluation_id,
+        [(note_data.etudiant_id, note_data.note) for note_data in data.notes],
+    )
     
-    for note_data in data.notes:
-        try:
-            if data.type == "devoir":
-                note = NoteDevoir.objects.create(
-                    devoir_id=data.evaluation_id,
-                    etudiant_id=note_data.etudiant_id,
-                    note=note_data.note
-                )
-            else:  # examen
-                note = NoteExamen.objects.create(
-                    examen_id=data.evaluation_id,
-                    etudiant_id=note_data.etudiant_id,
-                    note=note_data.note
-                )
-            created_notes.append({
-                "id": note.pk,
-                "etudiant_id": note_data.etudiant_id,
-                "note": note_data.note
-            })
-        except Exception as e:
-            errors.append({
-                "etudiant_id": note_data.etudiant_id,
-                "error": str(e)
-            })
+    created_notes = [
+        {
+            "id": note.pk,
+            "etudiant_id": note.etudiant_id,
+            "note": note.note
+        }
+        for note in notes
+    ]
+    errors = [
+        {
+            "etudiant_id": etudiant_id,
+            "error": message
+        }
+        for (etudiant_id, _), message in conflits
+    ]
     
     return {
         "success": True,
@@ -242,28 +244,26 @@ def update_notes_bulk(request, data: NoteBulkUpdateIn):
     - **200** : Notes mises à jour avec succès
     - **400** : Données invalides
     """
-    updated_notes = []
-    errors = []
+    # Notes chargées en une requête, mises à jour par lots dans une transaction
+    notes, conflits = en_masse.modifier_notes(
+        data.type,
+        [(note_data.id, note_data.note) for note_data in data.notes],
+    )
     
-    for note_data in data.notes:
-        try:
-            if data.type == "devoir":
-                note = NoteDevoir.objects.get(id=note_data.id)
-            else:  # examen
-                note = NoteExamen.objects.get(id=note_data.id)
-            
-            note.note = note_data.note
-            note.save()
-            
-            updated_notes.append({
-                "id": note.pk,
-                "note": note.note
-            })
-        except Exception as e:
-            errors.append({
-                "id": note_data.id,
-                "error": str(e)
-            })
+    updated_notes = [
+        {
+            "id": note.pk,
+            "note": note.note
+        }
+        for note in notes
+    ]
+    errors = [
+        {
+            "id": note_id,
+            "error": message
+        }
+        for (note_id, _), message in conflits
+    ]
     
     return {
         "success": True,
@@ -283,6 +283,7 @@ def get_statistiques_classe(request, classe_id: int, session_id: int = None):
     
     **Réponses :**
     - **200** : Statistiques de la classe
+    - **404** : Aucune session donnée ni configurée dans les paramètres de résultats
     
     **Exemple de réponse :**
     ```json
@@ -300,13 +301,19 @@ def get_statistiques_classe(request, classe_id: int, session_id: int = None):
             "Assez Bien": 9,
             "Passable": 0,
             "Échec": 5
+        },
+        "percentiles": {
+            "p25": 11.2,
+            "p50": 13.4,
+            "p75": 15.1,
+            "p90": 16.3
         }
     }
     ```
     """
-    etudiants = Etudiant.objects.filter(classe_id=classe_id)
+    etudiant_ids = list(Etudiant.objects.filter(classe_id=classe_id).values_list('id', flat=True))
     
-    if not etudiants.exists():
+    if not etudiant_ids:
         return {
             "classe_id": classe_id,
             "nombre_etudiants": 0,
@@ -318,35 +325,16 @@ def get_statistiques_classe(request, classe_id: int, session_id: int = None):
             "repartition_mentions": {}
         }
     
-    moyennes = []
-    mentions = {"Très Bien": 0, "Bien": 0, "Assez Bien": 0, "Passable": 0, "Échec": 0}
-    
-    for etudiant in etudiants:
-        moyenne = etudiant.moyenne_generale() or 0
-        moyennes.append(moyenne)
-        
-        # Calcul des mentions
-        if moyenne >= 16:
-            mentions["Très Bien"] += 1
-        elif moyenne >= 14:
-            mentions["Bien"] += 1
-        elif moyenne >= 12:
-            mentions["Assez Bien"] += 1
-        elif moyenne >= 10:
-            mentions["Passable"] += 1
-        else:
-            mentions["Échec"] += 1
+    session = session_id or session_courante_ou_404()
     
-    nombre_admis = sum([1 for m in moyennes if m >= 10])
-    moyenne_classe = sum(moyennes) / len(moyennes) if moyennes else 0
+    # Toutes les notes de la classe sont chargées en deux requêtes puis
+    # pivotées en matrices étudiant × matière pour un calcul vectorisé
+    moteur = MoteurNotes(get_object_or_404(Classe, id=classe_id), session, etudiants=etudiant_ids)
+    devoirs, examens, coefficients = matrices_notes(moteur, etudiant_ids)
+    statistiques = statistiques_moyennes(moyennes_generales(devoirs, examens, coefficients))
     
     return {
         "classe_id": classe_id,
-        "nombre_etudiants": len(etudiants),
-        "moyenne_classe": round(moyenne_classe, 2),
-        "note_max": max(moyennes) if moyennes else 0,
-        "note_min": min(moyennes) if moyennes else 0,
-        "nombre_admis": nombre_admis,
-        "taux_reussite": round((nombre_admis / len(etudiants)) * 100, 2) if etudiants else 0,
-        "repartition_mentions": mentions
+        "nombre_etudiants": len(etudiant_ids),
+        **statistiques
     }
\ No newline at end of file
@@ -1,9 +1,12 @@
 from ninja import Router
+from ninja.decorators import decorate_view
 from parametre.models import Matiere, Classe, Filiere
+from parametre.cache_api import reponse_en_cache
 from schemas.scolariteSchema import MatiereOut, MatiereCreate, MatiereUpdate, ClasseOut, ClasseCreate, FilliereCreate,FilliereOut
 scolarite_route = Router()
 
 @scolarite_route.get("/matieres", response=list[MatiereOut])
+@decorate_view(reponse_en_cache(Matiere, Classe))
 def list_matieres(request):
     return [
         {
@@ -13,7 +16,7 @@ def list_matieres(request):
             "abreviation": matiere.abreviation,
             "coefficient": matiere.coefficient,
             "classe": matiere.classe.nom,
-        } for matiere in Matiere.objects.all()
+        } for matiere in Matiere.objects.select_related('classe')
     ]
 
 @scolarite_route.post("/matieres", response=MatiereOut)
@@ -53,6 +56,7 @@ def delete_matiere(request, matiere_id:int):
 
 ## Liste des classes
 @scolarite_route.get("/classes", response=list[ClasseOut])
+@decorate_view(reponse_en_cache(Classe))
 def list_classes(request):
     return Classe.objects.all()
 
@@ -82,6 +86,7 @@ def create_filliere(request, payload: FilliereCreate):
     return filiere
 
 @scolarite_route.get("/fillieres/", response=list[FilliereOut])
+@decorate_view(reponse_en_cache(Filiere))
 def list_fillieres(request):
     return Filiere.objects.all()
 
@@ -1,19 +1,42 @@
 from django.shortcuts import render, redirect
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.contrib.admin.models import LogEntry
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from parametre.journal import page_journal
+
+
+def _entier(valeur):
+    try:
+        return int(valeur)
+    except (TypeError, ValueError):
+        return None
 
 
 class HomeView(LoginRequiredMixin, View):
     template_name = 'website/home.html'
 
     def get(self, request):
-        logs = LogEntry.objects.all().order_by('-action_time')  # Récupère les derniers logs en premier
         if not request.user.is_authenticated:
             return redirect('login')
-        
-        return render(request, self.template_name, {'logs': logs})
+
+        # Fil d'activité paginé (derniers logs en premier), filtrable par utilisateur / modèle
+        utilisateur = _entier(request.GET.get('utilisateur'))
+        modele = _entier(request.GET.get('modele'))
+        try:
+            logs, suivant = page_journal(request.GET.get('curseur'), user_id=utilisateur, content_type_id=modele)
+        except ValueError:
+            logs, suivant = page_journal(user_id=utilisateur, content_type_id=modele)
+
+        return render(request, self.template_name, {
+            'logs': logs,
+            'suivant': suivant,
+            'utilisateur': utilisateur,
+            'modele': modele,
+            'utilisateurs': get_user_model().objects.filter(is_staff=True).order_by('username').only('id', 'username'),
+            'modeles': ContentType.objects.order_by('app_label', 'model'),
+        })
 
     def post(self, request):
         # Handle any form submissions or actions here if needed
-        return redirect('home')
\ No newline at end of file
+        return redirect('home')